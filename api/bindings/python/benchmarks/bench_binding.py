@@ -0,0 +1,128 @@
+"""
+Benchmark the RISE binding against the scripted fake backend.
+
+For each client count, that many threads share one RiseClient and stream
+commands through it. Reports latency and time-to-first-chunk percentiles,
+requests per second, and the memory held per in-flight request.
+
+Usage:
+    python benchmarks/bench_binding.py --clients 1,4,16 --requests 200
+"""
+
+import argparse
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import common
+from rise.fake_backend import FakeRiseBackend
+from rise.rise import RiseClient
+
+
+def stream_once(client: RiseClient, prompt: str) -> Tuple[float, float]:
+    """
+    Stream one command and time it.
+
+    Args:
+        client: The client to send through
+        prompt: The command to send
+
+    Returns:
+        Seconds to the first chunk and seconds to completion
+    """
+    start = time.perf_counter()
+    first_chunk = None
+    for _ in client.stream(prompt):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+    return first_chunk, time.perf_counter() - start
+
+
+def run(client: RiseClient, prompts: List[str], clients: int, requests: int) -> dict:
+    """
+    Send a number of requests from a number of concurrent clients.
+
+    Args:
+        client: The client shared by every thread
+        prompts: Prompts to cycle through
+        clients: Number of concurrent threads
+        requests: Total number of requests
+
+    Returns:
+        dict: Summary of the run
+    """
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        start = time.perf_counter()
+        timings = list(pool.map(lambda i: stream_once(client, prompts[i % len(prompts)]), range(requests)))
+        elapsed = time.perf_counter() - start
+    return common.summarize('binding', clients, [total for _, total in timings], elapsed,
+                            [first for first, _ in timings])
+
+
+def memory_per_request(backend: FakeRiseBackend, client: RiseClient, prompt: str, count: int) -> float:
+    """
+    Measure the memory held by each queued or in-flight request.
+
+    Backend replies are held back while the requests are queued, so all of them
+    are outstanding when memory is measured.
+
+    Args:
+        backend: The fake backend used by the client
+        client: The client to send through
+        prompt: The command to send
+        count: Number of requests to keep outstanding
+
+    Returns:
+        float: Bytes allocated per outstanding request
+    """
+    release = threading.Event()
+    script_for = backend.script_for
+
+    def held_script_for(command: dict):
+        release.wait()
+        return script_for(command)
+
+    backend.script_for = held_script_for
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        requests = [client.submit(prompt) for _ in range(count)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        release.set()
+        backend.script_for = script_for
+
+    for request in requests:
+        request.future.result()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return allocated / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=common.parse_counts, default=[1, 4, 16],
+                        help='comma separated numbers of concurrent clients')
+    parser.add_argument('--requests', type=int, default=200, help='requests per client count')
+    parser.add_argument('--memory-requests', type=int, default=1000,
+                        help='outstanding requests used to measure memory per request')
+    common.add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    script = common.load_script(args)
+    prompts = common.prompts_from_script(script)
+    backend = FakeRiseBackend(**script)
+    client = RiseClient(backend)
+    client.register()
+
+    results = [run(client, prompts, clients, args.requests) for clients in args.clients]
+    per_request = memory_per_request(backend, client, prompts[0], args.memory_requests)
+    for result in results:
+        result['bytes_per_in_flight_request'] = round(per_request)
+    common.print_results(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
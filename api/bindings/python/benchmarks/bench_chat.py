@@ -0,0 +1,71 @@
+"""
+Benchmark the rise-chat.py loop against the scripted fake backend.
+
+Feeds prompts to the chat loop in place of the keyboard and measures the time
+from submitting each prompt until the loop asks for the next one, which includes
+rendering and stopping the thinking animation.
+
+Usage:
+    python benchmarks/bench_chat.py --requests 20
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import common
+
+
+def run(chat, prompts, requests: int) -> dict:
+    """
+    Drive the chat loop through a number of prompts.
+
+    Args:
+        chat: The imported rise-chat.py module
+        prompts: Prompts to cycle through
+        requests: Number of prompts to send
+
+    Returns:
+        dict: Summary of the run
+    """
+    latencies = []
+    submitted = None
+
+    def fake_input(_prompt: str = '') -> str:
+        nonlocal submitted
+        now = time.perf_counter()
+        if submitted is not None:
+            latencies.append(now - submitted)
+        if len(latencies) == requests:
+            raise EOFError
+        submitted = time.perf_counter()
+        return prompts[len(latencies) % len(prompts)]
+
+    chat.input = fake_input
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            chat.main()
+        except EOFError:
+            pass
+    elapsed = time.perf_counter() - start
+    return common.summarize('chat loop', 1, latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20, help='prompts to send')
+    common.add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    script = common.load_script(args)
+    common.use_fake_backend(script)
+    chat = common.load_example('rise-chat.py')
+    prompts = common.prompts_from_script(script)
+
+    common.print_results([run(chat, prompts, args.requests)], args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark the rise-gui.py Flask bridge against the scripted fake backend.
+
+For each client count, that many threads post messages to /api/send-message,
+and to the server-sent events endpoint /api/stream-message, through Flask test
+clients. Each thread sends its own client id, so the bridge queues the threads
+fairly rather than limiting them as one client. Reports latency percentiles,
+time to the first streamed chunk and requests per second.
+
+Usage:
+    python benchmarks/bench_gui.py --clients 1,4,16 --requests 200
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import common
+
+
+def run(app, endpoint: str, prompts: List[str], clients: int, requests: int) -> dict:
+    """
+    Post a number of messages from a number of concurrent clients.
+
+    Args:
+        app: The Flask application
+        endpoint: Path of the endpoint to post to
+        prompts: Prompts to cycle through
+        clients: Number of concurrent threads
+        requests: Total number of requests
+
+    Returns:
+        dict: Summary of the run
+    """
+    local = threading.local()
+
+    def post(index: int) -> Tuple[Optional[float], float]:
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+            local.headers = {'X-Client-Id': f'bench-{threading.get_ident()}'}
+        start = time.perf_counter()
+        response = local.client.post(endpoint, json={'message': prompts[index % len(prompts)]},
+                                     headers=local.headers, buffered=False)
+        if response.status_code != 200:
+            raise RuntimeError(f'{endpoint} returned {response.status_code}: {response.get_data(as_text=True)}')
+        first_chunk = None
+        for event in response.response:
+            if first_chunk is None and not event.startswith(b'event: queued'):
+                first_chunk = time.perf_counter() - start
+        response.close()
+        return first_chunk, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        start = time.perf_counter()
+        timings = list(pool.map(post, range(requests)))
+        elapsed = time.perf_counter() - start
+    streamed = endpoint == '/api/stream-message'
+    return common.summarize(f'gui {endpoint}', clients, [total for _, total in timings], elapsed,
+                            [first for first, _ in timings] if streamed else ())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=common.parse_counts, default=[1, 4, 16],
+                        help='comma separated numbers of concurrent clients')
+    parser.add_argument('--requests', type=int, default=200, help='requests per client count')
+    common.add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    script = common.load_script(args)
+    common.use_fake_backend(script)
+    gui = common.load_example('rise-gui.py')
+    prompts = common.prompts_from_script(script)
+    ready_client = gui.app.test_client()
+    while ready_client.get('/api/ready').status_code != 200:
+        time.sleep(0.01)
+
+    results = []
+    for endpoint in ('/api/send-message', '/api/stream-message'):
+        results += [run(gui.app, endpoint, prompts, clients, args.requests) for clients in args.clients]
+    common.print_results(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
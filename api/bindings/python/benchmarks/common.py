@@ -0,0 +1,193 @@
+"""
+Shared helpers for the RISE binding benchmarks.
+
+Provides the scripted fake backend settings shared by every benchmark, latency
+statistics, and report printing.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional, Sequence
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BINDING_DIR = os.path.dirname(BENCHMARK_DIR)
+DEFAULT_SCRIPT = os.path.join(BENCHMARK_DIR, 'script.json')
+
+# Make the rise package importable when running from a source checkout
+if BINDING_DIR not in sys.path:
+    sys.path.insert(0, BINDING_DIR)
+
+
+def add_backend_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the options that configure the fake backend and the workload.
+
+    Args:
+        parser: The parser to add the options to
+    """
+    parser.add_argument('--script', default=DEFAULT_SCRIPT,
+                        help='JSON script replayed by the fake backend')
+    parser.add_argument('--first-chunk-delay', type=float,
+                        help='override the seconds before the first chunk of each response')
+    parser.add_argument('--chunk-delay', type=float,
+                        help='override the seconds between chunks')
+    parser.add_argument('--chunk-size', type=int,
+                        help='override the content bytes per chunk')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON instead of a table')
+
+
+def load_script(args: argparse.Namespace) -> dict:
+    """
+    Load the backend script, applying any overrides given on the command line.
+
+    Args:
+        args: Parsed arguments from a parser set up by add_backend_arguments
+
+    Returns:
+        dict: Keyword arguments for FakeRiseBackend
+    """
+    with open(args.script, encoding='utf-8') as f:
+        script = json.load(f)
+    for name in ('first_chunk_delay', 'chunk_delay', 'chunk_size'):
+        if getattr(args, name) is not None:
+            script[name] = getattr(args, name)
+    return script
+
+
+def use_fake_backend(script: dict) -> None:
+    """
+    Make the module-level rise functions use the fake backend with a script.
+
+    Must be called before the rise package is imported.
+
+    Args:
+        script: Keyword arguments for FakeRiseBackend
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump(script, f)
+    os.environ['RISE_BACKEND'] = 'fake'
+    os.environ['RISE_FAKE_SCRIPT'] = f.name
+
+
+def load_example(filename: str):
+    """
+    Import one of the example scripts next to the rise package, such as rise-gui.py.
+
+    Args:
+        filename: File name of the script
+
+    Returns:
+        The imported module
+    """
+    name = os.path.splitext(filename)[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BINDING_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def prompts_from_script(script: dict) -> List[str]:
+    """
+    Get the prompts to cycle through: every scripted prompt, or a single echo prompt.
+
+    Args:
+        script: Keyword arguments for FakeRiseBackend
+
+    Returns:
+        list: The prompts
+    """
+    return list(script.get('responses', {})) or ['What is my GPU?']
+
+
+def parse_counts(value: str) -> List[int]:
+    """Parse a comma separated list of client counts, e.g. "1,4,16"."""
+    return [int(count) for count in value.split(',') if count]
+
+
+def percentile(samples: Sequence[float], q: float) -> Optional[float]:
+    """
+    Get a percentile of a set of samples by the nearest-rank method.
+
+    Args:
+        samples: The samples
+        q: The percentile, between 0 and 100
+
+    Returns:
+        The percentile, or None if there are no samples
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(name: str, clients: int, latencies: Sequence[float], elapsed: float,
+              first_chunk: Sequence[float] = (), **extra) -> Dict[str, object]:
+    """
+    Summarize one benchmark run.
+
+    Args:
+        name: Name of the run
+        clients: Number of concurrent clients
+        latencies: Seconds taken by each request
+        elapsed: Wall-clock seconds for the whole run
+        first_chunk: Seconds to the first chunk of each request, if measured
+        **extra: Additional values to report
+
+    Returns:
+        dict: The run's statistics
+    """
+    result = {
+        'name': name,
+        'clients': clients,
+        'requests': len(latencies),
+        'requests_per_second': len(latencies) / elapsed if elapsed > 0 else None,
+    }
+    for q in (50, 95, 99):
+        result[f'p{q}_ms'] = _ms(percentile(latencies, q))
+    for q in (50, 95, 99):
+        result[f'first_chunk_p{q}_ms'] = _ms(percentile(first_chunk, q))
+    result.update(extra)
+    return result
+
+
+def print_results(results: List[Dict[str, object]], as_json: bool = False) -> None:
+    """
+    Print benchmark results as a table, or as JSON.
+
+    Args:
+        results: Results from summarize
+        as_json: Whether to print JSON
+    """
+    if as_json:
+        print(json.dumps(results, indent=2))
+        return
+
+    columns = []
+    for result in results:
+        for column in result:
+            if column not in columns and any(r.get(column) is not None for r in results):
+                columns.append(column)
+    rows = [[_format(result.get(column)) for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(value.rjust(width) for value, width in zip(row, widths)))
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else seconds * 1000
+
+
+def _format(value: object) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.2f}'
+    return str(value)
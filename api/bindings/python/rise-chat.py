@@ -1,5 +1,4 @@
 from rise import rise
-import time
 from colorama import Fore, Style, init  # type: ignore
 import sys
 import threading
@@ -11,7 +10,7 @@ def thinking_bubble(stop_event):
                 break
             sys.stdout.write('.')
             sys.stdout.flush()
-            time.sleep(0.5)
+            stop_event.wait(0.5)  # returns as soon as the response starts
         sys.stdout.write('\b\b\b   \b\b\b')  # Erase the dots
 
 def main():
@@ -25,10 +24,18 @@ def main():
         thinking_thread = threading.Thread(
             target=thinking_bubble, args=(stop_event,))
         thinking_thread.start()  # Start the thinking dots in a separate thread
-        response = rise.send_rise_command(user_prompt)
-        stop_event.set()  # Signal the thinking thread to stop
-        thinking_thread.join()  # Wait for the thread to finish
-        print(Fore.YELLOW + "RISE: " + response)
+        for chunk in rise.stream_rise_command(user_prompt):
+            if not stop_event.is_set():
+                stop_event.set()  # Stop the thinking dots on the first chunk
+                thinking_thread.join()  # Wait for the thread to finish
+                sys.stdout.write(Fore.YELLOW + "RISE: ")
+            if isinstance(chunk, rise.RiseTextChunk):
+                sys.stdout.write(chunk.content)
+                sys.stdout.flush()
+        if not stop_event.is_set():
+            stop_event.set()
+            thinking_thread.join()
+        print(Style.RESET_ALL)
 
 
 if __name__ == "__main__":
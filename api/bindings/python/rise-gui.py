@@ -1,44 +1,169 @@
 import os
 import sys
 import json
+import argparse
 import subprocess
 import threading
 import shutil
 import time
 import tempfile
-from flask import Flask, request, jsonify
+import queue
+import uuid
+from concurrent.futures import CancelledError
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from rise import rise
+from rise.cache import ResponseCache
+from rise.scheduler import MessageScheduler, QueueFullError
 
 # Create a Flask server to handle API requests from the Electron app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Initialize RISE client
+# Initialize RISE client. Registration completes in the background; the
+# readiness endpoint reports when RISE is ready to take messages.
 try:
-    rise.register_rise_client()
-    print("RISE client initialization commented out")
+    rise_client = rise.get_rise_client()
+    if not rise_client.register_callback():
+        raise RuntimeError('Registration Failed')
+    print("RISE client registered, waiting for RISE to become ready")
 except Exception as e:
     print(f"Error initializing RISE client: {str(e)}")
     sys.exit(1)
 
+# Messages wait in a bounded queue and are handed to RISE round-robin across
+# clients; the limits are replaced from the command line in main()
+scheduler = MessageScheduler(rise_client)
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    """Liveness endpoint: the bridge is up and serving requests"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness endpoint: RISE has reported READY and can take messages"""
+    if rise_client.ready:
+        return jsonify({'ready': True})
+    return jsonify({'ready': False}), 503
+
+def read_message_request():
+    """Read the message, routing options and client and request ids of a request"""
+    data = request.json or {}
+    client_id = request.headers.get('X-Client-Id') or data.get('client_id') or request.remote_addr
+    request_id = data.get('request_id') or uuid.uuid4().hex
+    return (data.get('message', ''), data.get('adapter', ''), data.get('system_prompt', ''),
+            str(client_id), str(request_id))
+
+def queue_full_response(error):
+    """429 response telling the client when to try again"""
+    response = jsonify({'error': str(error)})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
 @app.route('/api/send-message', methods=['POST'])
 def send_message():
     """API endpoint to send messages to RISE"""
-    data = request.json
-    message = data.get('message', '')
-    adapter = data.get('adapter', '')
-    system_prompt = data.get('system_prompt', '')
+    message, adapter, system_prompt, client_id, request_id = read_message_request()
     if not message:
         return jsonify({'error': 'Empty message'}), 400
-    
+    if not rise_client.ready:
+        return jsonify({'error': 'RISE is not ready yet'}), 503
+
+    try:
+        scheduled = scheduler.submit(client_id, message, adapter, system_prompt, request_id=request_id)
+    except QueueFullError as e:
+        return queue_full_response(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+
+    headers = {'X-Request-Id': request_id}
     try:
-        # Send message to RISE
-        response = rise.send_rise_command(message, adapter, system_prompt)
-        #response = f"RISE module is commented out. Your message was: {message}"
-        return jsonify({'response': response})
+        response = scheduled.future.result()
+        return jsonify({'response': response}), 200, headers
+    except CancelledError:
+        return jsonify({'error': 'Request was cancelled'}), 409, headers
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'error': str(e)}), 500, headers
+
+def format_sse(event, data):
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/stream-message', methods=['POST'])
+def stream_message():
+    """API endpoint that relays the RISE response as server-sent events
+
+    Sends a "queued" event with the request id and queue position, then a
+    "text" event for every text chunk and a "chart" event for every chart
+    fragment as they arrive, then a "done" event, a "cancelled" event if the
+    request is cancelled, or an "error" event if the request fails. If the
+    client disconnects, its request is cancelled.
+    """
+    message, adapter, system_prompt, client_id, request_id = read_message_request()
+    if not message:
+        return jsonify({'error': 'Empty message'}), 400
+    if not rise_client.ready:
+        return jsonify({'error': 'RISE is not ready yet'}), 503
+
+    chunks = queue.Queue()
+    try:
+        scheduled = scheduler.submit(client_id, message, adapter, system_prompt,
+                                     on_chunk=chunks.put, request_id=request_id)
+    except QueueFullError as e:
+        return queue_full_response(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+
+    def generate():
+        try:
+            yield format_sse('queued', {'request_id': request_id,
+                                        'position': scheduler.position(scheduled)})
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                event = 'chart' if isinstance(chunk, rise.RiseChartChunk) else 'text'
+                yield format_sse(event, {'content': chunk.content})
+            scheduled.future.result()  # raises the error that ended the request
+            yield format_sse('done', {})
+        except CancelledError:
+            yield format_sse('cancelled', {'request_id': request_id})
+        except Exception as e:
+            yield format_sse('error', {'error': str(e)})
+        finally:
+            scheduler.cancel(request_id)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no',
+                             'X-Request-Id': request_id})
+
+@app.route('/api/cancel', methods=['POST'])
+def cancel_message():
+    """API endpoint that cancels a queued or in-flight message by request id
+
+    A cancelled in-flight message is released at once; RISE keeps generating
+    the abandoned response, so the message keeps its place in flight (and is
+    reported as abandoned by /api/queue) until RISE finishes it.
+    """
+    data = request.json or {}
+    request_id = data.get('request_id', '')
+    if not scheduler.cancel(str(request_id)):
+        return jsonify({'error': 'Unknown or finished request'}), 404
+    return jsonify({'cancelled': request_id})
+
+@app.route('/api/queue', methods=['GET'])
+def queue_metrics():
+    """API endpoint reporting queue depth, in-flight messages and admission counters"""
+    return jsonify(scheduler.metrics())
+
+@app.route('/api/cache', methods=['GET'])
+def cache_stats():
+    """API endpoint reporting response cache size and hit and miss counters"""
+    if rise_client.cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **rise_client.cache.stats()})
 
 def start_electron_app():
     """Start the Electron app"""
@@ -137,9 +262,32 @@ app.on('activate', function () {
                 f.write('''
 import React, { useState, useEffect, useRef } from 'react';
 import Chart from 'chart.js/auto';
-import axios from 'axios';
 import './App.css';
 
+// Read server-sent events from a fetch response, calling onEvent(event, data) for each
+async function readEvents(response, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffered.indexOf('\\n\\n')) !== -1) {
+      const frame = buffered.slice(0, boundary);
+      buffered = buffered.slice(boundary + 2);
+      let event = 'message';
+      let data = '';
+      frame.split('\\n').forEach((line) => {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      });
+      onEvent(event, JSON.parse(data));
+    }
+  }
+}
+
 function App() {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState('');
@@ -177,11 +325,29 @@ function App() {
     setIsTyping(true);
 
     try {
-      const response = await axios.post('http://localhost:5000/api/send-message', {
-        message: input.trim()
+      const response = await fetch('http://localhost:5000/api/stream-message', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ message: input.trim() })
+      });
+      if (!response.ok) {
+        const data = await response.json();
+        throw new Error(data.error);
+      }
+
+      // Append the text to the assistant message as it arrives
+      setMessages(prev => [...prev, { type: 'assistant', text: '' }]);
+      setIsTyping(false);
+      await readEvents(response, (event, data) => {
+        if (event === 'text') {
+          setMessages(prev => {
+            const last = prev[prev.length - 1];
+            return [...prev.slice(0, -1), { ...last, text: last.text + data.content }];
+          });
+        } else if (event === 'error') {
+          throw new Error(data.error);
+        }
       });
-      
-      setMessages(prev => [...prev, { type: 'assistant', text: response.data.response }]);
       setStatus('Ready');
     } catch (error) {
       console.error('Error sending message:', error);
@@ -1183,6 +1349,8 @@ textarea {
             const statusText = document.getElementById('status');
             const statusDot = document.getElementById('statusDot');
             const statusBar = document.getElementById('status');
+            // Identifies this tab to the bridge so its messages are queued fairly
+            const clientId = Math.random().toString(36).slice(2);
             
             messageForm.addEventListener('submit', async function(e) {
                 e.preventDefault();
@@ -1197,19 +1365,49 @@ textarea {
                 statusBar.textContent = 'RISE is thinking...';
                 
                 try {
-                    const response = await fetch('http://localhost:5000/api/send-message', {
+                    const response = await fetch('http://localhost:5000/api/stream-message', {
                         method: 'POST',
                         headers: {
-                            'Content-Type': 'application/json'
+                            'Content-Type': 'application/json',
+                            'X-Client-Id': clientId
                         },
                         body: JSON.stringify({ message, adapter, system_prompt })
                     });
                     
-                    const data = await response.json();
-                    if (response.ok) {
-                        addMessage('assistant', data.response.completed_response, data.response.completed_chart);
-                    } else {
+                    if (!response.ok) {
+                        const data = await response.json();
                         addMessage('system', `Error: ${data.error}`);
+                        statusBar.textContent = 'Ready';
+                        return;
+                    }
+
+                    // Show the text as it arrives; the chart is drawn once it is complete
+                    const messageDiv = addMessage('assistant', '');
+                    const textSpan = messageDiv.querySelector('.text');
+                    let text = '';
+                    let chart = '';
+                    await readEvents(response, (event, data) => {
+                        if (event === 'queued') {
+                            if (data.position > 0) {
+                                statusBar.textContent = `Waiting for ${data.position} message(s) ahead...`;
+                            }
+                        } else if (event === 'text') {
+                            statusBar.textContent = 'RISE is thinking...';
+                            text += data.content;
+                            textSpan.textContent = text;
+                            messagesContainer.scrollTop = messagesContainer.scrollHeight;
+                        } else if (event === 'chart') {
+                            chart += data.content;
+                        } else if (event === 'cancelled') {
+                            text += ' [cancelled]';
+                            textSpan.textContent = text;
+                        } else if (event === 'error') {
+                            throw new Error(data.error);
+                        }
+                    });
+                    if (chart !== '') {
+                        messageDiv.remove();
+                        addMessage('assistant', text, chart);
                     }
                     statusBar.textContent = 'Ready';
                 } catch (error) {
@@ -1218,6 +1416,30 @@ textarea {
                     statusBar.textContent = 'Error: Communication failed';
                 }
             });
+            // Read server-sent events from a fetch response, calling onEvent(event, data) for each
+            async function readEvents(response, onEvent) {
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffered = '';
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffered += decoder.decode(value, { stream: true });
+                    let boundary;
+                    while ((boundary = buffered.indexOf('\\n\\n')) !== -1) {
+                        const frame = buffered.slice(0, boundary);
+                        buffered = buffered.slice(boundary + 2);
+                        let event = 'message';
+                        let data = '';
+                        frame.split('\\n').forEach((line) => {
+                            if (line.startsWith('event: ')) event = line.slice(7);
+                            else if (line.startsWith('data: ')) data += line.slice(6);
+                        });
+                        onEvent(event, JSON.parse(data));
+                    }
+                }
+            }
+
             function getScalesForData(chunkData) {
                 let axes = {};
 
@@ -1414,6 +1636,7 @@ textarea {
                   };
                   new Chart(ctx, chartObj);
                 }
+                return messageDiv;
             }
         });
     </script>
@@ -1434,12 +1657,58 @@ textarea {
         except:
             print(f"Please open {os.path.join(electron_dir, 'public', 'index.html')} in your browser")
 
+def parse_args():
+    """Parse the command line options for the server"""
+    parser = argparse.ArgumentParser(description='G-Assist chat GUI and HTTP bridge')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=5000, help='port to listen on')
+    parser.add_argument('--server', choices=['dev', 'waitress'], default='dev',
+                        help='"dev" for the Flask development server, "waitress" for a production WSGI server')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='worker threads handling requests (waitress only)')
+    parser.add_argument('--connection-limit', type=int, default=100,
+                        help='open connections accepted before new ones wait in the backlog (waitress only)')
+    parser.add_argument('--max-queued', type=int, default=32,
+                        help='messages waiting for RISE before new ones are rejected with 429')
+    parser.add_argument('--max-queued-per-client', type=int, default=4,
+                        help='messages one client may have waiting for RISE')
+    parser.add_argument('--cache-ttl', type=float, default=0,
+                        help='seconds to answer repeated messages from a response cache (0 disables the cache)')
+    parser.add_argument('--cache-max-bytes', type=int, default=1 << 20,
+                        help='size limit of the response cache')
+    parser.add_argument('--cache-exclude-adapter', action='append', default=[], metavar='ADAPTER',
+                        help='adapter whose responses are never cached; may be repeated')
+    parser.add_argument('--no-gui', action='store_true', help='serve the API without opening the GUI')
+    return parser.parse_args()
+
+def serve(args):
+    """Serve the Flask app with the selected server"""
+    if args.server == 'waitress':
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            print("The waitress server is not installed. Install it with: pip install waitress")
+            sys.exit(1)
+        # Waitress keeps HTTP/1.1 connections alive and stops accepting new
+        # connections once connection_limit are open, applying backpressure
+        waitress_serve(app, host=args.host, port=args.port, threads=args.threads,
+                       connection_limit=args.connection_limit)
+    else:
+        app.run(host=args.host, port=args.port, threaded=True)
+
 def main():
+    args = parse_args()
+    scheduler.max_queued = args.max_queued
+    scheduler.max_queued_per_client = args.max_queued_per_client
+    if args.cache_ttl > 0:
+        rise_client.cache = ResponseCache(args.cache_max_bytes, args.cache_ttl, args.cache_exclude_adapter)
+
     # Start the Electron app in a separate thread
-    threading.Thread(target=start_electron_app, daemon=True).start()
+    if not args.no_gui:
+        threading.Thread(target=start_electron_app, daemon=True).start()
     
-    # Start the Flask server
-    app.run(host='127.0.0.1', port=5000)
+    # Start the server
+    serve(args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,170 @@
+"""
+G-Assist (RISE) asyncio Binding Module
+
+This module provides an asyncio interface on top of the RiseClient in rise.py.
+Results are handed from the RISE callback thread to the event loop with
+loop.call_soon_threadsafe, so awaiting a response never ties up a thread.
+
+The module includes:
+- AsyncRiseClient with awaitable registration and command sending
+- Async iteration over streamed response chunks
+
+Dependencies:
+    - asyncio: For awaitable results
+"""
+
+import asyncio
+from typing import AsyncIterator, Optional
+
+from .rise import RiseChunk, RiseClient, get_rise_client
+
+
+class AsyncRiseClient:
+    """
+    asyncio client for the RISE API.
+
+    Wraps a RiseClient, which keeps queuing and sending commands on its own
+    dispatcher thread. Coroutines are resumed from the RISE callback thread
+    through loop.call_soon_threadsafe.
+    """
+
+    def __init__(self, client: Optional[RiseClient] = None) -> None:
+        self._client = client if client is not None else get_rise_client()
+
+    @property
+    def client(self) -> RiseClient:
+        """The underlying thread-based client."""
+        return self._client
+
+    @property
+    def ready(self) -> bool:
+        """Whether RISE has reported that it is ready."""
+        return self._client.ready
+
+    async def register(self, timeout: Optional[float] = None) -> bool:
+        """
+        Register the client with the RISE service.
+
+        Completes once RISE signals ready status.
+
+        Args:
+            timeout: Seconds to wait for RISE to become ready, or None to wait forever
+
+        Returns:
+            bool: True if registration succeeded, False otherwise
+
+        Raises:
+            TimeoutError: If RISE does not become ready within the timeout
+        """
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+
+        def on_ready() -> None:
+            loop.call_soon_threadsafe(_set_result, ready, True)
+
+        if not self._client.register_callback():
+            return False
+        self._client.add_ready_callback(on_ready)
+
+        try:
+            return await asyncio.wait_for(ready, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f'RISE did not become ready within {timeout} seconds')
+
+    async def send(self, command: str, adapter: str = '', system_prompt: str = '',
+                   timeout: Optional[float] = None) -> dict:
+        """
+        Send a command to RISE and wait for the response.
+
+        Args:
+            command: The text command to send to RISE
+            adapter: Optional adapter name to route the command to
+            system_prompt: Optional system prompt for the adapter
+            timeout: Seconds to wait for the response, or None to wait forever
+
+        Returns:
+            dict: The completed response text and chart
+
+        Raises:
+            RuntimeError: If RISE rejects the command
+            TimeoutError: If the response does not complete within the timeout
+        """
+        loop = asyncio.get_running_loop()
+        result = loop.create_future()
+        request = self._client.submit(command, adapter, system_prompt)
+
+        def on_done(future) -> None:
+            loop.call_soon_threadsafe(_copy_future_state, future, result)
+
+        request.future.add_done_callback(on_done)
+        try:
+            return await asyncio.wait_for(result, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f'RISE did not respond within {timeout} seconds')
+        finally:
+            # Releases this caller at once; a request RISE has started still holds
+            # the dispatcher, so the next request waits until RISE finishes it
+            self._client.cancel(request)
+
+    async def stream(self, command: str, adapter: str = '', system_prompt: str = '',
+                     timeout: Optional[float] = None) -> AsyncIterator[RiseChunk]:
+        """
+        Send a command to RISE and yield the response as it arrives.
+
+        Each TEXT chunk is yielded as a RiseTextChunk and each GRAPH chunk as a
+        RiseChartChunk. Iteration stops after the chunk marked as completed.
+
+        Args:
+            command: The text command to send to RISE
+            adapter: Optional adapter name to route the command to
+            system_prompt: Optional system prompt for the adapter
+            timeout: Seconds to wait for each chunk, or None to wait forever
+
+        Yields:
+            RiseChunk: The next text or chart chunk of the response
+
+        Raises:
+            RuntimeError: If RISE rejects the command
+            TimeoutError: If a chunk does not arrive within the timeout
+        """
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        def on_chunk(chunk: Optional[RiseChunk]) -> None:
+            loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+
+        request = self._client.submit(command, adapter, system_prompt, on_chunk=on_chunk)
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.get(), timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f'RISE did not respond within {timeout} seconds')
+                if chunk is None:
+                    request.future.result()  # raises the error that ended the request
+                    return
+                yield chunk
+                if chunk.completed:
+                    return
+        finally:
+            # Releases this caller at once; a request RISE has started still holds
+            # the dispatcher, so the next request waits until RISE finishes it
+            self._client.cancel(request)
+
+
+def _set_result(future: asyncio.Future, value) -> None:
+    """Set the result of an asyncio future unless it has already been cancelled."""
+    if not future.done():
+        future.set_result(value)
+
+
+def _copy_future_state(source, destination: asyncio.Future) -> None:
+    """Copy the outcome of a concurrent.futures.Future onto an asyncio future."""
+    if destination.done():
+        return
+    if source.cancelled():
+        destination.cancel()
+    elif source.exception() is not None:
+        destination.set_exception(source.exception())
+    else:
+        destination.set_result(source.result())
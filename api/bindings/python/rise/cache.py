@@ -0,0 +1,165 @@
+"""
+G-Assist (RISE) Response Cache Module
+
+This module provides a cache for RISE responses to repeated commands, such as
+dashboards asking "What is my GPU?" every few seconds.
+
+The module includes:
+- ResponseCache, an LRU cache with a time-to-live and a size limit in bytes
+- Per-adapter opt-out for adapters whose commands are stateful or change the system
+- Hit, miss and eviction counters
+
+Example:
+    client = rise.get_rise_client()
+    client.cache = ResponseCache(max_bytes=1 << 20, ttl=30, exclude_adapters=('fan-control',))
+    client.register()
+    client.send('What is my GPU?')  # sent to RISE
+    client.send('What is my GPU?')  # answered from the cache
+    print(client.cache.stats())
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+# Default limit on the size of all cached responses
+DEFAULT_MAX_BYTES = 1 << 20
+
+# Default seconds a cached response stays valid
+DEFAULT_TTL = 60.0
+
+# A cache key: the command, the adapter and the system prompt
+CacheKey = Tuple[str, str, str]
+
+
+class CachedResponse(NamedTuple):
+    """The raw UTF-8 text and chart content of a completed response."""
+    text: bytes
+    chart: bytes
+
+
+class _Entry(NamedTuple):
+    response: CachedResponse
+    size: int
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    LRU cache of completed RISE responses with a time-to-live.
+
+    Responses are keyed on the command, adapter and system prompt. Entries
+    expire ttl seconds after they were stored, and the least recently used
+    entries are evicted once the cached responses exceed max_bytes. Commands
+    routed to an excluded adapter are never cached. All methods are thread-safe.
+
+    Attributes:
+        max_bytes: Limit on the combined size of cached keys and responses
+        ttl: Seconds a cached response stays valid
+        exclude_adapters: Adapters whose responses are never cached
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL,
+                 exclude_adapters: Iterable[str] = ()) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.exclude_adapters = frozenset(exclude_adapters)
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[CacheKey, _Entry]' = OrderedDict()
+        self._bytes = 0
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'expirations': 0}
+
+    def cacheable(self, adapter: str) -> bool:
+        """
+        Check whether responses from an adapter may be cached.
+
+        Args:
+            adapter: The adapter name, or '' for the default adapter
+
+        Returns:
+            bool: False if the adapter is excluded
+        """
+        return adapter not in self.exclude_adapters
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        """
+        Look up a response, counting a hit or a miss.
+
+        Args:
+            key: The command, adapter and system prompt
+
+        Returns:
+            CachedResponse: The cached response, or None if it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._counters['expirations'] += 1
+                entry = None
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry.response
+
+    def put(self, key: CacheKey, response: CachedResponse) -> None:
+        """
+        Store a response, evicting the least recently used entries to make room.
+
+        Responses larger than max_bytes on their own are not stored.
+
+        Args:
+            key: The command, adapter and system prompt
+            response: The completed response
+        """
+        size = sum(len(part.encode('utf-8')) for part in key) + len(response.text) + len(response.chart)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while self._bytes + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+            self._entries[key] = _Entry(response, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            self._counters['stores'] += 1
+
+    def invalidate(self, key: Optional[CacheKey] = None) -> None:
+        """
+        Remove one cached response, or all of them.
+
+        Args:
+            key: The command, adapter and system prompt, or None to clear the cache
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._remove(key)
+
+    def stats(self) -> dict:
+        """
+        Get the cache size and counters.
+
+        Returns:
+            dict: Entry count, bytes used, limits and hit, miss, store, eviction
+                and expiration counters
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'counters': dict(self._counters),
+            }
+
+    def _remove(self, key: CacheKey) -> None:
+        """Remove an entry; the caller must hold the lock."""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
@@ -0,0 +1,215 @@
+"""
+G-Assist (RISE) Fake Backend Module
+
+This module provides an in-process stand-in for the RISE library so the binding,
+the GUI bridge and the chat example can be run, benchmarked and load-tested on
+machines without G-Assist.
+
+FakeRiseBackend has the same register_rise_callback and request_rise functions as
+the RISE library. It answers commands one at a time from a worker thread by
+replaying scripted responses through the registered callback, with configurable
+latency.
+
+Set the RISE_BACKEND environment variable to "fake" to make the module-level
+functions in rise.py use this backend, and RISE_FAKE_SCRIPT to the path of a
+JSON script to replay. A script looks like:
+
+    {
+        "ready_delay": 0.5,
+        "first_chunk_delay": 0.2,
+        "chunk_delay": 0.02,
+        "chunk_size": 32,
+        "responses": {
+            "What is my GPU?": "Your GPU is an NVIDIA GeForce RTX 5090.",
+            "show FPS chart": {"text": "Here is your FPS.", "chart": "[...]"}
+        },
+        "default": "I don't know."
+    }
+
+Commands without a scripted response are answered with "default", or echoed
+back if there is no default.
+"""
+
+import ctypes
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .rise import (NV_RISE_CALLBACK_DATA_V1, NV_RISE_CONTENT_TYPE,
+                   CALLBACK_CONTENT_SIZE)
+
+# A scripted response: the reply text, or a dict with "text" and "chart" entries
+ScriptedResponse = Union[str, Dict[str, str]]
+
+
+class FakeRiseBackend:
+    """
+    Pure Python stand-in for the RISE library.
+
+    Attributes:
+        responses: Scripted responses keyed by prompt
+        default: Response for prompts without a scripted response, or None to echo the prompt
+        ready_delay: Seconds between registering a callback and READY
+        first_chunk_delay: Seconds between a command and its first chunk
+        chunk_delay: Seconds between consecutive chunks
+        chunk_size: Content bytes per chunk
+        commands: Every command received, decoded from JSON
+    """
+
+    def __init__(self, responses: Optional[Dict[str, ScriptedResponse]] = None,
+                 default: Optional[ScriptedResponse] = None, ready_delay: float = 0.0,
+                 first_chunk_delay: float = 0.0, chunk_delay: float = 0.0,
+                 chunk_size: int = 32) -> None:
+        self.responses = responses if responses is not None else {}
+        self.default = default
+        self.ready_delay = ready_delay
+        self.first_chunk_delay = first_chunk_delay
+        self.chunk_delay = chunk_delay
+        self.chunk_size = max(1, min(chunk_size, CALLBACK_CONTENT_SIZE))
+        self.commands: List[dict] = []
+        self._callback = None
+        self._frames = bytearray()
+        self._pending: queue.Queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_script(cls, path: str) -> 'FakeRiseBackend':
+        """
+        Create a backend from a JSON script.
+
+        Args:
+            path: Path of the script
+
+        Returns:
+            FakeRiseBackend: The scripted backend
+        """
+        with open(path, encoding='utf-8') as f:
+            script = json.load(f)
+        return cls(**script)
+
+    @classmethod
+    def from_environment(cls) -> 'FakeRiseBackend':
+        """
+        Create a backend from the script named by RISE_FAKE_SCRIPT, if any.
+
+        Returns:
+            FakeRiseBackend: The scripted backend, or an echoing backend
+        """
+        path = os.environ.get('RISE_FAKE_SCRIPT')
+        return cls.from_script(path) if path else cls()
+
+    def register_rise_callback(self, settings: Any) -> int:
+        """
+        Register a callback, and report READY from the worker thread.
+
+        Args:
+            settings: An NV_RISE_CALLBACK_SETTINGS_V1, or a pointer or byref to one
+
+        Returns:
+            int: 0 on success
+        """
+        self._callback = _deref(settings).callback
+        self._start_worker()
+        self._pending.put(None)
+        return 0
+
+    def request_rise(self, settings: Any) -> int:
+        """
+        Receive one frame of a request.
+
+        Frames are joined until one is marked completed; the joined command is
+        then queued for the worker thread to answer.
+
+        Args:
+            settings: An NV_REQUEST_RISE_SETTINGS_V1, or a pointer or byref to one
+
+        Returns:
+            int: 0 on success, -1 if no callback is registered
+        """
+        request = _deref(settings)
+        if self._callback is None:
+            return -1
+        if request.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_DOWNLOAD_REQUEST:
+            return 0
+
+        with self._lock:
+            self._frames += request.content
+            if not request.completed:
+                return 0
+            command = json.loads(bytes(self._frames))
+            self._frames.clear()
+            self.commands.append(command)
+        self._pending.put(command)
+        return 0
+
+    def script_for(self, command: dict) -> List[Tuple[NV_RISE_CONTENT_TYPE, bytes]]:
+        """
+        Get the chunks that answer a command.
+
+        Args:
+            command: The decoded command
+
+        Returns:
+            The content type and content of each chunk, in order
+        """
+        prompt = command.get('prompt', '')
+        response = self.responses.get(prompt, self.default)
+        if response is None:
+            response = prompt
+        if isinstance(response, str):
+            response = {'text': response}
+
+        chunks = []
+        chart = response.get('chart', '').encode('utf-8')
+        for offset in range(0, len(chart), self.chunk_size):
+            chunks.append((NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_GRAPH,
+                           chart[offset:offset + self.chunk_size]))
+        text = response.get('text', '').encode('utf-8')
+        for offset in range(0, max(len(text), 1), self.chunk_size):
+            chunks.append((NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT,
+                           text[offset:offset + self.chunk_size]))
+        return chunks
+
+    def _start_worker(self) -> None:
+        """Start the worker thread if it is not already running."""
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, daemon=True)
+                self._worker.start()
+
+    def _work(self) -> None:
+        """Answer queued registrations (None) and commands one at a time."""
+        while True:
+            command = self._pending.get()
+            if command is None:
+                time.sleep(self.ready_delay)
+                self._emit(NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_READY, b'', True)
+                continue
+
+            time.sleep(self.first_chunk_delay)
+            chunks = self.script_for(command)
+            for index, (content_type, content) in enumerate(chunks):
+                if index > 0:
+                    time.sleep(self.chunk_delay)
+                self._emit(content_type, content, index == len(chunks) - 1)
+
+    def _emit(self, content_type: NV_RISE_CONTENT_TYPE, content: bytes, completed: bool) -> None:
+        """Deliver one chunk to the registered callback."""
+        data = NV_RISE_CALLBACK_DATA_V1()
+        data.contentType = content_type
+        data.content = content
+        data.completed = 1 if completed else 0
+        self._callback(ctypes.pointer(data))
+
+
+def _deref(argument: Any) -> Any:
+    """Get the structure behind a structure, pointer or byref argument."""
+    if isinstance(argument, ctypes.Structure):
+        return argument
+    if hasattr(argument, 'contents'):
+        return argument.contents
+    return argument._obj
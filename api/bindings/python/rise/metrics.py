@@ -0,0 +1,236 @@
+"""
+G-Assist (RISE) Metrics Module
+
+This module provides hooks for observing where time goes between a client and
+the RISE backend, and a collector that turns those hooks into metrics.
+
+The module includes:
+- RiseListener, the callback interface a RiseClient reports events to
+- RiseMetrics, a listener that aggregates latency, throughput and size metrics
+- JSON and Prometheus text exposition of collected metrics
+
+Example:
+    metrics = RiseMetrics()
+    client = rise.get_rise_client()
+    client.add_listener(metrics)
+    client.register()
+    client.send('What is my GPU?')
+    print(metrics.to_prometheus())
+"""
+
+import json
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+# Number of recent samples kept per timing for quantile estimates
+DEFAULT_SAMPLE_SIZE = 1024
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RiseListener:
+    """
+    Interface for receiving events from a RiseClient.
+
+    All methods are no-ops; override the ones you need. Methods are called from
+    the thread that produced the event (the caller, the dispatcher thread or the
+    RISE callback thread), so implementations must be thread-safe and fast.
+    """
+
+    def on_ready(self, wait: float) -> None:
+        """
+        Called when RISE reports ready after registration.
+
+        Args:
+            wait: Seconds between registering the callback and READY
+        """
+
+    def on_request_sent(self, request, queue_wait: float) -> None:
+        """
+        Called once a request has been handed to RISE.
+
+        Args:
+            request: The RiseRequest that was sent
+            queue_wait: Seconds the request waited behind other requests
+        """
+
+    def on_first_chunk(self, request, latency: float) -> None:
+        """
+        Called when the first TEXT chunk of a response arrives.
+
+        Args:
+            request: The RiseRequest receiving the chunk
+            latency: Seconds between sending the request and the first text chunk
+        """
+
+    def on_chunk(self, request, size: int, gap: float) -> None:
+        """
+        Called for every TEXT or GRAPH chunk of a response.
+
+        Args:
+            request: The RiseRequest receiving the chunk
+            size: Number of content bytes in the chunk
+            gap: Seconds since the previous chunk, or since the request was sent
+        """
+
+    def on_request_complete(self, request, duration: float) -> None:
+        """
+        Called when a response completes.
+
+        Args:
+            request: The completed RiseRequest
+            duration: Seconds between sending the request and its last chunk
+        """
+
+    def on_request_failed(self, request, error: BaseException) -> None:
+        """
+        Called when RISE rejects a request.
+
+        Args:
+            request: The failed RiseRequest
+            error: The error the request's future was resolved with
+        """
+
+
+class _Timing:
+    """Count, sum and recent samples of one timing."""
+
+    def __init__(self, sample_size: int) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.samples)
+        quantiles = {}
+        for q in QUANTILES:
+            quantiles[str(q)] = ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else None
+        return {'count': self.count, 'sum': self.total, 'quantiles': quantiles}
+
+
+class RiseMetrics(RiseListener):
+    """
+    Listener that aggregates RISE latency and throughput metrics.
+
+    Timings are kept as a count, a sum and a window of recent samples from
+    which quantiles are computed. All methods are thread-safe.
+    """
+
+    TIMINGS = {
+        'ready_wait_seconds': 'Time from registering the callback until RISE reported ready',
+        'queue_wait_seconds': 'Time requests waited behind other requests before being sent',
+        'time_to_first_chunk_seconds': 'Time from sending a request until its first text chunk',
+        'inter_chunk_gap_seconds': 'Time between consecutive chunks of a response',
+        'request_duration_seconds': 'Time from sending a request until its response completed',
+        'response_bytes': 'Bytes of text and chart content per response',
+        'response_chunks': 'Chunks per response',
+    }
+
+    COUNTERS = {
+        'requests_sent_total': 'Requests handed to RISE',
+        'requests_completed_total': 'Responses that completed',
+        'requests_failed_total': 'Requests rejected by RISE',
+        'chunks_received_total': 'Text and chart chunks received',
+        'bytes_received_total': 'Bytes of text and chart content received',
+    }
+
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE) -> None:
+        self._lock = threading.Lock()
+        self._sample_size = sample_size
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard all collected metrics."""
+        with self._lock:
+            self._timings: Dict[str, _Timing] = {name: _Timing(self._sample_size) for name in self.TIMINGS}
+            self._counters: Dict[str, int] = {name: 0 for name in self.COUNTERS}
+
+    def on_ready(self, wait: float) -> None:
+        with self._lock:
+            self._timings['ready_wait_seconds'].observe(wait)
+
+    def on_request_sent(self, request, queue_wait: float) -> None:
+        with self._lock:
+            self._counters['requests_sent_total'] += 1
+            self._timings['queue_wait_seconds'].observe(queue_wait)
+
+    def on_first_chunk(self, request, latency: float) -> None:
+        with self._lock:
+            self._timings['time_to_first_chunk_seconds'].observe(latency)
+
+    def on_chunk(self, request, size: int, gap: float) -> None:
+        with self._lock:
+            self._counters['chunks_received_total'] += 1
+            self._counters['bytes_received_total'] += size
+            if request.chunk_count > 1:
+                self._timings['inter_chunk_gap_seconds'].observe(gap)
+
+    def on_request_complete(self, request, duration: float) -> None:
+        with self._lock:
+            self._counters['requests_completed_total'] += 1
+            self._timings['request_duration_seconds'].observe(duration)
+            self._timings['response_bytes'].observe(request.byte_count)
+            self._timings['response_chunks'].observe(request.chunk_count)
+
+    def on_request_failed(self, request, error: BaseException) -> None:
+        with self._lock:
+            self._counters['requests_failed_total'] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Get the current value of every metric.
+
+        Returns:
+            dict: Counters by name, and for each timing its count, sum and quantiles
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'timings': {name: timing.snapshot() for name, timing in self._timings.items()},
+            }
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """
+        Serialize the current metrics as JSON.
+
+        Args:
+            indent: Optional indentation passed to json.dumps
+
+        Returns:
+            str: The snapshot as a JSON document
+        """
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix: str = 'rise_') -> str:
+        """
+        Render the current metrics in the Prometheus text exposition format.
+
+        Counters are exported as counters and timings as summaries.
+
+        Args:
+            prefix: Prefix added to every metric name
+
+        Returns:
+            str: The metrics, one sample per line
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in snapshot['counters'].items():
+            lines.append(f'# HELP {prefix}{name} {self.COUNTERS[name]}')
+            lines.append(f'# TYPE {prefix}{name} counter')
+            lines.append(f'{prefix}{name} {value}')
+        for name, timing in snapshot['timings'].items():
+            lines.append(f'# HELP {prefix}{name} {self.TIMINGS[name]}')
+            lines.append(f'# TYPE {prefix}{name} summary')
+            for q, value in timing['quantiles'].items():
+                if value is not None:
+                    lines.append(f'{prefix}{name}{{quantile="{q}"}} {value}')
+            lines.append(f'{prefix}{name}_sum {timing["sum"]}')
+            lines.append(f'{prefix}{name}_count {timing["count"]}')
+        return '\n'.join(lines) + '\n'
@@ -11,32 +11,39 @@ The module includes:
 - Callback handling for asynchronous responses
 - Progress tracking for downloads and installations
 - CTypes structures for C/C++ interop
+- A thread-safe RiseClient that owns all request and response state
 - Core functionality for RISE client registration and command sending
+- Streaming of response chunks as they arrive
+- Optional caching of responses to repeated commands (see cache.py)
+
+The RISE library is loaded on first use rather than at import time, and tqdm is
+only imported once RISE reports download progress.
 
 Dependencies:
     - ctypes: For C/C++ interoperability
-    - tqdm: For progress bar visualization
+    - tqdm: For progress bar visualization (imported on demand)
     - json: For command serialization
+    - threading: For signalling completion from the callback thread
+    - concurrent.futures: For per-request futures
 """
 
+import codecs
 import ctypes
+from concurrent.futures import Future, InvalidStateError
+import concurrent.futures
 from enum import IntEnum
 import os
-import time
-import sys
 import json
-from tqdm import tqdm
-from typing import Optional, Dict, Any
+import queue
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, Iterator, List, NamedTuple, Union
 
-# Global variables for state management
-global nvapi
-global callback_settings
-callback = None
-response = ''
-chart = ''
-response_done = False
-ready = False
-progress_bar = None
+from .cache import CachedResponse, ResponseCache
+
+# Default client used by the module-level functions
+_default_client = None
+_default_client_lock = threading.Lock()
 
 
 class NV_RISE_CONTENT_TYPE(IntEnum):
@@ -86,6 +93,32 @@ class NV_REQUEST_RISE_SETTINGS_V1(ctypes.Structure):
                 ("reserved", ctypes.c_uint8 * 32)]
 
 
+class RiseTextChunk(NamedTuple):
+    """A piece of streamed response text."""
+    content: str
+    completed: bool
+
+
+class RiseChartChunk(NamedTuple):
+    """A piece of streamed chart (graph) JSON."""
+    content: str
+    completed: bool
+
+
+RiseChunk = Union[RiseTextChunk, RiseChartChunk]
+
+
+# Location of the content field within the callback data
+CALLBACK_CONTENT_OFFSET = NV_RISE_CALLBACK_DATA_V1.content.offset
+CALLBACK_CONTENT_SIZE = NV_RISE_CALLBACK_DATA_V1.content.size
+
+# Largest command frame; one byte of the content field is kept for the NUL terminator
+REQUEST_FRAME_SIZE = NV_REQUEST_RISE_SETTINGS_V1.content.size - 1
+
+# Seconds RISE may go without sending a chunk before the request in flight is failed
+DEFAULT_RESPONSE_TIMEOUT = 120.0
+
+
 # Define callback function type
 NV_RISE_CALLBACK_V1 = ctypes.CFUNCTYPE(
     None, ctypes.POINTER(NV_RISE_CALLBACK_DATA_V1))
@@ -99,165 +132,805 @@ class NV_RISE_CALLBACK_SETTINGS_V1(ctypes.Structure):
                 ("reserved", ctypes.c_uint8 * 32)]
 
 
-def base_function_callback(data_ptr: ctypes.POINTER(NV_RISE_CALLBACK_DATA_V1)) -> None:
+
+# Initialize DLL/shared library path
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+LIB_PATH = os.path.join(SCRIPT_DIR, "python_binding.dll")
+
+# Backend used by the default client: "dll" for the RISE library, "fake" for
+# the in-process stand-in in fake_backend.py
+RISE_BACKEND = os.environ.get('RISE_BACKEND', 'dll')
+
+
+# The RISE library, loaded by get_rise_library() on first use
+nvapi = None
+_nvapi_lock = threading.Lock()
+
+
+class RiseLibraryError(OSError):
+    """Raised when the RISE library cannot be loaded."""
+
+
+def load_rise_library() -> ctypes.CDLL:
+    """
+    Load the RISE library and configure its function signatures.
+
+    Returns:
+        ctypes.CDLL: The loaded library
+
+    Raises:
+        RiseLibraryError: If the library or one of its runtime dependencies cannot be loaded
+    """
+    try:
+        library = ctypes.CDLL(LIB_PATH)
+    except OSError as e:
+        if "vcruntime" in str(e).lower() or "msvcp" in str(e).lower() or "cannot load" in str(e).lower():
+            raise RiseLibraryError(
+                "Missing Visual C++ Redistributable (x64). Download and install it from: "
+                "https://aka.ms/vs/17/release/vc_redist.x64.exe") from e
+        raise RiseLibraryError(f"Could not load {LIB_PATH}: {e}") from e
+
+    # Configure API function signatures
+    library.register_rise_callback.argtypes = [ctypes.POINTER(NV_RISE_CALLBACK_SETTINGS_V1)]
+    library.register_rise_callback.restype = ctypes.c_int
+    library.request_rise.argtypes = [ctypes.POINTER(NV_REQUEST_RISE_SETTINGS_V1)]
+    library.request_rise.restype = ctypes.c_int
+    return library
+
+
+def get_rise_library() -> ctypes.CDLL:
+    """
+    Get the RISE library, loading it on first use.
+
+    Returns:
+        ctypes.CDLL: The loaded library
+
+    Raises:
+        RiseLibraryError: If the library cannot be loaded
+    """
+    global nvapi
+
+    with _nvapi_lock:
+        if nvapi is None:
+            nvapi = load_rise_library()
+        return nvapi
+
+
+class RiseRequest:
+    """
+    A single command sent to RISE and the state of its response.
+
+    Attributes:
+        payload: The serialized command
+        future: Resolves to the completed response, or to the error that ended the request
+        on_chunk: Called from the callback thread with each chunk as it arrives,
+            then with None once the future is done
+        submitted_at: time.perf_counter() when the request was queued
+        sent_at: time.perf_counter() when the request was handed to RISE
+        first_chunk_at: time.perf_counter() when the first text chunk arrived
+        last_chunk_at: time.perf_counter() when the latest chunk arrived
+        chunk_count: Number of text and chart chunks received
+        byte_count: Number of text and chart content bytes received
+    """
+
+    def __init__(self, payload: bytes,
+                 on_chunk: Optional[Callable[[Optional[RiseChunk]], None]] = None,
+                 listeners: tuple = ()) -> None:
+        self.payload = payload
+        self.future: Future = Future()
+        self.on_chunk = on_chunk
+        self.listeners = listeners
+        self.submitted_at = time.perf_counter()
+        self.sent_at: Optional[float] = None
+        self.first_chunk_at: Optional[float] = None
+        self.last_chunk_at: Optional[float] = None
+        self.chunk_count = 0
+        self.byte_count = 0
+        self._text = bytearray()
+        self._chart = bytearray()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._chart_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._finished = threading.Event()
+        self._finished_callbacks: List[Callable[[], None]] = []
+        self._finished_lock = threading.Lock()
+        if on_chunk is not None:
+            self.future.add_done_callback(lambda _: on_chunk(None))
+
+    @property
+    def finished(self) -> bool:
+        """Whether RISE is done with this request, which may be after its future is done."""
+        return self._finished.is_set()
+
+    def add_finished_callback(self, fn: Callable[[], None]) -> None:
+        """
+        Call a function once RISE is done with this request.
+
+        The future of an abandoned request is done at once, but RISE holds the
+        dispatcher until it finishes the response, so this is when the next
+        request can be sent. fn is called at once if RISE is already done,
+        otherwise from the thread that finishes the request.
+
+        Args:
+            fn: Function called with no arguments
+        """
+        with self._finished_lock:
+            if not self._finished.is_set():
+                self._finished_callbacks.append(fn)
+                return
+        fn()
+
+    def _finish(self) -> None:
+        """Mark RISE as done with this request and run the finished callbacks."""
+        with self._finished_lock:
+            self._finished.set()
+            callbacks, self._finished_callbacks = self._finished_callbacks, []
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception as e:
+                print(f"An error occurred in a RISE request finished callback: {e}")
+
+    @property
+    def response(self) -> str:
+        """The response text received so far."""
+        return self._text.decode('utf-8', errors='replace')
+
+    @property
+    def chart(self) -> str:
+        """The chart JSON received so far."""
+        return self._chart.decode('utf-8', errors='replace')
+
+    def feed(self, is_chart: bool, content: memoryview, completed: bool) -> None:
+        """
+        Add content received from RISE to this request.
+
+        The raw bytes are appended to the response buffer up to the first NUL
+        and only decoded when the response completes, or incrementally when the
+        request is streamed, so multibyte characters split across chunks are
+        decoded correctly.
+
+        Args:
+            is_chart: Whether the content is chart (GRAPH) data rather than text
+            content: View over the content field of the callback data
+            completed: Whether this is the last chunk of the response
+        """
+        if self.future.done():
+            # Abandoned by the caller; RISE is still sending the rest of it
+            self.last_chunk_at = time.perf_counter()
+            if completed:
+                self._finish()
+            return
+
+        now = time.perf_counter()
+        buffer = self._chart if is_chart else self._text
+        start = len(buffer)
+        buffer += content
+        end = buffer.find(0, start)
+        if end != -1:
+            del buffer[end:]
+
+        previous = self.last_chunk_at if self.last_chunk_at is not None else self.sent_at
+        first = not is_chart and self.first_chunk_at is None
+        self.chunk_count += 1
+        self.byte_count += len(buffer) - start
+        if first:
+            self.first_chunk_at = now
+        self.last_chunk_at = now
+        if self.listeners:
+            if first:
+                _notify(self.listeners, 'on_first_chunk', self, now - self.sent_at)
+            _notify(self.listeners, 'on_chunk', self, len(buffer) - start, now - previous)
+            if completed:
+                _notify(self.listeners, 'on_request_complete', self, now - self.sent_at)
+
+        if self.on_chunk is not None:
+            decoder = self._chart_decoder if is_chart else self._text_decoder
+            with memoryview(buffer) as view, view[start:] as new:
+                text = decoder.decode(new, completed)
+            chunk_type = RiseChartChunk if is_chart else RiseTextChunk
+            self.on_chunk(chunk_type(text, completed))
+
+        if completed:
+            try:
+                self.future.set_result({'completed_response': self.response,
+                                        'completed_chart': self.chart})
+            except InvalidStateError:
+                pass  # the caller has already given up on this request
+            self._finish()
+
+
+class RiseClient:
+    """
+    Thread-safe client for the RISE API.
+
+    The client owns all response state, so it can be shared by any number of
+    threads. RISE answers one command at a time through a single callback, so
+    commands are queued and sent in order by one dispatcher thread, and every
+    caller waits only on the future of its own request.
+
+    Only one client should be registered per process, since the RISE library
+    holds a single callback.
+
+    The backend is any object with register_rise_callback and request_rise
+    functions matching the RISE library, such as fake_backend.FakeRiseBackend.
+
+    Attributes:
+        cache: Optional cache.ResponseCache answering repeated commands without
+            sending them to RISE
+        response_timeout: Seconds RISE may go without sending a chunk before
+            the request in flight is failed with TimeoutError and the next one
+            is sent, or None to wait forever
     """
-    Primary callback function for handling RISE responses.
 
-    This function processes various types of responses from RISE including ready status,
-    text responses, download requests, and progress updates. It manages the global state
-    and progress bar updates.
+    def __init__(self, api: Optional[Any] = None, cache: Optional[ResponseCache] = None,
+                 response_timeout: Optional[float] = DEFAULT_RESPONSE_TIMEOUT) -> None:
+        self._api = api if api is not None else _create_default_backend()
+        self.cache = cache
+        self.response_timeout = response_timeout
+        self._callback_settings = NV_RISE_CALLBACK_SETTINGS_V1()
+        self._callback = NV_RISE_CALLBACK_V1(self._handle_callback)
+        self._request_settings = NV_REQUEST_RISE_SETTINGS_V1()
+        self._request_settings.contentType = NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT
+        self._request_settings.version = ctypes.sizeof(NV_REQUEST_RISE_SETTINGS_V1) | (1 << 16)
+        self._ready = threading.Event()
+        self._ready_callbacks: List[Callable[[], None]] = []
+        self._listeners: List[Any] = []
+        self._registered_at: Optional[float] = None
+        self._pending: queue.Queue = queue.Queue()
+        self._active: Optional[RiseRequest] = None
+        self._lock = threading.Lock()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._progress_bar = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether RISE has reported that it is ready."""
+        return self._ready.is_set()
+
+    def register(self, timeout: Optional[float] = None) -> bool:
+        """
+        Register the client with the RISE service.
+
+        Waits until RISE signals ready status before returning.
+
+        Args:
+            timeout: Seconds to wait for RISE to become ready, or None to wait forever
+
+        Returns:
+            bool: True if registration succeeded, False otherwise
+
+        Raises:
+            TimeoutError: If RISE does not become ready within the timeout
+        """
+        if not self.register_callback():
+            return False
+
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f'RISE did not become ready within {timeout} seconds')
+        return True
+
+    def register_callback(self) -> bool:
+        """
+        Register the callback with the RISE service without waiting for ready status.
+
+        Returns:
+            bool: True if registration succeeded, False otherwise
+        """
+        self._callback_settings.callback = self._callback
+        self._callback_settings.version = ctypes.sizeof(NV_RISE_CALLBACK_SETTINGS_V1) | (1 << 16)
+
+        self._registered_at = time.perf_counter()
+        ret = self._api.register_rise_callback(ctypes.byref(self._callback_settings))
+        if ret != 0:
+            print('Registration Failed')
+            return False
+        return True
+
+    def add_ready_callback(self, fn: Callable[[], None]) -> None:
+        """
+        Call a function once RISE reports that it is ready.
+
+        The function is called immediately if RISE is already ready, otherwise
+        from the callback thread when the READY message arrives.
+
+        Args:
+            fn: Function to call
+        """
+        with self._lock:
+            if not self._ready.is_set():
+                self._ready_callbacks.append(fn)
+                return
+        fn()
+
+    def add_listener(self, listener: Any) -> None:
+        """
+        Report client events to a listener.
+
+        Args:
+            listener: An object implementing the methods of metrics.RiseListener
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Any) -> None:
+        """
+        Stop reporting client events to a listener.
+
+        Args:
+            listener: A listener previously passed to add_listener
+        """
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def submit(self, command: str, adapter: str = '', system_prompt: str = '',
+               on_chunk: Optional[Callable[[Optional[RiseChunk]], None]] = None,
+               use_cache: bool = True) -> RiseRequest:
+        """
+        Queue a command for RISE without waiting for the response.
+
+        Args:
+            command: The text command to send to RISE
+            adapter: Optional adapter name to route the command to
+            system_prompt: Optional system prompt for the adapter
+            on_chunk: Optional function called with each chunk as it arrives,
+                then with None once the request is done
+            use_cache: Whether to answer from the response cache when it holds
+                the response; the response is stored in the cache either way
+
+        Returns:
+            RiseRequest: The queued request; its future resolves to the response
+        """
+        if use_cache:
+            cached = self.submit_cached(command, adapter, system_prompt, on_chunk)
+            if cached is not None:
+                return cached
+
+        with self._lock:
+            listeners = tuple(self._listeners)
+        request = RiseRequest(_serialize_command(command, adapter, system_prompt), on_chunk, listeners)
+        cache = self.cache
+        if cache is not None and cache.cacheable(adapter):
+            def store(future: Future) -> None:
+                if not future.cancelled() and future.exception() is None:
+                    cache.put((command, adapter, system_prompt),
+                              CachedResponse(bytes(request._text), bytes(request._chart)))
+            request.future.add_done_callback(store)
+        self._pending.put(request)
+        self._start_dispatcher()
+        return request
+
+    def submit_cached(self, command: str, adapter: str = '', system_prompt: str = '',
+                      on_chunk: Optional[Callable[[Optional[RiseChunk]], None]] = None
+                      ) -> Optional[RiseRequest]:
+        """
+        Answer a command from the response cache, if it holds a response.
+
+        The cached response is replayed through on_chunk as one chart chunk,
+        if there is a chart, and one text chunk.
+
+        Args:
+            command: The text command
+            adapter: Optional adapter name the command is routed to
+            system_prompt: Optional system prompt for the adapter
+            on_chunk: Optional function called with each chunk, then with None
+
+        Returns:
+            RiseRequest: A completed request, or None if the response is not cached
+        """
+        cache = self.cache
+        if cache is None or not cache.cacheable(adapter):
+            return None
+        cached = cache.get((command, adapter, system_prompt))
+        if cached is None:
+            return None
+
+        request = RiseRequest(b'', on_chunk)
+        request.sent_at = request.submitted_at
+        if cached.chart:
+            request.feed(True, memoryview(cached.chart), False)
+        request.feed(False, memoryview(cached.text), True)
+        return request
+
+    def send(self, command: str, adapter: str = '', system_prompt: str = '',
+             timeout: Optional[float] = None) -> dict:
+        """
+        Send a command to RISE and wait for the response.
+
+        Args:
+            command: The text command to send to RISE
+            adapter: Optional adapter name to route the command to
+            system_prompt: Optional system prompt for the adapter
+            timeout: Seconds to wait for the response, or None to wait forever
+
+        Returns:
+            dict: The completed response text and chart
+
+        Raises:
+            RuntimeError: If RISE rejects the command
+            TimeoutError: If the response does not complete within the timeout
+        """
+        request = self.submit(command, adapter, system_prompt)
+        try:
+            return request.future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            self.cancel(request)
+            raise TimeoutError(f'RISE did not respond within {timeout} seconds')
+
+    def stream(self, command: str, adapter: str = '', system_prompt: str = '',
+               timeout: Optional[float] = None) -> Iterator[RiseChunk]:
+        """
+        Send a command to RISE and yield the response as it arrives.
+
+        Each TEXT chunk is yielded as a RiseTextChunk and each GRAPH chunk as a
+        RiseChartChunk. Iteration stops after the chunk marked as completed.
+
+        Args:
+            command: The text command to send to RISE
+            adapter: Optional adapter name to route the command to
+            system_prompt: Optional system prompt for the adapter
+            timeout: Seconds to wait for each chunk, or None to wait forever
+
+        Yields:
+            RiseChunk: The next text or chart chunk of the response
+
+        Raises:
+            RuntimeError: If RISE rejects the command
+            TimeoutError: If a chunk does not arrive within the timeout
+        """
+        chunks = queue.Queue()
+        request = self.submit(command, adapter, system_prompt, on_chunk=chunks.put)
+        try:
+            while True:
+                try:
+                    chunk = chunks.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f'RISE did not respond within {timeout} seconds')
+                if chunk is None:
+                    request.future.result()  # raises the error that ended the request
+                    return
+                yield chunk
+                if chunk.completed:
+                    return
+        finally:
+            self.cancel(request)
+
+    def cancel(self, request: RiseRequest) -> bool:
+        """
+        Abandon a request.
+
+        A queued request is dropped without being sent. A request already sent
+        to RISE has its future cancelled at once and the rest of its response
+        is discarded; since RISE cannot stop a response part way, the next
+        request is sent once RISE finishes the abandoned one.
+
+        Args:
+            request: A request returned by submit
+
+        Returns:
+            bool: True if the request was cancelled, False if it had already finished
+        """
+        if request.future.cancel():
+            return True
+        try:
+            request.future.set_exception(concurrent.futures.CancelledError())
+        except InvalidStateError:
+            return False
+        return True
+
+    def install(self) -> None:
+        """
+        Initiate the RISE installation process.
+
+        Sends a download request to begin the RISE installation.
+        Progress is tracked through the callback mechanism.
+        """
+        content = NV_REQUEST_RISE_SETTINGS_V1()
+        content.contentType = NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_DOWNLOAD_REQUEST
+        content.version = ctypes.sizeof(NV_REQUEST_RISE_SETTINGS_V1) | (1 << 16)
+        content.completed = 1
+
+        ret = self._api.request_rise(ctypes.byref(content))
+        if ret != 0:
+            print(f'Send RISE INSTALL failed with {ret}')
+
+    def _start_dispatcher(self) -> None:
+        """Start the dispatcher thread if it is not already running."""
+        with self._lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch(self) -> None:
+        """Send queued requests to RISE one at a time, waiting for each to complete."""
+        while True:
+            request = self._pending.get()
+            if not request.future.set_running_or_notify_cancel():
+                request._finish()  # cancelled while queued; RISE never sees it
+                continue
+
+            with self._lock:
+                self._active = request
+            try:
+                request.sent_at = time.perf_counter()
+                try:
+                    ret = self._send_frames(request.payload)
+                except Exception as e:
+                    self._fail(request, e)
+                    continue
+                if ret != 0:
+                    self._fail(request, RuntimeError(f'Send RISE command failed with {ret}'))
+                    continue
+                _notify(request.listeners, 'on_request_sent', request, request.sent_at - request.submitted_at)
+                self._wait_for_response(request)
+            finally:
+                with self._lock:
+                    self._active = None
+
+    def _wait_for_response(self, request: RiseRequest) -> None:
+        """
+        Wait until RISE finishes a request, failing it if RISE goes quiet.
+
+        The timeout runs from the latest chunk, so a long response is not cut
+        off while it is still arriving. Should RISE send the rest of a failed
+        response after all, it is taken for the next request's response.
+        """
+        timeout = self.response_timeout
+        if timeout is None:
+            request._finished.wait()
+            return
+        while True:
+            last = request.last_chunk_at if request.last_chunk_at is not None else request.sent_at
+            remaining = last + timeout - time.perf_counter()
+            if remaining <= 0:
+                self._fail(request, TimeoutError(f'RISE sent nothing for {timeout} seconds'))
+                return
+            if request._finished.wait(remaining):
+                return
+
+    def _fail(self, request: RiseRequest, error: Exception) -> None:
+        """Fail a request that RISE will not finish."""
+        if not request.future.done():
+            _notify(request.listeners, 'on_request_failed', request, error)
+        try:
+            request.future.set_exception(error)
+        except InvalidStateError:
+            pass  # cancelled while being sent
+        request._finish()
+
+    def _send_frames(self, payload: bytes) -> int:
+        """
+        Send a serialized command to RISE, split into frames that fit the request structure.
+
+        Every frame but the last is sent with completed = 0 to mark that more
+        of the command follows. Frames reuse one preallocated request structure.
+
+        Args:
+            payload: The serialized command
+
+        Returns:
+            int: 0 on success, otherwise the status of the first frame that failed
+        """
+        content = self._request_settings
+        for offset in range(0, max(len(payload), 1), REQUEST_FRAME_SIZE):
+            frame = payload[offset:offset + REQUEST_FRAME_SIZE]
+            content.content = frame
+            content.completed = 1 if offset + REQUEST_FRAME_SIZE >= len(payload) else 0
+            ret = self._api.request_rise(ctypes.byref(content))
+            if ret != 0:
+                return ret
+        return 0
+
+    def _handle_callback(self, data_ptr: ctypes.POINTER(NV_RISE_CALLBACK_DATA_V1)) -> None:
+        """
+        Callback function for handling RISE responses.
+
+        Processes ready status, text and chart chunks, download requests and
+        progress updates. Text and chart chunks are routed to the request that
+        is currently in flight.
+
+        Args:
+            data_ptr: Pointer to the callback data structure containing response information
+        """
+        data = data_ptr.contents
+        if data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_READY:
+            if data.completed == 1:
+                with self._lock:
+                    first = not self._ready.is_set()
+                    self._ready.set()
+                    ready_callbacks, self._ready_callbacks = self._ready_callbacks, []
+                    listeners = tuple(self._listeners)
+                print('RISE is ready')
+                if first and self._registered_at is not None:
+                    _notify(listeners, 'on_ready', time.perf_counter() - self._registered_at)
+                if self._progress_bar is not None:
+                    self._progress_bar.close()
+                for fn in ready_callbacks:
+                    fn()
+
+        elif data.contentType in (NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT,
+                                  NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_GRAPH):
+            with self._lock:
+                request = self._active
+            if request is not None:
+                request.feed(data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_GRAPH,
+                             _content_view(data), data.completed == 1)
+
+        elif data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_DOWNLOAD_REQUEST:
+            from tqdm import tqdm
+            self.install()
+            self._progress_bar = tqdm(total=100, desc="Downloading")
+
+        elif data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_PROGRESS_UPDATE:
+            data_content = data.content.decode('utf-8')
+            if self._progress_bar is None:
+                from tqdm import tqdm
+                self._progress_bar = tqdm(total=100, desc="Progress")
+            if data_content.isdigit():
+                self._progress_bar.n = int(data_content)
+                self._progress_bar.refresh()
+            else:
+                self._progress_bar.close()
+                print(data_content)
+
+
+def _notify(listeners: tuple, method: str, *args) -> None:
+    """
+    Call a method on every listener, printing rather than raising any error.
 
     Args:
-        data_ptr: Pointer to the callback data structure containing response information
+        listeners: Listeners implementing the methods of metrics.RiseListener
+        method: Name of the method to call
+        *args: Arguments passed to the method
+    """
+    for listener in listeners:
+        try:
+            getattr(listener, method)(*args)
+        except Exception as e:
+            print(f"An error occurred in RISE listener {method}: {e}")
 
-    Global State:
-        response: Accumulates text responses
-        response_done: Flags when a response is complete
-        ready: Indicates RISE system readiness
-        progress_bar: Manages download/installation progress visualization
+
+def _content_view(data: NV_RISE_CALLBACK_DATA_V1) -> memoryview:
     """
-    global response, response_done, ready, progress_bar, chart
-
-    data = data_ptr.contents
-    if data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_READY:
-        if data.completed == 1:
-           ready = True
-           print('RISE is ready')
-           if progress_bar is not None:
-               progress_bar.close()
-           return
-
-    elif data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT:
-        response += data.content.decode('utf-8')
-        if data.completed == 1:
-            response_done = True
-    elif data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_GRAPH:
-        chart += data.content.decode('utf-8')
-
-        if data.completed == 1:
-            response_done = True
-
-    elif data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_DOWNLOAD_REQUEST:
-        intiate_rise_install()
-        progress_bar = tqdm(total=100, desc="Downloading")
-
-    elif data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_PROGRESS_UPDATE:
-        data_content = data.content.decode('utf-8')
-        if progress_bar is None:
-            progress_bar = tqdm(total=100, desc="Progress")
-        if data_content.isdigit():
-            progress_bar.n = int(data_content)
-            progress_bar.refresh()
-        else:
-            progress_bar.close()
-            print(data_content)
+    Get a view over the content field of callback data without copying it.
 
+    The view is only valid while the callback that received the data is running.
+
+    Args:
+        data: The callback data
+
+    Returns:
+        memoryview: The raw bytes of the content field
+    """
+    return memoryview(data).cast('B')[CALLBACK_CONTENT_OFFSET:CALLBACK_CONTENT_OFFSET + CALLBACK_CONTENT_SIZE]
+
+
+def _serialize_command(command: str, adapter: str, system_prompt: str) -> bytes:
+    """
+    Serialize a command into the JSON payload expected by RISE.
+
+    Args:
+        command: The text command to send to RISE
+        adapter: Adapter name to route the command to, or ''
+        system_prompt: System prompt for the adapter, or ''
+
+    Returns:
+        bytes: The UTF-8 encoded command JSON
+    """
+    command_obj = {
+        'prompt': command,
+        'context_assist': {}
+    }
+
+    if (adapter != ''): 
+        command_obj['adapter'] = adapter
+
+    if(system_prompt != ''):
+        command_obj['context_assist']['officialAdapterSystemPrompt'] = system_prompt
+
+    return json.dumps(command_obj).encode('utf-8')
 
-# Initialize DLL/shared library path
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-LIB_PATH = os.path.join(SCRIPT_DIR, "python_binding.dll")
-try:
-    nvapi = ctypes.CDLL(LIB_PATH)
-except OSError as e:
-    if "vcruntime" in str(e).lower() or "msvcp" in str(e).lower() or "cannot load" in str(e).lower():
-        print("\n❌ Missing Visual C++ Redistributable (x64)")
-        print("Download and install it from:")
-        print("https://aka.ms/vs/17/release/vc_redist.x64.exe\n")
-        sys.exit(1)
-    else:
-        raise  # re-raise unexpected errors
-    
-# Configure API function signatures
-nvapi.register_rise_callback.argtypes = [ctypes.POINTER(NV_RISE_CALLBACK_SETTINGS_V1)]
-nvapi.register_rise_callback.restype = ctypes.c_int
-nvapi.request_rise.argtypes = [ctypes.POINTER(NV_REQUEST_RISE_SETTINGS_V1)]
-nvapi.request_rise.restype = ctypes.c_int
 
-callback_settings = NV_RISE_CALLBACK_SETTINGS_V1()
+def _create_default_backend() -> Any:
+    """
+    Create the backend selected by RISE_BACKEND.
+
+    Returns:
+        The RISE library, or a FakeRiseBackend when RISE_BACKEND is "fake"
+    """
+    if RISE_BACKEND == 'fake':
+        from .fake_backend import FakeRiseBackend
+        return FakeRiseBackend.from_environment()
+    return get_rise_library()
 
 
-def register_rise_client() -> None:
+def get_rise_client() -> RiseClient:
     """
-    Register the client with the RISE service.
+    Get the client shared by the module-level functions, creating it on first use.
+
+    Returns:
+        RiseClient: The default client
+    """
+    global _default_client
+
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = RiseClient()
+        return _default_client
+
+
+def register_rise_client(timeout: Optional[float] = None) -> None:
+    """
+    Register the default client with the RISE service.
 
     Initializes the connection to RISE and sets up the callback mechanism.
     Waits until RISE signals ready status before returning.
 
+    Args:
+        timeout: Seconds to wait for RISE to become ready, or None to wait forever
+
     Raises:
         AttributeError: If there's an error accessing the RISE API
+        TimeoutError: If RISE does not become ready within the timeout
     """
-    global nvapi, callback_settings, callback, ready
-
     try:
-        callback_settings.callback = NV_RISE_CALLBACK_V1(base_function_callback)
-        callback_settings.version = ctypes.sizeof(NV_RISE_CALLBACK_SETTINGS_V1) | (1 << 16)
-
-        ret = nvapi.register_rise_callback(ctypes.byref(callback_settings))
-        if ret != 0:
-            print('Registration Failed')
-            return
-
-        while not ready:
-            time.sleep(1)
+        get_rise_client().register(timeout)
 
     except AttributeError as e:
         print(f"An error occurred: {e}")
 
 
-def send_rise_command(command: str, adapter: str = '', system_prompt: str = '') -> Optional[dict]:
+def send_rise_command(command: str, adapter: str = '', system_prompt: str = '',
+                      timeout: Optional[float] = None) -> Optional[dict]:
     """
     Send a command to RISE and wait for the response.
 
     Formats the command as a JSON object with a prompt and context,
-    sends it to RISE, and waits for the complete response.
+    sends it to RISE, and waits for the complete response. Safe to call
+    from several threads at once.
 
     Args:
         command: The text command to send to RISE
+        adapter: Optional adapter name to route the command to
+        system_prompt: Optional system prompt for the adapter
+        timeout: Seconds to wait for the response, or None to wait forever
 
     Returns:
         Optional[dict]: The response from RISE, or None if an error occurs
 
     Raises:
-        AttributeError: If there's an error accessing the RISE API
+        TimeoutError: If the response does not complete within the timeout
     """
-    global nvapi, response_done, response, chart
-
     try:
-        command_obj = {
-            'prompt': command,
-            'context_assist': {}
-        }
+        return get_rise_client().send(command, adapter, system_prompt, timeout)
 
-        if (adapter != ''): 
-            command_obj['adapter'] = adapter
+    except (AttributeError, RuntimeError) as e:
+        print(f"An error occurred: {e}")
+        return None
 
-        if(system_prompt != ''):
-            command_obj['context_assist']['officialAdapterSystemPrompt'] = system_prompt
 
-        content = NV_REQUEST_RISE_SETTINGS_V1()
-        content.content = json.dumps(command_obj).encode('utf-8')
-        content.contentType = NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT
-        content.version = ctypes.sizeof(NV_REQUEST_RISE_SETTINGS_V1) | (1 << 16)
-        content.completed = 1
+def stream_rise_command(command: str, adapter: str = '', system_prompt: str = '',
+                        timeout: Optional[float] = None) -> Iterator[RiseChunk]:
+    """
+    Send a command to RISE and yield the response as it arrives.
 
-        ret = nvapi.request_rise(content)
-        if ret != 0:
-            print(f'Send RISE command failed with {ret}')
-            return None
+    Each TEXT chunk is yielded as a RiseTextChunk and each GRAPH chunk as a
+    RiseChartChunk, as soon as the callback receives it. Iteration stops after
+    the chunk marked as completed.
 
-        while not response_done:
-            time.sleep(1)
+    Args:
+        command: The text command to send to RISE
+        adapter: Optional adapter name to route the command to
+        system_prompt: Optional system prompt for the adapter
+        timeout: Seconds to wait for each chunk, or None to wait forever
 
-        response_done = False
-        completed_response = response
-        completed_chart = chart
-        response = ''
-        chart = ''
-        return {'completed_response': completed_response,'completed_chart': completed_chart}
+    Yields:
+        RiseChunk: The next text or chart chunk of the response
 
-    except AttributeError as e:
-        print(f"An error occurred: {e}")
-        return None
+    Raises:
+        RuntimeError: If RISE rejects the command
+        TimeoutError: If a chunk does not arrive within the timeout
+    """
+    return get_rise_client().stream(command, adapter, system_prompt, timeout)
 
 
 def intiate_rise_install() -> None:
@@ -270,18 +943,8 @@ def intiate_rise_install() -> None:
     Raises:
         AttributeError: If there's an error accessing the RISE API
     """
-    global nvapi
-
     try:
-        content = NV_REQUEST_RISE_SETTINGS_V1()
-        content.contentType = NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_DOWNLOAD_REQUEST
-        content.version = ctypes.sizeof(NV_REQUEST_RISE_SETTINGS_V1) | (1 << 16)
-        content.completed = 1
-        
-        ret = nvapi.request_rise(content)
-        if ret != 0:
-            print(f'Send RISE INSTALL failed with {ret}')
-            return
+        get_rise_client().install()
 
     except AttributeError as e:
         print(f"An error occurred: {e}")
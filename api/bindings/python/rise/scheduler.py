@@ -0,0 +1,335 @@
+"""
+G-Assist (RISE) Scheduler Module
+
+This module provides admission control and fair queuing for servers that relay
+messages from many clients to a single RiseClient, such as the GUI bridge.
+
+The module includes:
+- MessageScheduler, a bounded queue that admits messages per client and hands
+  them to RISE round-robin across clients
+- Cancellation of queued and in-flight messages by request id
+- Queue depth and admission counters for monitoring
+
+Example:
+    scheduler = MessageScheduler(rise.get_rise_client(), max_queued=32)
+    try:
+        message = scheduler.submit('tab-1', 'What is my GPU?')
+    except QueueFullError:
+        ...  # reject with 429
+    print(message.future.result()['completed_response'])
+"""
+
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, InvalidStateError, CancelledError
+from typing import Callable, Deque, Dict, Optional, Set
+
+from .rise import RiseChunk, RiseClient, RiseRequest
+
+# Default number of messages waiting for RISE across all clients
+DEFAULT_MAX_QUEUED = 32
+
+# Default number of messages one client may have waiting for RISE
+DEFAULT_MAX_QUEUED_PER_CLIENT = 4
+
+
+class QueueFullError(Exception):
+    """Raised when a message is rejected because the queue is saturated."""
+
+    def __init__(self, message: str, retry_after: int = 1) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ScheduledMessage:
+    """
+    A message admitted by a MessageScheduler.
+
+    Attributes:
+        request_id: Id used to look the message up, e.g. to cancel it
+        client_id: Id of the client that sent the message
+        future: Resolves to the response dict, or raises the error or
+            CancelledError that ended the message
+        on_chunk: Called with each chunk as it arrives, then with None once
+            the future is done
+        rise_request: The RiseRequest once the message was handed to RISE
+    """
+
+    def __init__(self, request_id: str, client_id: str, command: str, adapter: str,
+                 system_prompt: str,
+                 on_chunk: Optional[Callable[[Optional[RiseChunk]], None]]) -> None:
+        self.request_id = request_id
+        self.client_id = client_id
+        self.command = command
+        self.adapter = adapter
+        self.system_prompt = system_prompt
+        self.future: Future = Future()
+        self.on_chunk = on_chunk
+        self.rise_request: Optional[RiseRequest] = None
+        if on_chunk is not None:
+            self.future.add_done_callback(lambda _: on_chunk(None))
+
+
+class MessageScheduler:
+    """
+    Bounded, fair queue in front of a RiseClient.
+
+    Messages the client's response cache can answer are resolved at once.
+    Other messages are held per client and handed to RISE round-robin across
+    clients, so one client sending a burst cannot delay everyone else's
+    messages behind its own. At most max_in_flight messages are handed to the
+    RiseClient at a time; the rest wait here where they can still be
+    reordered, counted and cancelled. A cancelled message keeps its place in
+    flight until RISE finishes the response it abandoned. All methods are
+    thread-safe.
+    """
+
+    def __init__(self, client: RiseClient, max_queued: int = DEFAULT_MAX_QUEUED,
+                 max_queued_per_client: int = DEFAULT_MAX_QUEUED_PER_CLIENT,
+                 max_in_flight: int = 1) -> None:
+        self._client = client
+        self.max_queued = max_queued
+        self.max_queued_per_client = max_queued_per_client
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+        self._queues: 'OrderedDict[str, Deque[ScheduledMessage]]' = OrderedDict()
+        self._messages: Dict[str, ScheduledMessage] = {}
+        self._queued = 0
+        self._in_flight = 0
+        # Cancelled messages whose responses RISE is still generating
+        self._abandoned: Set[ScheduledMessage] = set()
+        self._counters = {'admitted': 0, 'rejected': 0, 'cancelled': 0, 'completed': 0, 'failed': 0,
+                          'cached': 0}
+
+    def submit(self, client_id: str, command: str, adapter: str = '', system_prompt: str = '',
+               on_chunk: Optional[Callable[[Optional[RiseChunk]], None]] = None,
+               request_id: Optional[str] = None) -> ScheduledMessage:
+        """
+        Admit a message to the queue.
+
+        Args:
+            client_id: Id of the client sending the message
+            command: The text command to send to RISE
+            adapter: Optional adapter name to route the command to
+            system_prompt: Optional system prompt for the adapter
+            on_chunk: Optional function called with each chunk as it arrives,
+                then with None once the message is done
+            request_id: Optional id for the message; one is generated if omitted
+
+        Returns:
+            ScheduledMessage: The admitted message
+
+        Raises:
+            QueueFullError: If the queue or the client's share of it is full
+            ValueError: If request_id is already in use
+        """
+        request_id = request_id or uuid.uuid4().hex
+        with self._lock:
+            if request_id in self._messages:
+                raise ValueError(f'Request id {request_id} is already in use')
+        # Responses in the client's cache are answered without queueing
+        cached = self._client.submit_cached(command, adapter, system_prompt, _forward_chunks(on_chunk))
+        if cached is not None:
+            message = ScheduledMessage(request_id, client_id, command, adapter, system_prompt, on_chunk)
+            message.rise_request = cached
+            with self._lock:
+                self._counters['cached'] += 1
+            message.future.set_result(cached.future.result())
+            return message
+
+        with self._lock:
+            # Checked again, since another message may have taken the id meanwhile
+            if request_id in self._messages:
+                raise ValueError(f'Request id {request_id} is already in use')
+            client_queue = self._queues.get(client_id)
+            if self._queued >= self.max_queued:
+                self._counters['rejected'] += 1
+                raise QueueFullError('Too many messages are waiting for RISE',
+                                     self._retry_after())
+            if client_queue is not None and len(client_queue) >= self.max_queued_per_client:
+                self._counters['rejected'] += 1
+                raise QueueFullError('Too many of your messages are waiting for RISE',
+                                     self._retry_after())
+
+            message = ScheduledMessage(request_id, client_id, command, adapter, system_prompt, on_chunk)
+            if client_queue is None:
+                client_queue = self._queues[client_id] = deque()
+            client_queue.append(message)
+            self._messages[request_id] = message
+            self._queued += 1
+            self._counters['admitted'] += 1
+        self._dispatch()
+        return message
+
+    def get(self, request_id: str) -> Optional[ScheduledMessage]:
+        """
+        Look up a queued or in-flight message.
+
+        Args:
+            request_id: Id of the message
+
+        Returns:
+            ScheduledMessage: The message, or None if it is unknown or done
+        """
+        with self._lock:
+            return self._messages.get(request_id)
+
+    def position(self, message: ScheduledMessage) -> int:
+        """
+        Get the number of messages that will be handed to RISE before this one.
+
+        Args:
+            message: A message returned by submit
+
+        Returns:
+            int: Messages ahead of this one, or 0 once it has been handed to RISE
+        """
+        with self._lock:
+            client_queue = self._queues.get(message.client_id)
+            if client_queue is None or message not in client_queue:
+                return 0
+            # Round-robin takes one message from each client per round
+            rounds = client_queue.index(message)
+            ahead = rounds
+            for client_id, other in self._queues.items():
+                if client_id == message.client_id:
+                    break
+                ahead += min(len(other), rounds + 1)
+            for client_id, other in reversed(self._queues.items()):
+                if client_id == message.client_id:
+                    break
+                ahead += min(len(other), rounds)
+            return ahead + self._in_flight
+
+    def cancel(self, request_id: str) -> bool:
+        """
+        Cancel a queued or in-flight message.
+
+        A queued message is removed from the queue. An in-flight message is
+        abandoned through RiseClient.cancel, which releases its waiter at once.
+        RISE cannot stop a response part way, so the message stays in flight,
+        counting towards max_in_flight and the positions of queued messages,
+        until RISE finishes it.
+
+        Args:
+            request_id: Id of the message
+
+        Returns:
+            bool: True if the message was cancelled, False if it is unknown or done
+        """
+        with self._lock:
+            message = self._messages.get(request_id)
+            if message is None:
+                return False
+            rise_request = message.rise_request
+            if rise_request is None:
+                client_queue = self._queues[message.client_id]
+                client_queue.remove(message)
+                if not client_queue:
+                    del self._queues[message.client_id]
+                self._queued -= 1
+                del self._messages[request_id]
+                self._counters['cancelled'] += 1
+        if rise_request is None:
+            message.future.cancel()
+            return True
+        # The done callback of the RISE request does the bookkeeping
+        return self._client.cancel(rise_request)
+
+    def metrics(self) -> dict:
+        """
+        Get the current queue depth and admission counters.
+
+        Returns:
+            dict: Queue depth overall and per client, in-flight count (including
+                cancelled messages RISE is still finishing, also counted as
+                abandoned), limits and counters
+        """
+        with self._lock:
+            return {
+                'queued': self._queued,
+                'in_flight': self._in_flight,
+                'abandoned': len(self._abandoned),
+                'clients': {client_id: len(q) for client_id, q in self._queues.items()},
+                'max_queued': self.max_queued,
+                'max_queued_per_client': self.max_queued_per_client,
+                'counters': dict(self._counters),
+            }
+
+    def _retry_after(self) -> int:
+        """Estimate the seconds until a slot frees up, assuming ~1 second per message."""
+        return max(1, self._queued // max(1, self.max_in_flight))
+
+    def _dispatch(self) -> None:
+        """Hand messages to RISE, one client at a time, while there is room in flight."""
+        while True:
+            with self._lock:
+                if self._in_flight >= self.max_in_flight or not self._queues:
+                    return
+                client_id, client_queue = next(iter(self._queues.items()))
+                message = client_queue.popleft()
+                if client_queue:
+                    self._queues.move_to_end(client_id)
+                else:
+                    del self._queues[client_id]
+                self._queued -= 1
+                self._in_flight += 1
+                message.rise_request = self._client.submit(
+                    message.command, message.adapter, message.system_prompt,
+                    on_chunk=_forward_chunks(message.on_chunk), use_cache=False)
+            message.rise_request.future.add_done_callback(
+                lambda future, m=message: self._on_done(m, future))
+            message.rise_request.add_finished_callback(lambda m=message: self._on_finished(m))
+
+    def _on_done(self, message: ScheduledMessage, future: Future) -> None:
+        """Resolve a message from its RISE request."""
+        if future.cancelled():
+            outcome = 'cancelled'
+        else:
+            error = future.exception()
+            if isinstance(error, CancelledError):
+                outcome = 'cancelled'
+            elif error is not None:
+                outcome = 'failed'
+            else:
+                outcome = 'completed'
+
+        with self._lock:
+            self._messages.pop(message.request_id, None)
+            self._counters[outcome] += 1
+            if outcome == 'cancelled' and not message.rise_request.finished:
+                self._abandoned.add(message)
+        try:
+            if outcome == 'cancelled':
+                message.future.cancel()
+            elif outcome == 'failed':
+                message.future.set_exception(future.exception())
+            else:
+                message.future.set_result(future.result())
+        except InvalidStateError:
+            pass
+
+    def _on_finished(self, message: ScheduledMessage) -> None:
+        """Free the slot of a message RISE is done with and start the next message."""
+        with self._lock:
+            self._in_flight -= 1
+            self._abandoned.discard(message)
+        self._dispatch()
+
+
+def _forward_chunks(on_chunk: Optional[Callable[[Optional[RiseChunk]], None]]
+                    ) -> Optional[Callable[[Optional[RiseChunk]], None]]:
+    """
+    Wrap a message's on_chunk for its RISE request.
+
+    The None that ends the RISE request is dropped; the message sends its own
+    once its future has been resolved.
+    """
+    if on_chunk is None:
+        return None
+
+    def forward(chunk: Optional[RiseChunk]) -> None:
+        if chunk is not None:
+            on_chunk(chunk)
+    return forward
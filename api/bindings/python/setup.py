@@ -10,6 +10,7 @@ setup(
         'tqdm',      # For progress bars
         'flask',     # Lightweight web framework
         'flask-cors',# For handling Cross-Origin Resource Sharing
+        'waitress',  # Production WSGI server for the GUI bridge
         'colorama'   # For colored terminal text
     ],
     include_package_data=True,        # Include files specified by MANIFEST.in (if any)
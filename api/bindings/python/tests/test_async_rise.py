@@ -0,0 +1,89 @@
+"""
+Tests for cancelling AsyncRiseClient requests on the fake backend.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rise.async_rise import AsyncRiseClient
+from rise.cache import ResponseCache
+from rise.fake_backend import FakeRiseBackend
+from rise.metrics import RiseListener
+from rise.rise import RiseClient
+
+# About half a second of chunks, so a request is still running when it is abandoned
+SLOW_RESPONSE = 'x' * 200
+
+
+class RecordingListener(RiseListener):
+    """Records the requests sent and the chunks delivered to them."""
+
+    def __init__(self) -> None:
+        self.requests = []
+        self.chunks = 0
+
+    def on_request_sent(self, request, queue_wait: float) -> None:
+        self.requests.append(request)
+
+    def on_chunk(self, request, size: int, gap: float) -> None:
+        self.chunks += 1
+
+
+class AsyncRiseCancelTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        backend = FakeRiseBackend({'slow': SLOW_RESPONSE, 'fast': 'done'}, chunk_delay=0.01, chunk_size=4)
+        self.client = RiseClient(api=backend, cache=ResponseCache())
+        self.client.register(timeout=5)
+        self.listener = RecordingListener()
+        self.client.add_listener(self.listener)
+        self.async_client = AsyncRiseClient(self.client)
+
+    def assert_abandoned(self, request) -> None:
+        self.assertTrue(request.future.done())
+        chunks = self.listener.chunks
+        time.sleep(0.1)
+        self.assertEqual(self.listener.chunks, chunks, 'listeners still called after the request was abandoned')
+        self.assertIsNone(self.client.cache.get(('slow', '', '')))
+
+    def test_send_timeout_abandons_running_request(self) -> None:
+        async def run():
+            with self.assertRaises(TimeoutError):
+                await self.async_client.send('slow', timeout=0.1)
+            self.assertEqual(len(self.listener.requests), 1)
+            self.assert_abandoned(self.listener.requests[0])
+            # The dispatcher moves on once RISE finishes the abandoned response
+            return await self.async_client.send('fast', timeout=5)
+
+        response = asyncio.run(run())
+        self.assertEqual(response['completed_response'], 'done')
+
+    def test_cancelled_send_abandons_running_request(self) -> None:
+        async def run():
+            task = asyncio.ensure_future(self.async_client.send('slow'))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assert_abandoned(self.listener.requests[0])
+
+        asyncio.run(run())
+
+    def test_closing_stream_abandons_running_request(self) -> None:
+        async def run():
+            chunks = self.async_client.stream('slow', timeout=5)
+            first = await chunks.__anext__()
+            self.assertFalse(first.completed)
+            await chunks.aclose()
+            self.assert_abandoned(self.listener.requests[0])
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
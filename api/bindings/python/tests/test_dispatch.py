@@ -0,0 +1,60 @@
+"""
+Tests for the RiseClient dispatcher recovering from failed requests on the fake backend.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rise.fake_backend import FakeRiseBackend
+from rise.rise import RiseClient
+
+
+class FaultyBackend(FakeRiseBackend):
+    """Raises on the next request, or loses the final chunk of the next response."""
+
+    def __init__(self) -> None:
+        super().__init__({'ok': 'done'})
+        self.raise_next = False
+        self.drop_next_final = False
+
+    def request_rise(self, settings) -> int:
+        if self.raise_next:
+            self.raise_next = False
+            raise OSError('RISE library unavailable')
+        return super().request_rise(settings)
+
+    def _emit(self, content_type, content, completed: bool) -> None:
+        if completed and self.drop_next_final:
+            self.drop_next_final = False
+            return
+        super()._emit(content_type, content, completed)
+
+
+class DispatchTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.backend = FaultyBackend()
+        self.client = RiseClient(api=self.backend, response_timeout=0.2)
+        self.client.register(timeout=5)
+
+    def assert_next_request_answered(self) -> None:
+        self.assertEqual(self.client.send('ok', timeout=5)['completed_response'], 'done')
+
+    def test_send_error_fails_only_its_request(self) -> None:
+        self.backend.raise_next = True
+        with self.assertRaises(OSError):
+            self.client.send('ok', timeout=5)
+        self.assert_next_request_answered()
+
+    def test_lost_final_chunk_times_out(self) -> None:
+        self.backend.drop_next_final = True
+        with self.assertRaises(TimeoutError):
+            self.client.send('lost', timeout=5)
+        self.assert_next_request_answered()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+Tests for the statistics a RiseRequest records as content arrives.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rise.metrics import RiseListener
+from rise.rise import RiseRequest
+
+
+class RiseRequestFeedTest(unittest.TestCase):
+
+    def feed(self, request: RiseRequest) -> None:
+        request.sent_at = request.submitted_at
+        request.feed(True, memoryview(b'{}\0'), False)
+        request.feed(False, memoryview(b'hel\0\0'), False)
+        request.feed(False, memoryview(b'lo\0'), True)
+
+    def assert_counted(self, request: RiseRequest) -> None:
+        self.assertEqual(request.future.result()['completed_response'], 'hello')
+        self.assertEqual(request.chunk_count, 3)
+        self.assertEqual(request.byte_count, 7)
+        self.assertIsNotNone(request.first_chunk_at)
+        self.assertGreaterEqual(request.last_chunk_at, request.first_chunk_at)
+
+    def test_counts_without_listeners(self) -> None:
+        request = RiseRequest(b'{}')
+        self.feed(request)
+        self.assert_counted(request)
+
+    def test_counts_with_listeners(self) -> None:
+        request = RiseRequest(b'{}', listeners=(RiseListener(),))
+        self.feed(request)
+        self.assert_counted(request)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Tests for MessageScheduler admission and queue state on the fake backend.
+"""
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rise.cache import ResponseCache
+from rise.fake_backend import FakeRiseBackend
+from rise.rise import RiseClient
+from rise.scheduler import MessageScheduler, QueueFullError
+
+# About half a second of chunks, so a message is still running when it is cancelled
+SLOW_RESPONSE = 'x' * 200
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        backend = FakeRiseBackend({'slow': SLOW_RESPONSE, 'fast': 'done'}, chunk_delay=0.01, chunk_size=4)
+        self.client = RiseClient(api=backend, cache=ResponseCache())
+        self.client.register(timeout=5)
+        self.scheduler = MessageScheduler(self.client, max_queued=1)
+
+    def test_duplicate_request_id_is_rejected_before_cache(self) -> None:
+        self.client.send('fast', timeout=5)
+        self.scheduler.submit('tab-1', 'slow', request_id='r1')
+        with self.assertRaises(ValueError):
+            self.scheduler.submit('tab-2', 'fast', request_id='r1')
+        self.assertEqual(self.scheduler.metrics()['counters']['cached'], 0)
+
+    def test_cancelled_message_holds_its_slot_until_rise_finishes(self) -> None:
+        slow = self.scheduler.submit('tab-1', 'slow')
+        fast = self.scheduler.submit('tab-2', 'fast')
+        self.assertTrue(self.scheduler.cancel(slow.request_id))
+        self.assertTrue(slow.future.cancelled())
+
+        metrics = self.scheduler.metrics()
+        self.assertEqual((metrics['queued'], metrics['in_flight'], metrics['abandoned']), (1, 1, 1))
+        self.assertEqual(self.scheduler.position(fast), 1)
+        with self.assertRaises(QueueFullError):
+            self.scheduler.submit('tab-3', 'fast')
+
+        self.assertEqual(fast.future.result(timeout=5)['completed_response'], 'done')
+        # The slot is freed just after the future resolves, once RISE is done
+        deadline = time.monotonic() + 5
+        while self.scheduler.metrics()['in_flight'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        metrics = self.scheduler.metrics()
+        self.assertEqual((metrics['queued'], metrics['in_flight'], metrics['abandoned']), (0, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
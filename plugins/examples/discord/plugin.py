@@ -2,8 +2,11 @@ import json
 import logging
 import os
 import requests
-from ctypes import byref, windll, wintypes
+from functools import wraps
 from typing import Optional
+
+from gassist_plugin import Plugin
+
 # Data Types
 Response = dict[bool, Optional[str]]
 
@@ -24,119 +27,11 @@ BOT_TOKEN = None
 CHANNEL_ID = None
 GAME_DIRECTORY = None
 
-def main():
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    CONTEXT_PROPERTY = 'messages'
-    SYSTEM_INFO_PROPERTY = 'system_info'
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'params'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-
-    commands = {
-        'initialize': execute_initialize_command,
-        'shutdown': execute_shutdown_command,
-        'send_message_to_discord_channel': send_message_to_discord_channel,
-        'send_latest_chart_to_discord_channel': send_latest_chart_to_discord_channel,
-        'send_latest_shadowplay_clip_to_discord_channel': send_latest_shadowplay_clip_to_discord_channel,
-        'send_latest_screenshot_to_discord_channel': send_latest_screenshot_to_discord_channel,
-    }
-
-    cmd = ''
-    logging.info('Plugin started')
-
-    while cmd != SHUTDOWN_COMMAND:
-        response = None
-        input = read_command()
-        if input is None:
-            logging.error('Error reading command')
-            continue
-
-        logging.info(f'Received input: {input}')
-
-        if TOOL_CALLS_PROPERTY in input:
-            tool_calls = input[TOOL_CALLS_PROPERTY]
-            for tool_call in tool_calls:
-                if FUNCTION_PROPERTY in tool_call:
-                    cmd = tool_call[FUNCTION_PROPERTY]
-                    logging.info(f'Processing command: {cmd}')
-                    if cmd in commands:
-                        if cmd == INITIALIZE_COMMAND or cmd == SHUTDOWN_COMMAND:
-                            response = commands[cmd]()
-                        else:
-                            execute_initialize_command()
-                            params = tool_call.get(PARAMS_PROPERTY, {})
-                            context = tool_call.get(CONTEXT_PROPERTY, {})
-                            system_info = tool_call.get(SYSTEM_INFO_PROPERTY, {})
-                            logging.info(f'Executing command: {cmd} with params: {params}, context: {context}, system_info: {system_info}')
-                            response = commands[cmd](params, context, system_info)
-                    else:
-                        logging.warning(f'Unknown command: {cmd}')
-                        response = generate_failure_response(f'Unknown command: {cmd}')
-                else:
-                    logging.warning('Malformed input: missing function property')
-                    response = generate_failure_response('Malformed input.')
-        else:
-            logging.warning('Malformed input: missing tool_calls property')
-            response = generate_failure_response('Malformed input.')
-
-        logging.info(f'Sending response: {response}')
-        write_response(response)
-
-        if cmd == SHUTDOWN_COMMAND:
-            logging.info('Shutdown command received, terminating plugin')
-            break
-
-    logging.info('G-Assist Plugin stopped.')
-    return 0
-
-
-def read_command() -> dict | None:
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-        chunks = []
-
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(pipe, buffer, BUFFER_SIZE, byref(message_bytes), None)
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
+plugin = Plugin('discord')
 
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
 
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        retval = ''.join(chunks)
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        logging.error('Failed to decode JSON input')
-        return None
-    except Exception as e:
-        logging.error(f'Unexpected error in read_command: {str(e)}')
-        return None
-
-
-def write_response(response: Response) -> None:
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(pipe, message_bytes, message_len, byref(bytes_written), None)
-    except Exception as e:
-        logging.error(f'Failed to write response: {str(e)}')
-        pass
+def main():
+    return plugin.run()
 
 
 def generate_failure_response(message: str = None) -> Response:
@@ -153,6 +48,7 @@ def generate_success_response(message: str = None) -> Response:
     return response
 
 
+@plugin.command('initialize')
 def execute_initialize_command() -> dict:
     global BOT_TOKEN
     global CHANNEL_ID
@@ -179,11 +75,23 @@ def execute_initialize_command() -> dict:
         return generate_failure_response('Failed to initialize.')
 
 
+@plugin.command('shutdown')
 def execute_shutdown_command() -> dict:
     logging.info('Shutting down plugin')
     return generate_success_response('Shutdown success.')
 
 
+def reload_config(handler):
+    ''' Reloads the config before running a command, since it may have been edited after initialize. '''
+    @wraps(handler)
+    def wrapper(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
+        execute_initialize_command()
+        return handler(params, context, system_info)
+    return wrapper
+
+
+@plugin.command('send_message_to_discord_channel')
+@reload_config
 def send_message_to_discord_channel(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
     try:
         global CHANNEL_ID
@@ -221,6 +129,8 @@ def find_latest_file(directory: str, extension: str) -> Optional[str]:
         return None
 
 
+@plugin.command('send_latest_chart_to_discord_channel')
+@reload_config
 def send_latest_chart_to_discord_channel(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
     try:
         caption = params.get('caption', '')
@@ -246,6 +156,8 @@ def send_latest_chart_to_discord_channel(params: dict = None, context: dict = No
         return generate_failure_response('Error sending CSV.')
 
 
+@plugin.command('send_latest_shadowplay_clip_to_discord_channel')
+@reload_config
 def send_latest_shadowplay_clip_to_discord_channel(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
     try:
         caption = params.get('caption', '') if params else ''
@@ -271,6 +183,8 @@ def send_latest_shadowplay_clip_to_discord_channel(params: dict = None, context:
         return generate_failure_response('Error sending MP4.')
 
 
+@plugin.command('send_latest_screenshot_to_discord_channel')
+@reload_config
 def send_latest_screenshot_to_discord_channel(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
     try:
         caption = params.get('caption', '') if params else ''
@@ -15,16 +15,15 @@
 
 ''' Google Gemini G-Assist plugin. '''
 import copy
-import ctypes
 import json
 import logging
 import os
 
-from ctypes import byref, windll, wintypes, GetLastError, create_string_buffer
 import re
 import traceback
 from typing import Optional
 
+from gassist_plugin import Plugin
 from google import genai
 from google.genai.types import (ModelContent, Part, UserContent, GoogleSearch, Tool, GenerateContentConfig)
 
@@ -42,74 +41,17 @@ API_KEY = None
 client = None
 model: str = 'gemini-pro'  # Default model
 
+plugin = Plugin('gemini', error_message='Could not process request.')
+
 def main():
     ''' Main entry point.
-    
-    Sits in a loop listening to a pipe, waiting for commands to be issued. After
-    receiving the command, it is processed and the result returned. The loop
-    continues until the "shutdown" command is issued.
+
+    Serves commands until the "shutdown" command is issued.
 
     Returns:
         0 if no errors occurred during execution; non-zero if an error occurred
     '''
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    CONTEXT_PROPERTY = 'messages'
-    SYSTEM_INFO_PROPERTY = 'system_info'
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'properties'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-
-    ERROR_MESSAGE = 'Could not process request.'
-
-    # Generate command handler mapping
-    commands = {
-        "initialize": execute_initialize_command,
-        "shutdown": execute_shutdown_command,
-        "query_gemini": execute_query_gemini_command,
-    }
-    cmd = ''
-
-    logging.info('Google Gemini plugin started.')
-    while True:
-        response = None
-        input = read_command()
-        if input is None:
-            logging.error('Error reading command')
-            continue
-
-        if TOOL_CALLS_PROPERTY in input:
-            tool_calls = input[TOOL_CALLS_PROPERTY]
-            for tool_call in tool_calls:
-                if FUNCTION_PROPERTY in tool_call:
-                    cmd = tool_call[FUNCTION_PROPERTY]
-                    if cmd in commands:
-                        if(cmd == INITIALIZE_COMMAND or cmd == SHUTDOWN_COMMAND):
-                            response = commands[cmd]()
-                        else:
-                            response = commands[cmd](
-                                input[PARAMS_PROPERTY] if PARAMS_PROPERTY in input else None,
-                                input[CONTEXT_PROPERTY] if CONTEXT_PROPERTY in input else None,
-                                input[SYSTEM_INFO_PROPERTY] if SYSTEM_INFO_PROPERTY in input else None
-                            )
-                    else:
-                        logging.warning(f'Unknown command: {cmd}')
-                        response = generate_failure_response(f'{ERROR_MESSAGE} Unknown command: {cmd}')
-                else:
-                    logging.warning('Malformed input.')
-                    response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-        else:
-            logging.warning('Malformed input.')
-            response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-
-        logging.info(f'Response: {response}')
-        write_response(response)
-
-        if cmd == SHUTDOWN_COMMAND:
-            break
-
-    logging.info('Google Gemini plugin stopped.')
-    return 0
+    return plugin.run()
 
 def remove_unicode(s: str) -> str:
     '''Remove non-ASCII characters from a string.
@@ -130,86 +72,21 @@ def remove_unicode(s: str) -> str:
     ascii_only = ''.join(c for c in s_decoded if ord(c) < 128)
     return ascii_only
 
-def read_command() -> dict | None:
-    ''' Reads a command from the communication pipe.
-    
-    Reads data in chunks until the full message is received, then processes it as JSON.
-    Handles Unicode escapes and ensures the text is printable.
-
-    Returns:
-        Command details if the input was proper JSON; `None` otherwise
-    '''
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-
-        chunks = []
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        retval = ''.join(chunks)
-        logging.info(f'Raw Input: {retval}')
-        clean_text = retval.encode('utf-8').decode('raw_unicode_escape')
-        clean_text = ''.join(ch for ch in clean_text if ch.isprintable() or ch in ['\n', '\t', '\r'])
-        return json.loads(clean_text)
-
-    except json.JSONDecodeError:
-        logging.error(f'Received invalid JSON: {clean_text}')
-        logging.exception("JSON decoding failed:")
-        return None
-    except Exception as e:
-        logging.error(f'Exception in read_command(): {str(e)}')
-        return None
-
-
-def write_response(response: Response) -> None:
-    ''' Writes a response to the communication pipe.
-    
-    Converts the response to JSON and sends it through the pipe with an end marker.
+def sanitize_text(s: str) -> str:
+    '''Decode escape sequences and drop unprintable characters from input text.
 
     Args:
-        response: Dictionary containing return value(s)
+        s: Input string to process
+
+    Returns:
+        String with escape sequences decoded and only printable characters,
+        newlines and tabs kept
     '''
     try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            message_len,
-            bytes_written,
-            None
-        )
-
+        clean_text = s.encode('utf-8').decode('raw_unicode_escape')
     except Exception:
-        logging.error('Unknown exception caught.')
-        pass
-
+        clean_text = s
+    return ''.join(ch for ch in clean_text if ch.isprintable() or ch in ['\n', '\t', '\r'])
 
 def generate_failure_response(message: str = None) -> Response:
     ''' Generates a response indicating failure.
@@ -241,18 +118,7 @@ def generate_success_response(message: str = None) -> Response:
     return response
 
 
-def generate_message_response(message:str):
-    ''' Generates a message response.
-
-    Args:
-        message: String to be returned to the driver
-
-    Returns:
-        A message response dictionary
-    '''
-    return { 'message': message }
-
-
+@plugin.command('initialize')
 def execute_initialize_command() -> dict:
     ''' Initialize the Gemini API connection.
     
@@ -282,6 +148,7 @@ def execute_initialize_command() -> dict:
         API_KEY = None
         return generate_failure_response(str(e))
 
+@plugin.command('shutdown')
 def execute_shutdown_command() -> dict:
     ''' Cleanup resources.
     
@@ -345,6 +212,7 @@ def extract_parts(history):
                 parts.append(Part.from_text(text=part.text))
     return parts
 
+@plugin.command('query_gemini')
 def execute_query_gemini_command(params: dict = None, context: dict = None, system_info: str = None) -> dict:
     ''' Handle Gemini query with conversation history.
     
@@ -361,13 +229,21 @@ def execute_query_gemini_command(params: dict = None, context: dict = None, syst
     '''
     global API_KEY, CONFIG_FILE, model, client
 
+    # Clean the input the same way the raw command text was cleaned before it was parsed
+    context = [
+        {**message, 'content': sanitize_text(message['content'])} if isinstance(message.get('content'), str) else message
+        for message in context or []
+    ]
+    if isinstance(system_info, str):
+        system_info = sanitize_text(system_info)
+
     if API_KEY is None:
         ERROR_MESSAGE = (
             "It looks like your API key is missing or invalid. Please update " +
             f"{API_KEY_FILE} with a valid key and restart G-Assist.\n\n" +
             "To obtain an API, visit https://ai.google.dev."
         )
-        write_response(generate_message_response(ERROR_MESSAGE))
+        plugin.stream_threadsafe(ERROR_MESSAGE)
         return generate_success_response() #print nothing, the initialize will have done so ## bug to be fixed in driver
 
     # Load model config
@@ -439,13 +315,13 @@ def execute_query_gemini_command(params: dict = None, context: dict = None, syst
                     for chunk in response:
                         if chunk.text:
                             logging.info(f'GEMINI_HANDLER: Search response chunk: {chunk.text[:30]}...')
-                            write_response(generate_message_response(chunk.text))
+                            plugin.stream_threadsafe(chunk.text)
                     logging.info("GEMINI_HANDLER: Search response completed successfully")
                     return generate_success_response()
                 except Exception as search_error:
                     # If search fails, fall back to LLM
                     logging.error(f'GEMINI_HANDLER: Search failed, falling back to LLM: {str(search_error)}')
-                    write_response(generate_message_response("Unable to ground search the query, falling back to LLM.\n"))
+                    plugin.stream_threadsafe("Unable to ground search the query, falling back to LLM.\n")
                     return execute_llm_query(gemini_history, incoming_context, system_info)
         except json.JSONDecodeError:
             # Handle JSON parsing errors from classifier response
@@ -483,7 +359,7 @@ def execute_llm_query(gemini_history, incoming_context, system_info):
     for chunk in response:
         if chunk.text:
             logging.info(f'GEMINI_HANDLER: Response chunk: {chunk.text[:30]}...')
-            write_response(generate_message_response(chunk.text))
+            plugin.stream_threadsafe(chunk.text)
     logging.info("GEMINI_HANDLER: LLM response completed successfully")
     return generate_success_response()
 
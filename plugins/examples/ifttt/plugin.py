@@ -3,9 +3,10 @@ import logging
 import os
 import requests
 import feedparser
-from ctypes import byref, windll, wintypes
 from typing import Dict, Optional, List
 
+from gassist_plugin import Plugin
+
 # Data Types
 Response = Dict[bool, Optional[str]]
 
@@ -27,109 +28,10 @@ EVENT_NAME = None
 MAIN_RSS_URL = "https://feeds.feedburner.com/ign/pc-articles"  # using IGN PC Gaming RSS feed as default
 ALTERNATE_RSS_URL = "https://feeds.feedburner.com/ign/all"  # using IGN All RSS feed as default
 
-def main():
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'params'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-    ERROR_MESSAGE = 'Plugin Error!'
-
-    commands = {
-        'initialize': execute_initialize_command,
-        'shutdown': execute_shutdown_command,
-        'trigger_gaming_setup': execute_run_applet_command,
-    }
-    cmd = ''
-
-    logging.info('IFTTT Plugin started')
-    while cmd != SHUTDOWN_COMMAND:
-        response = None
-        input = read_command()
-        if input is None:
-            logging.error('Error reading command')
-            continue
-
-        logging.info(f'Received input: {input}')
-
-        if TOOL_CALLS_PROPERTY in input:
-            tool_calls = input[TOOL_CALLS_PROPERTY]
-            for tool_call in tool_calls:
-                if FUNCTION_PROPERTY in tool_call:
-                    cmd = tool_call[FUNCTION_PROPERTY]
-                    logging.info(f'Processing command: {cmd}')
-                    if cmd in commands:
-                        if cmd in [INITIALIZE_COMMAND, SHUTDOWN_COMMAND]:
-                            response = commands[cmd]()
-                        else:
-                            params = tool_call.get(PARAMS_PROPERTY, {})
-                            response = commands[cmd](params)
-                    else:
-                        logging.warning(f'Unknown command: {cmd}')
-                        response = generate_failure_response(f'{ERROR_MESSAGE} Unknown command: {cmd}')
-                else:
-                    logging.warning('Malformed input: missing function property')
-                    response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-        else:
-            logging.warning('Malformed input: missing tool_calls property')
-            response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-
-        logging.info(f'Sending response: {response}')
-        write_response(response)
-
-        if cmd == SHUTDOWN_COMMAND:
-            logging.info('Shutdown command received, terminating plugin')
-            break
-
-    logging.info('IFTTT Plugin stopped.')
-    return 0
-
-def read_command() -> dict or None:
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-        chunks = []
-
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(pipe, buffer, BUFFER_SIZE, byref(message_bytes), None)
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
+plugin = Plugin('ifttt')
 
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        retval = ''.join(chunks)
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        logging.error('Failed to decode JSON input')
-        return None
-    except Exception as e:
-        logging.error(f'Unexpected error in read_command: {str(e)}')
-        return None
-
-def write_response(response: Response) -> None:
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(pipe, message_bytes, message_len, byref(bytes_written), None)
-
-    except Exception as e:
-        logging.error(f'Failed to write response: {str(e)}')
+def main():
+    return plugin.run()
 
 def generate_failure_response(message: str = None) -> Response:
     response = { 'success': False }
@@ -143,10 +45,12 @@ def generate_success_response(message: str = None) -> Response:
         response['message'] = message
     return response
 
+@plugin.command('initialize')
 def execute_initialize_command() -> dict:
     logging.info('Initializing plugin')
     return generate_success_response('initialize success.')
 
+@plugin.command('shutdown')
 def execute_shutdown_command() -> dict:
     logging.info('Shutting down plugin')
     return generate_success_response('shutdown success.')
@@ -183,6 +87,7 @@ def fetch_ign_gaming_news() -> List[str]:
         logging.error(f'Error fetching IGN gaming news: {str(e)}')
         return []
 
+@plugin.command('trigger_gaming_setup')
 def execute_run_applet_command(params: dict = None) -> dict:
     logging.info(f'Executing run_applet with params: {params}')
 
@@ -12,15 +12,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import ctypes
 import json
 import os
 import sys
 
-from ctypes import byref, windll, wintypes
 from ipaddress import ip_address
-from typing import Optional
+from typing import Callable, Optional
 
+from gassist_plugin import Plugin
 from nanoleafapi import Nanoleaf
 
 
@@ -41,70 +40,50 @@ type Color = tuple[int, int, int]
 # Globals
 NL: Nanoleaf | None = None
 
+INITIALIZE_COMMAND = 'initialize'
+SHUTDOWN_COMMAND = 'shutdown'
+ERROR_MESSAGE = 'Failed to update lighting for Nanoleaf device(s).'
+
+# The plugin manager may send function names in any case
+plugin = Plugin('nanoleaf', error_message=ERROR_MESSAGE, ignore_case=True)
+
 
 def main():
     ''' Main entry point.
 
-    Sits in a loop listening to a pipe, waiting for commands to be issued. After
-    receiving the command, it is processed and the result returned. The loop
-    continues until the "shutdown" command is issued.
+    Registers the command handlers and serves commands until the "shutdown"
+    command is issued.
 
     Returns:
         Zero if no errors occurred during execution, otherwise a non-zero value
     '''
-    global NL
+    for cmd, handler in generate_command_handlers().items():
+        if cmd not in (INITIALIZE_COMMAND, SHUTDOWN_COMMAND):
+            handler = with_device(handler)
+        plugin.command(cmd)(handler)
 
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    CONTEXT_PROPERTY = 'context'
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'properties'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
+    write_log('Starting plugin.')
+    return plugin.run()
 
-    ERROR_MESSAGE = 'Failed to update lighting for Nanoleaf device(s).'
 
-    # Generate command handler mapping
-    commands = generate_command_handlers()
-    cmd = ''
+def with_device(handler: Callable[..., Response]) -> Callable[[dict, list], Response]:
+    ''' Wraps a command handler so it is passed a freshly connected device.
 
-    write_log('Starting plugin.')
-    while True:
-        response = None
-        input = read_command()
-        context = input[CONTEXT_PROPERTY] if CONTEXT_PROPERTY in cmd else None
-
-        write_log(f'Input Received: {input}')
-        if input is None:
-            # Error reading command; continue
-            continue
-        if TOOL_CALLS_PROPERTY in input:
-            tool_calls = input[TOOL_CALLS_PROPERTY]
-            for tool_call in tool_calls:
-                if FUNCTION_PROPERTY in tool_call:
-                    cmd = tool_call[FUNCTION_PROPERTY].lower()
-
-                    if cmd in commands:
-                        if(cmd == INITIALIZE_COMMAND or cmd == SHUTDOWN_COMMAND):
-                            response = commands[cmd]()
-                        else:
-                            response = execute_initialize_command()
-
-                            if NL is None:
-                                response = generate_failure_response(f'{ERROR_MESSAGE} There is no Nanoleaf device connected. Check the IP address in the configuration file.')
-                            else:
-                                response = commands[cmd](NL, tool_call[PARAMS_PROPERTY] if PARAMS_PROPERTY in tool_call else {}, context)
-                    else:
-                        response = generate_failure_response(f'{ERROR_MESSAGE} Unknown command: {cmd}')
-                else:
-                    response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-        else:
-            response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-
-        write_log(f'Sending Response: {response}')
-        write_response(response)
-        if cmd == SHUTDOWN_COMMAND:
-            break
-    return 0
+    The device is reconnected before every command, so changes to the
+    configuration file apply without restarting the plugin.
+
+    Parameters:
+        handler: Command handler taking the device, parameters and context
+
+    Returns:
+        Command handler taking the parameters and context
+    '''
+    def wrapper(params: dict, context: list) -> Response:
+        execute_initialize_command()
+        if NL is None:
+            return generate_failure_response(f'{ERROR_MESSAGE} There is no Nanoleaf device connected. Check the IP address in the configuration file.')
+        return handler(NL, params, context)
+    return wrapper
 
 
 def write_log(line: str) -> None:
@@ -139,84 +118,6 @@ def generate_command_handlers() -> dict:
     return commands
 
 
-def read_command() -> dict | None:
-    ''' Reads a command from the communication pipe.
-
-    Returns:
-        Command details if the input was proper JSON; `None` otherwise
-    '''
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-
-        # Read in chunks until we get the full message
-        chunks = []
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                write_log('Error reading from command pipe')
-                return None
-            
-            # Add the chunk we read
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-             # If we read less than the buffer size, we're done
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        # Combine all chunks and parse JSON
-        retval = ''.join(chunks)
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        write_log(f'Received invalid JSON: {retval}')
-        return None
-    except Exception as e:
-        write_log(f'Exception in read_command(): {str(e)}')
-        return None
-
-
-def write_response(response:Response) -> None:
-    ''' Writes a response to the communication pipe.
-
-    Parameters:
-        response: Response
-    '''
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        success = windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            message_len,
-            bytes_written,
-            None
-        )
-
-        if not success:
-            write_log('Error writing to response pipe')
-
-    except Exception as e:
-        write_log(f'Exception in write_response(): {str(e)}')
-
-
 def generate_failure_response(message:str=None) -> Response:
     ''' Generates a response indicating failure.
 
@@ -7,13 +7,15 @@ manager. Communication between the plugin and the manager are done via pipes.
 import json
 import logging
 import os
-from ctypes import byref, windll, wintypes
+from functools import wraps
 from xmlrpc.client import boolean
 import requests
 from typing import Optional
 from openrgb import OpenRGBClient
 from openrgb.utils import RGBColor, DeviceType
 
+from gassist_plugin import Plugin
+
 
 # Data Types
 Response = dict[bool,Optional[str]]
@@ -36,163 +38,18 @@ COLOR_MAP = {
     'black': (0, 0, 0)
 }
 
+plugin = Plugin('openrgb')
+
 def main():
     ''' Main entry point.
 
-    Sits in a loop listening to a pipe, waiting for commands to be issued. After
-    receiving the command, it is processed and the result returned. The loop
-    continues until the "shutdown" command is issued.
+    Serves commands from the pipe through the shared plugin runtime until the
+    "shutdown" command is issued.
 
     Returns:
         0 if no errors occurred during execution; non-zero if an error occurred
     '''
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    CONTEXT_PROPERTY = 'messages'
-    SYSTEM_INFO_PROPERTY = 'system_info'  # Added for game information
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'params'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-
-
-    ERROR_MESSAGE = 'Plugin Error!'
-
-    try:
-        # Generate command handler mapping
-        commands = {
-            'initialize': execute_initialize_command,
-            'shutdown': execute_shutdown_command,
-            'list_devices': execute_list_devices,
-            'disable_lighting': execute_disable_lighting,
-            # 'list_colors': execute_list_colors,
-            # 'list_effects': execute_list_effects,
-            'set_color': execute_set_color,
-            'set_mode': execute_set_mode,
-        }
-        cmd = ''
-
-        logging.info('Plugin started')
-        while cmd != SHUTDOWN_COMMAND:
-            response = None
-            input = read_command()
-            if input is None:
-                logging.error('Error reading command')
-                continue
-
-            logging.info(f'Received input: {input}')
-            
-            if TOOL_CALLS_PROPERTY in input:
-                tool_calls = input[TOOL_CALLS_PROPERTY]
-                for tool_call in tool_calls:
-                    if FUNCTION_PROPERTY in tool_call:
-                        cmd = tool_call[FUNCTION_PROPERTY]
-                        logging.info(f'Processing command: {cmd}')
-                        if cmd in commands:
-                            if(cmd == INITIALIZE_COMMAND or cmd == SHUTDOWN_COMMAND):
-                                response = commands[cmd]()
-                            else:
-                                response = execute_initialize_command()
-                                response = commands[cmd](
-                                    tool_call.get(PARAMS_PROPERTY, {}),
-                                    input[CONTEXT_PROPERTY] if CONTEXT_PROPERTY in input else None,
-                                    input[SYSTEM_INFO_PROPERTY] if SYSTEM_INFO_PROPERTY in input else None  # Pass system_info directly
-                                )
-                        else:
-                            logging.warning(f'Unknown command: {cmd}')
-                            response = generate_failure_response(f'{ERROR_MESSAGE} Unknown command: {cmd}')
-                    else:
-                        logging.warning('Malformed input: missing function property')
-                        response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-            else:
-                logging.warning('Malformed input: missing tool_calls property')
-                response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-
-            logging.info(f'Sending response: {response}')
-            write_response(response)
-
-            if cmd == SHUTDOWN_COMMAND:
-                logging.info('Shutdown command received, terminating plugin')
-                break
-        
-        logging.info('G-Assist Plugin stopped.')
-        return 0
-    except Exception as e:
-        logging.error(f'Unexpected error in main: {str(e)}')
-        return 1
-
-
-def read_command() -> dict | None:
-    ''' Reads a command from the communication pipe.
-
-    Returns:
-        Command details if the input was proper JSON; `None` otherwise
-    '''
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-        chunks = []
-
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-
-            # Add the chunk we read
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-            # If we read less than the buffer size, we're done
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        retval = buffer.decode('utf-8')[:message_bytes.value]
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        logging.error('Failed to decode JSON input')
-        return None
-    except Exception as e:
-        logging.error(f'Unexpected error in read_command: {str(e)}')
-        return None
-
-
-def write_response(response:Response) -> None:
-    ''' Writes a response to the communication pipe.
-
-    Args:
-        response: Function response
-    '''
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            message_len,
-            bytes_written,
-            None
-        )
-
-    except Exception as e:
-        logging.error(f'Failed to write response: {str(e)}')
-        pass
+    return plugin.run()
 
 
 def generate_failure_response(message:str=None) -> Response:
@@ -225,6 +82,7 @@ def generate_success_response(message:str=None) -> Response:
     return response
 
 
+@plugin.command('initialize')
 def execute_initialize_command() -> dict:
     ''' Command handler for `initialize` function
 
@@ -244,6 +102,7 @@ def execute_initialize_command() -> dict:
     return generate_success_response('initialize success.')
 
 
+@plugin.command('shutdown')
 def execute_shutdown_command() -> dict:
     ''' Command handler for `shutdown` function
 
@@ -266,6 +125,24 @@ def execute_shutdown_command() -> dict:
         return generate_failure_response('Failed to shutdown OpenRGB client.')
 
 
+def reconnect(handler):
+    ''' Reconnects to the OpenRGB server before running a command.
+
+    Args:
+        handler: Command handler taking params, context and system_info
+
+    Returns:
+        The wrapped handler
+    '''
+    @wraps(handler)
+    def wrapper(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
+        execute_initialize_command()
+        return handler(params, context, system_info)
+    return wrapper
+
+
+@plugin.command('list_devices')
+@reconnect
 def execute_list_devices(params:dict=None, context:dict=None, system_info:dict=None) -> dict:
     SUCCESS_MESSAGE = 'Here is a list of devices:\n'
     ERROR_MESSAGE = 'Failed to get devices information for OpenRGB.'
@@ -286,6 +163,8 @@ def execute_list_devices(params:dict=None, context:dict=None, system_info:dict=N
     except Exception as e:
         return generate_failure_response(f'{ERROR_MESSAGE} {e}')
 
+@plugin.command('set_color')
+@reconnect
 def execute_set_color(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
     SUCCESS_MESSAGE = 'Lighting for '
     ERROR_MESSAGE = 'Failed to set lighting to color for OpenRGB.'
@@ -343,6 +222,8 @@ def execute_set_color(params: dict = None, context: dict = None, system_info: di
     except Exception as e:
         return generate_failure_response(f'{ERROR_MESSAGE} {e}')
 
+@plugin.command('disable_lighting')
+@reconnect
 def execute_disable_lighting(params:dict=None, context:dict=None, system_info:dict=None) -> dict:
     SUCCESS_MESSAGE = 'SignalRGB lighting disabled.'
     ERROR_MESSAGE = 'Failed to disable lighting for SignalRGB.'
@@ -356,6 +237,8 @@ def execute_disable_lighting(params:dict=None, context:dict=None, system_info:di
     except Exception as e:
         return generate_failure_response(f'{ERROR_MESSAGE} {e}')
 
+@plugin.command('set_mode')
+@reconnect
 def execute_set_mode(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
     SUCCESS_MESSAGE = 'Mode set successfully.'
     ERROR_MESSAGE = 'Failed to set mode for OpenRGB.'
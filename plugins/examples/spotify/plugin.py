@@ -1,3 +1,4 @@
+import functools
 import json
 import os
 import requests
@@ -6,8 +7,9 @@ import webbrowser
 import logging
 import os
 from urllib.parse import urlencode, urlparse, parse_qs
-from ctypes import byref, windll, wintypes
+from typing import Callable
 from requests import Response
+from gassist_plugin import Plugin
 
 # Settings specific to the user's system. This is temporary until a
 # configuration file is added to the plugin.
@@ -22,10 +24,17 @@ AUTHORIZATION_URL = "https://accounts.spotify.com/authorize"
 AUTH_URL = "https://accounts.spotify.com/api/token"
 BASE_URL = "https://api.spotify.com/v1"
 
+CONFIG_FILE = os.path.join(os.environ.get("PROGRAMDATA", "."), "NVIDIA Corporation", "nvtopps", "rise", "plugins", "spotify", "config.json")
+AUTH_FILE = os.path.join(os.environ.get("PROGRAMDATA", "."), "NVIDIA Corporation", "nvtopps", "rise", "plugins", "spotify", "auth.json")
+INITIALIZE_COMMAND = 'initialize'
+SHUTDOWN_COMMAND = 'shutdown'
+
 AUTH_STATE = None
 ACCESS_TOKEN = None
 REFRESH_TOKEN = None
 
+plugin = Plugin('spotify', error_message='Spotify Error:')
+
 
 def get_spotify_auth_url():
     """
@@ -118,11 +127,61 @@ def complete_auth_user(callback_url):
         logging.error(f"Error in complete_auth_user: {str(e)}")
         return generate_failure_response({ 'message': f'Authorization failed: {str(e)}' })
 
-def main():
+def require_auth(handler: Callable[[dict], dict]) -> Callable[[dict], dict]:
+    """ Wraps a command handler so it only runs once the user is authorized.
+
+    Without tokens, a pending `auth_url` in the auth file is exchanged for
+    tokens and the command is run. Otherwise a new authorization is started
+    and the user is told how to complete it.
+
+    Args:
+        handler: Command handler taking the command parameters
+
+    Returns:
+        The wrapped handler
+    """
+    @functools.wraps(handler)
+    def wrapper(params: dict) -> dict:
+        if ACCESS_TOKEN is None or REFRESH_TOKEN is None:
+            # Check if we have an auth_url in the file
+            authorized = False
+            try:
+                with open(AUTH_FILE, 'r') as file:
+                    data = json.load(file)
+                    if 'auth_url' in data:
+                        logging.info('Found auth_url in file, processing...')
+                        auth_response = execute_auth_command({"callback_url": data['auth_url']})
+                        authorized = auth_response['success']
+            except Exception as e:
+                logging.error(f'Error checking auth file: {e}')
+
+            if not authorized:
+                logging.info('Starting new authorization process')
+                authorize_user()
+                return generate_success_response({
+                    "message": "Please follow these steps:\n"
+                              "1. A browser window has opened - log in to Spotify and authorize the app\n"
+                              "2. After authorizing, you'll be redirected to a URL\n"
+                              "3. Copy the ENTIRE URL from your browser\n"
+                              "4. Create or edit the file at this location:\n"
+                              f"   `{AUTH_FILE}`\n"
+                              "5. Add the URL to the file in this format:\n"
+                              "   ```\n"
+                              "   {\n"
+                              "     \"auth_url\": \"YOUR_COPIED_URL\"\n"
+                              "   }\n"
+                              "    \n"
+                              "6. Save the file and try your command again"
+                })
+            logging.info(f'Retrying original command after auth: {handler.__name__}')
+        return handler(params)
+    return wrapper
+
+def main() -> int:
     """ Main entry point for the Spotify G-Assist plugin.
     
-    Listens for commands on a pipe and processes them in a loop until shutdown.
-    Handles initialization, command processing, and cleanup.
+    Loads the configuration and saved tokens, registers the command handlers
+    and serves commands until shutdown.
     
     Returns:
         int: 0 for successful execution, 1 for failure
@@ -132,15 +191,6 @@ def main():
     global USERNAME
     global ACCESS_TOKEN
     global REFRESH_TOKEN
-    SUCCESS = 0
-    FAILURE = 1
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'params'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-    CONFIG_FILE = os.path.join(os.environ.get("PROGRAMDATA", "."), "NVIDIA Corporation", "nvtopps", "rise", "plugins", "spotify", "config.json")
-    AUTH_FILE = os.path.join(os.environ.get("PROGRAMDATA", "."), "NVIDIA Corporation", "nvtopps", "rise", "plugins", "spotify", "auth.json")
 
     try:
         # Read the IP from the configuration file
@@ -152,8 +202,12 @@ def main():
     except Exception as e:
         logging.error(f'Error reading configuration file: {e}')
 
-    # Generate command handler mapping
-    commands = generate_command_handlers()
+    # Register the command handlers; every command except initialize and
+    # shutdown needs an authorized user
+    for cmd, handler in generate_command_handlers().items():
+        if cmd not in (INITIALIZE_COMMAND, SHUTDOWN_COMMAND):
+            handler = require_auth(handler)
+        plugin.command(cmd)(handler)
 
     logging.info('Starting plugin.')
 
@@ -175,93 +229,8 @@ def main():
         ACCESS_TOKEN = None
         REFRESH_TOKEN = None
 
-    while True:
-        function = ''
-        response = None
-        input = read_command()
-        if input is None:
-            continue
-        logging.info(f'Command: "{input}"')
-
-        if TOOL_CALLS_PROPERTY in input:
-            tool_calls = input[TOOL_CALLS_PROPERTY]
-            logging.info(f'tool_calls: "{tool_calls}"')
-            
-            # Store the original command for retry after auth
-            original_command = None
-            
-            for tool_call in tool_calls:
-                if FUNCTION_PROPERTY in tool_call: 
-                    cmd = tool_call[FUNCTION_PROPERTY]
-                    logging.info(f'func: "{cmd}"')
-                    
-                    if cmd == INITIALIZE_COMMAND or cmd == SHUTDOWN_COMMAND:
-                        logging.info(f'cmd: "{cmd}"')
-                        response = commands[cmd]()
-                    else:
-                        # For all other commands, check if we need authorization
-                        if ACCESS_TOKEN is None or REFRESH_TOKEN is None:
-                            # Check if we have an auth_url in the file
-                            try:
-                                with open(AUTH_FILE, 'r') as file:
-                                    data = json.load(file)
-                                    if 'auth_url' in data:
-                                        logging.info('Found auth_url in file, processing...')
-                                        auth_response = execute_auth_command({"callback_url": data['auth_url']})
-                                        if auth_response['success']:
-                                            # Store the original command for retry
-                                            original_command = tool_call
-                                            # Break out of the loop to retry the command
-                                            break
-                            except Exception as e:
-                                logging.error(f'Error checking auth file: {e}')
-                            
-                            # If we get here, we need to start new authorization
-                            logging.info('Starting new authorization process')
-                            authorize_user()
-                            response = generate_success_response({
-                                "message": "Please follow these steps:\n"
-                                          "1. A browser window has opened - log in to Spotify and authorize the app\n"
-                                          "2. After authorizing, you'll be redirected to a URL\n"
-                                          "3. Copy the ENTIRE URL from your browser\n"
-                                          "4. Create or edit the file at this location:\n"
-                                          f"   `{AUTH_FILE}`\n"
-                                          "5. Add the URL to the file in this format:\n"
-                                          "   ```\n"
-                                          "   {\n"
-                                          "     \"auth_url\": \"YOUR_COPIED_URL\"\n"
-                                          "   }\n"
-                                          "    \n"
-                                          "6. Save the file and try your command again"
-                            })
-                            break
-                        
-                        # If we have valid tokens, execute the command
-                        try:
-                            logging.info(f'Executing command: {cmd} {tool_call}')
-                            response = commands[cmd](tool_call[PARAMS_PROPERTY] if PARAMS_PROPERTY in tool_call else {})
-                        except Exception as e:
-                            response = generate_failure_response({'message': f'Spotify Error: {e}'})
-                else:
-                    response = generate_failure_response({ 'message': f'Unknown command "{cmd}"' })
-            
-            # If we have an original command to retry (after successful auth)
-            if original_command is not None:
-                cmd = original_command[FUNCTION_PROPERTY]
-                logging.info(f'Retrying original command after auth: {cmd}')
-                try:
-                    response = commands[cmd](original_command[PARAMS_PROPERTY] if PARAMS_PROPERTY in original_command else {})
-                except Exception as e:
-                    response = generate_failure_response({'message': f'Spotify Error: {e}'})
-        else:
-            response = generate_failure_response({ 'message': 'Malformed input' })
-
-        logging.info(f'Response: {response}')
-        write_response(response)
-        if function == SHUTDOWN_COMMAND:
-            break
+    return plugin.run()
 
-    sys.exit(SUCCESS)
 
 def get_auth_state(auth_file: str) -> tuple[str | None, str | None]:
     """Gets the access and refresh tokens from the auth file.
@@ -396,82 +365,6 @@ def generate_command_handlers() -> dict:
     commands['spotify_get_user_playlists'] = execute_get_user_playlists_command
     return commands
 
-def read_command() -> dict | None:
-    ''' Reads a command from the communication pipe.
-
-    Returns:
-        Command details if the input was proper JSON; `None` otherwise
-    '''
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-
-        # Read in chunks until we get the full message
-        chunks = []
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-            
-            # Add the chunk we read
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-             # If we read less than the buffer size, we're done
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        # Combine all chunks and parse JSON
-        retval = ''.join(chunks)
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        logging.error(f'Received invalid JSON: {retval}')
-        return None
-    except Exception as e:
-        logging.error(f'Exception in read_command(): {str(e)}')
-        return None
-    
-def write_response(response:Response) -> None:
-    ''' Writes a response to the communication pipe.
-
-    Parameters:
-        response: Response
-    '''
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        success = windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            message_len,
-            bytes_written,
-            None
-        )
-
-        if not success:
-            logging.error('Error writing to response pipe')
-
-    except Exception as e:
-        logging.error(f'Exception in write_response(): {str(e)}')
-
 def generate_failure_response(body:dict=None) -> dict:
     ''' Generates a response indicating failure.
 
@@ -1143,4 +1036,4 @@ def save_auth_state(access_token: str, refresh_token: str) -> None:
         raise
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
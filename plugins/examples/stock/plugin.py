@@ -1,23 +1,14 @@
 import json
 import logging
 import os
-from ctypes import byref, windll, wintypes
 from typing import Optional, Dict, Any
 import requests
 
+from gassist_plugin import Plugin
+
 # Type definitions
 Response = Dict[bool, Optional[str]]
 
-# Constants
-TOOL_CALLS_PROPERTY = 'tool_calls'
-CONTEXT_PROPERTY = 'messages'
-SYSTEM_INFO_PROPERTY = 'system_info'
-FUNCTION_PROPERTY = 'func'
-PARAMS_PROPERTY = 'params'
-INITIALIZE_COMMAND = 'initialize'
-SHUTDOWN_COMMAND = 'shutdown'
-ERROR_MESSAGE = 'Plugin Error!'
-
 # Configure logging
 LOG_FILE = os.path.join(os.path.expanduser("~"), 'stock_plugin.log')
 logging.basicConfig(
@@ -32,6 +23,9 @@ with open("config.json", "r") as config_file:
     config = json.load(config_file)
 API_KEY = config.get("TWELVE_DATA_API_KEY")
 
+plugin = Plugin('stock')
+
+@plugin.command('initialize')
 def execute_initialize_command() -> Response:
     """Initialize the plugin.
     
@@ -41,6 +35,7 @@ def execute_initialize_command() -> Response:
     logger.info("Initializing plugin...")
     return generate_success_response("initialize success.")
 
+@plugin.command('shutdown')
 def execute_shutdown_command() -> Response:
     """Shutdown the plugin.
     
@@ -50,6 +45,7 @@ def execute_shutdown_command() -> Response:
     logger.info("Shutting down plugin...")
     return generate_success_response("shutdown success.")
 
+@plugin.command('get_ticker_from_company')
 def execute_get_ticker_from_company_command(params: Dict[str, Any] = None, *_) -> Response:
     """Get stock ticker symbol from company name.
     
@@ -78,6 +74,7 @@ def execute_get_ticker_from_company_command(params: Dict[str, Any] = None, *_) -
         logger.error(f"Error in get_ticker_from_company: {str(e)}")
         return generate_failure_response("Failed to get ticker from company name.")
 
+@plugin.command('get_stock_price')
 def execute_get_stock_price_command(params: Dict[str, Any] = None, *_) -> Response:
     """Get current stock price for a given ticker or company name.
     
@@ -142,118 +139,17 @@ def generate_success_response(message: str = None) -> Response:
     """
     return {'success': True, 'message': message or "Command succeeded."}
 
-def read_command() -> Dict[str, Any] | None:
-    """Read command from stdin pipe.
-    
-    Reads JSON-formatted command from Windows pipe.
-    
-    Returns:
-        Dict[str, Any] | None: Parsed command dictionary or None if error.
-    """
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-        chunks = []
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(pipe, buffer, BUFFER_SIZE, byref(message_bytes), None)
-            if not success:
-                return None
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-            if message_bytes.value < BUFFER_SIZE:
-                break
-        retval = ''.join(chunks)
-        return json.loads(retval)
-    except:
-        return None
-
-def write_response(response: Response) -> None:
-    """Write response to stdout pipe.
-    
-    Writes JSON-formatted response to Windows pipe with <<END>> marker.
-    The marker is used by the reader to determine the end of the response.
-    
-    Args:
-        response (Response): Response dictionary to write.
-    
-    Response Format:
-        JSON-encoded dictionary followed by <<END>> marker.
-        Example: {"success":true,"message":"Plugin initialized successfully"}<<END>>
-    """
-    try:
-        pipe = windll.kernel32.GetStdHandle(-11)
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            len(message_bytes),
-            bytes_written,
-            None
-        )
-    except Exception as e:
-        logging.error(f'Error writing response: {e}')
-
 def main() -> int:
     """Main plugin entry point.
     
-    Processes commands from stdin and writes responses to stdout.
-    Commands are processed in a loop until shutdown command is received.
+    Serves commands from the pipe through the shared plugin runtime until the
+    shutdown command is received.
     
     Returns:
         int: Exit code (0 for success).
     """
     logger.info("Starting plugin...")
-    
-    commands = {
-        'initialize': execute_initialize_command,
-        'shutdown': execute_shutdown_command,
-        'get_stock_price': execute_get_stock_price_command,
-        'get_ticker_from_company': execute_get_ticker_from_company_command
-    }
-
-    cmd = ''
-    logger.info('Plugin started')
-    while cmd != SHUTDOWN_COMMAND:
-        response = None
-        input = read_command()
-        if input is None:
-            logger.error('Error reading command')
-            continue
-
-        logger.info(f'Received input: {input}')
-        if TOOL_CALLS_PROPERTY in input:
-            for tool_call in input[TOOL_CALLS_PROPERTY]:
-                if FUNCTION_PROPERTY in tool_call:
-                    cmd = tool_call[FUNCTION_PROPERTY]
-                    logger.info(f'Processing command: {cmd}')
-                    if cmd in commands:
-                        if cmd in ['initialize', 'shutdown']:
-                            response = commands[cmd]()
-                        else:
-                            params = tool_call.get(PARAMS_PROPERTY, {})
-                            context = input.get(CONTEXT_PROPERTY)
-                            system_info = input.get(SYSTEM_INFO_PROPERTY)
-                            response = commands[cmd](params, context, system_info)
-                    else:
-                        logger.error(f'Unknown command: {cmd}')
-                        response = generate_failure_response(f'{ERROR_MESSAGE} Unknown command: {cmd}')
-                else:
-                    logger.error(f'Malformed input: {tool_call}')
-                    response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-        else:
-            logger.error(f'Malformed input: {input}')
-            response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-
-        write_response(response)
-        if cmd == SHUTDOWN_COMMAND:
-            break
-    return 0
+    return plugin.run()
 
 if __name__ == "__main__":
     main()
@@ -2,8 +2,8 @@
 
 This plugin provides functionality to interact with the Twitch API,
 specifically for checking stream status of Twitch users. It implements
-a Windows pipe-based communication protocol for receiving commands and
-sending responses.
+the G-Assist pipe protocol for receiving commands and sending responses
+through the shared plugin runtime.
 
 Configuration:
     Required configuration in config.json:
@@ -22,7 +22,7 @@ Commands Supported:
 
 Dependencies:
     - requests: For making HTTP requests to Twitch API
-    - ctypes: For Windows pipe communication
+    - gassist_plugin: Shared plugin runtime for pipe communication
 """
 
 import json
@@ -31,22 +31,14 @@ import os
 import sys
 from typing import Optional, Dict, Any
 import requests
-from ctypes import byref, windll, wintypes
+
+from gassist_plugin import Plugin
 
 # Type definitions
 Response = Dict[str, Any]
 """Type alias for response dictionary containing 'success' and optional 'message'."""
 
 # Constants
-STD_INPUT_HANDLE = -10
-"""Windows standard input handle constant."""
-
-STD_OUTPUT_HANDLE = -11
-"""Windows standard output handle constant."""
-
-BUFFER_SIZE = 4096
-"""Size of buffer for reading from pipe in bytes."""
-
 CONFIG_FILE = os.path.join(
     os.environ.get("PROGRAMDATA", "."),
     r'NVIDIA Corporation\nvtopps\rise\plugins\twitch',
@@ -71,6 +63,9 @@ oauth_token: Optional[str] = None
 config: Dict[str, str] = {}
 """Loaded configuration containing Twitch API credentials."""
 
+plugin = Plugin('twitch')
+"""Plugin runtime serving the commands below."""
+
 def setup_logging() -> None:
     """Configure logging with appropriate format and level.
     
@@ -168,6 +163,7 @@ def generate_response(success: bool, message: Optional[str] = None) -> Response:
         response['message'] = message
     return response
 
+@plugin.command('check_twitch_live_status')
 def check_twitch_live_status(params: Dict[str, str]) -> Response:
     """Check if a Twitch user is currently live.
     
@@ -234,95 +230,7 @@ def check_twitch_live_status(params: Dict[str, str]) -> Response:
         logging.error(f"Error checking Twitch live status: {e}")
         return generate_response(False, "Failed to check Twitch live status")
 
-def read_command() -> Optional[Dict[str, Any]]:
-    """Read command from stdin pipe.
-    
-    Reads data from Windows pipe in chunks until complete message is received.
-    Expects JSON-formatted input.
-    
-    Returns:
-        Optional[Dict[str, Any]]: Parsed command dictionary if successful,
-                                 None if reading or parsing fails.
-    
-    Expected Command Format:
-        {
-            "tool_calls": [
-                {
-                    "func": "command_name",
-                    "params": {
-                        "param1": "value1",
-                        ...
-                    }
-                }
-            ]
-        }
-    """
-    try:
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-        chunks = []
-        
-        while True:
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        retval = ''.join(chunks)
-        logging.info(f'Raw Input: {retval}')
-        return json.loads(retval)
-        
-    except json.JSONDecodeError:
-        logging.error(f'Received invalid JSON: {retval}')
-        logging.exception("JSON decoding failed:")
-        return None
-    except Exception as e:
-        logging.error(f'Exception in read_command(): {e}')
-        return None
-
-def write_response(response: Response) -> None:
-    """Write response to stdout pipe.
-    
-    Writes JSON-formatted response to Windows pipe with <<END>> marker.
-    The marker is used by the reader to determine the end of the response.
-    
-    Args:
-        response (Response): Response dictionary to write.
-    
-    Response Format:
-        JSON-encoded dictionary followed by <<END>> marker.
-        Example: {"success":true,"message":"Plugin initialized successfully"}<<END>>
-    """
-    try:
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            len(message_bytes),
-            bytes_written,
-            None
-        )
-    except Exception as e:
-        logging.error(f'Error writing response: {e}')
-
+@plugin.command('initialize')
 def initialize() -> Response:
     """Initialize the plugin.
     
@@ -334,6 +242,7 @@ def initialize() -> Response:
     logging.info("Initializing plugin")
     return generate_response(True, "Plugin initialized successfully")
 
+@plugin.command('shutdown')
 def shutdown() -> Response:
     """Shutdown the plugin.
     
@@ -345,11 +254,11 @@ def shutdown() -> Response:
     logging.info("Shutting down plugin")
     return generate_response(True, "Plugin shutdown successfully")
 
-def main() -> None:
+def main() -> int:
     """Main plugin loop.
     
-    Sets up logging and enters main command processing loop.
-    Handles incoming commands and routes them to appropriate handlers.
+    Sets up logging and serves commands through the shared plugin runtime,
+    which routes them to the handlers registered with @plugin.command.
     Continues running until shutdown command is received.
     
     Command Processing Flow:
@@ -361,35 +270,12 @@ def main() -> None:
     
     Error Handling:
         - Invalid commands return error response
-        - Failed command reads are logged and loop continues
+        - Malformed input is logged and answered with an error response
         - Shutdown command exits loop gracefully
     """
     setup_logging()
     logging.info("Twitch Plugin Started")
-    
-    while True:
-        command = read_command()
-        if command is None:
-            logging.error('Error reading command')
-            continue
-        
-        tool_calls = command.get("tool_calls", [])
-        for tool_call in tool_calls:
-            func = tool_call.get("func")
-            params = tool_call.get("params", {})
-            
-            if func == "initialize":
-                response = initialize()
-            elif func == "check_twitch_live_status":
-                response = check_twitch_live_status(params)
-            elif func == "shutdown":
-                response = shutdown()
-                write_response(response)
-                return
-            else:
-                response = generate_response(False, "Unknown function call")
-            
-            write_response(response)
+    return plugin.run()
 
 if __name__ == "__main__":
     config = load_config()
@@ -12,7 +12,7 @@ The plugin is a service that:
 
 Dependencies:
     - requests: For making HTTP requests to wttr.in
-    - ctypes: For Windows API interaction
+    - gassist_plugin: Shared plugin runtime handling the pipe and command dispatch
     - logging: For operation logging
     - json: For message serialization/deserialization
 
@@ -39,15 +39,11 @@ Example Response Format:
 """
 
 import json
-import sys
 import requests
 import logging
 import os
-from ctypes import byref, windll, wintypes
-from typing import Optional, Dict, Any
 
-# Type definitions
-Response = Dict[bool, Optional[str]]
+from gassist_plugin import Plugin
 
 
 # Configure logging with a more detailed format
@@ -58,6 +54,19 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s"
 )
 
+plugin = Plugin('weather')
+
+@plugin.command('initialize')
+def execute_initialize_command() -> dict:
+    """Initializes the plugin."""
+    return {"success": True, "message": "Plugin initialized"}
+
+@plugin.command('shutdown')
+def execute_shutdown_command() -> dict:
+    """Shuts down the plugin."""
+    return {"success": True, "message": "Plugin shutdown"}
+
+@plugin.command('get_weather_info')
 def get_weather_info(params: dict = None) -> dict:
     """
     Retrieves weather information for a specified city using the wttr.in service.
@@ -130,7 +139,8 @@ def main():
     """
     Main entry point for the weather plugin.
     
-    Sets up command handling and maintains the main event loop for processing commands.
+    Serves commands through the shared plugin runtime, which runs the event loop
+    for processing commands.
     The plugin supports the following commands:
         - initialize: Initializes the plugin
         - shutdown: Terminates the plugin
@@ -145,125 +155,11 @@ def main():
         4. Writes the response to standard output
         
     Error Handling:
-        - Invalid commands are logged and ignored
+        - Invalid input is logged and answered with a failure response
         - Communication errors are logged
         - All errors are caught and handled gracefully
     """
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-    GET_WEATHER_INFO_COMMAND = 'get_weather_info'
-
-    commands = {
-        'initialize': lambda _: {"success": True, "message": "Plugin initialized"},
-        'shutdown': lambda _: {"success": True, "message": "Plugin shutdown"},
-        'get_weather_info': get_weather_info,
-    }
-    
-    while True:
-        command = read_command()
-        if command is None:
-            logging.error('Error reading command')
-            continue
-        
-        tool_calls = command.get("tool_calls", [])
-        for tool_call in tool_calls:
-            logging.info(f"Tool call: {tool_call}")
-            func = tool_call.get("func")
-            logging.info(f"Function: {func}")
-            params = tool_call.get("params", {})
-            logging.info(f"Params: {params}")
-            
-            if func == INITIALIZE_COMMAND:
-                response = commands.get(INITIALIZE_COMMAND, lambda _: {"success": False, "message": "Unknown command"})()
-            elif func == GET_WEATHER_INFO_COMMAND:
-                logging.info(f"Getting weather info for {params}")
-                response = get_weather_info(params)
-                logging.info(f"Weather info: {response}")
-            elif func == SHUTDOWN_COMMAND:
-                response = commands.get(SHUTDOWN_COMMAND, lambda _: {"success": False, "message": "Unknown command"})()
-                write_response(response)
-                return
-            else:
-                response = {'success': False, 'message': "Unknown function call"}
-            
-            write_response(response)
-    
-def read_command() -> dict | None:
-    ''' Reads a command from the communication pipe.
-
-    Returns:
-        Command details if the input was proper JSON; `None` otherwise
-    '''
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-
-        # Read in chunks until we get the full message
-        chunks = []
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-            
-            # Add the chunk we read
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-             # If we read less than the buffer size, we're done
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        # Combine all chunks and parse JSON
-        retval = ''.join(chunks)
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        logging.error(f'Received invalid JSON: {retval}')
-        return None
-    except Exception as e:
-        logging.error(f'Exception in read_command(): {str(e)}')
-        return None
-
-
-def write_response(response:Response) -> None:
-    ''' Writes a response to the communication pipe.
-
-    Parameters:
-        response: Response
-    '''
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        success = windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            message_len,
-            bytes_written,
-            None
-        )
-
-        if not success:
-            logging.error('Error writing to response pipe')
-
-    except Exception as e:
-        logging.error(f'Exception in write_response(): {str(e)}')
+    return plugin.run()
 
 
 if __name__ == '__main__':
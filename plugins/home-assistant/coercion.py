@@ -0,0 +1,142 @@
+import ast
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+# Converts a tool call argument to the type Home Assistant expects, raising ValueError if it cannot
+Coercer = Callable[[Any], Any]
+
+# {function: {property: coercer}}
+CoercionTable = Dict[str, Dict[str, Coercer]]
+
+
+def compile_manifest(manifest: dict) -> CoercionTable:
+    """
+    Build a coercer for every property of every function in the manifest.
+
+    Done once when the manifest is loaded, so a tool call looks up each of its
+    arguments' coercers instead of searching the manifest for them.
+    """
+    table = {}
+    for function in manifest.get("functions", []):
+        name = function.get("name")
+        if name:
+            table[name] = {
+                prop_name: compile_property(prop_name, prop)
+                for prop_name, prop in function.get("properties", {}).items()
+            }
+    return table
+
+
+def compile_property(name: str, prop: dict) -> Coercer:
+    """Build the coercer for one manifest property from its type and enum."""
+    prop_type = prop.get("type")
+    if prop_type == "array":
+        items = prop.get("items", {})
+        check_item = _enum_check(name, items.get("enum"))
+        if check_item is None:
+            return _to_list
+        return lambda value: _check_items(_to_list(value), check_item)
+
+    convert = _CONVERTERS.get(prop_type)
+    check = _enum_check(name, prop.get("enum"))
+    if convert is None and check is None:
+        return _unchanged
+    if check is None:
+        return lambda value: convert(name, value)
+    if convert is None:
+        return check
+    return lambda value: check(convert(name, value))
+
+
+def coerce_params(table: CoercionTable, func: str, params: dict) -> dict:
+    """Convert a tool call's arguments; arguments missing from the manifest are passed unchanged."""
+    coercers = table.get(func)
+    if not coercers:
+        return dict(params)
+    return {
+        key: coercers[key](value) if key in coercers else value
+        for key, value in params.items()
+    }
+
+
+def _unchanged(value: Any) -> Any:
+    return value
+
+
+def _to_int(name: str, value: Any) -> Any:
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        pass
+    # the model sometimes sends whole numbers as "50.0"
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+    if not number.is_integer():
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    return int(number)
+
+
+def _to_float(name: str, value: Any) -> Any:
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"{name} must be a number, got {value!r}") from None
+
+
+_CONVERTERS = {
+    "integer": _to_int,
+    "number": _to_float,
+}
+
+
+def _to_list(value: Any) -> Any:
+    # arrays usually arrive as strings like '["light", "fan"]'; anything that
+    # does not parse to a list is passed on for Home Assistant to interpret
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if not isinstance(value, str):
+        return value
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        try:
+            parsed = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+    if isinstance(parsed, (list, tuple)):
+        return list(parsed)
+    return value
+
+
+def _check_items(value: Any, check_item: Coercer) -> Any:
+    if isinstance(value, list):
+        return [check_item(item) for item in value]
+    return check_item(value)
+
+
+def _enum_check(name: str, enum: Optional[List[Any]]) -> Optional[Coercer]:
+    """Build a check that a value is one of `enum`, matching strings case-insensitively."""
+    if not enum:
+        return None
+    allowed = {_enum_key(option): option for option in enum}
+
+    def check(value: Any) -> Any:
+        try:
+            return allowed[_enum_key(value)]
+        except (KeyError, TypeError):
+            raise ValueError(f"{name} must be one of {list(enum)}, got {value!r}") from None
+    return check
+
+
+def _enum_key(value: Any) -> Any:
+    return value.casefold() if isinstance(value, str) else value
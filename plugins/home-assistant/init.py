@@ -1,12 +1,35 @@
 import json
 import logging
 import asyncio
+import hashlib
+import os
 from collections import defaultdict
+from typing import Optional, Tuple
 
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
 
 from manifest_consts import DEFAULT_TAGS, ALLOWED_TOOLS
+from session import McpSession
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_TEMPLATE_FILE = "manifest_template.json"
+
+# used when manifest_template.json is missing
+DEFAULT_MANIFEST = {
+    "manifestVersion": 1,
+    "executable": "./home-assistant-plugin.exe",
+    "persistent": True,
+    "passthrough": False,
+    "description": "Home Assistant plugin for controlling and monitoring smart home devices.",
+    "functions": []
+}
+
+REFRESH_MANIFEST_FUNCTION = {
+    "name": "refresh_manifest",
+    "description": "Retrieve new state from Home Assistant and use it to create a new manifest.json. Call this function only if the user requests it.",
+    "properties": {}
+}
 
 # converts mcp property object to manifest json, applying overrides
 def format_property(name, prop, overrides=None):
@@ -33,10 +56,17 @@ def format_property(name, prop, overrides=None):
             desc += f" (minimum: {prop['minimum']})"
         if "maximum" in prop:
             desc += f" (maximum: {prop['maximum']})"
-    return {
+    formatted = {
         "type": prop_type,
         "description": desc
     }
+    # keep allowed values so the plugin can validate arguments before calling Home Assistant
+    if "type" not in overrides:
+        if prop.get("enum"):
+            formatted["enum"] = prop["enum"]
+        if prop_type == "array" and prop["items"].get("enum"):
+            formatted["items"] = {"enum": prop["items"]["enum"]}
+    return formatted
 
 
 def transform_device_list_string(device_list_string: str) -> str:
@@ -83,7 +113,109 @@ def format_tool(tool, allowed_properties):
     }
     return ret
 
-async def populate_manifest(url: str, bearer_token: str):
+def load_template(path: str = MANIFEST_TEMPLATE_FILE) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return json.loads(json.dumps(DEFAULT_MANIFEST))
+
+def read_manifest(path: str = MANIFEST_FILE) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_manifest(manifest: dict, path: str = MANIFEST_FILE):
+    # write a temporary file and swap it in, so a reader never sees half a manifest
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+
+# fetches the allowed tools and the device list, the only inputs to the manifest besides the template
+async def fetch_sources(session):
+    tools = await session.list_tools()
+    allowed_tools = [tool for tool in tools.tools if tool.name in ALLOWED_TOOLS]
+    # only McpSession retries read-only calls; a ClientSession takes no such argument
+    options = {"read_only": True} if isinstance(session, McpSession) else {}
+    live_context = await session.call_tool("GetLiveContext", **options)
+    result = json.loads(live_context.content[0].text)["result"]
+    return allowed_tools, transform_device_list_string(result)
+
+# hashes the manifest inputs; device states are not part of the device list, so they do not change it
+def source_digest(tools, device_list: str, template: dict) -> str:
+    sources = {
+        "tools": [[tool.name, tool.description, tool.inputSchema] for tool in tools],
+        "allowed": ALLOWED_TOOLS,
+        "devices": device_list,
+        "template": template,
+    }
+    return hashlib.sha256(json.dumps(sources, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def build_manifest(tools, device_list: str, template: dict) -> dict:
+    formatted_tools = []
+    for tool in tools:
+        try:
+            formatted_tools.append(format_tool(tool, ALLOWED_TOOLS[tool.name]))
+        except Exception as e:
+            print(f"Warning: Failed to format tool {tool.name}: {e}")
+    formatted_tools.append(REFRESH_MANIFEST_FUNCTION)
+
+    manifest = dict(template)
+    manifest["functions"] = formatted_tools
+    manifest["description"] = "Control and monitor smart home devices." + device_list
+    return manifest
+
+
+class ManifestRefresher:
+    """
+    Rebuilds manifest.json from Home Assistant, doing as little as possible.
+
+    Each refresh fetches the tool list and the device list and hashes them.
+    If the hash matches the previous refresh, nothing is formatted or written.
+    Otherwise the manifest is rebuilt, and written only if it differs from
+    the current one.
+    """
+
+    def __init__(self, path: str = MANIFEST_FILE, template_path: str = MANIFEST_TEMPLATE_FILE):
+        self.path = path
+        self.template_path = template_path
+        self.digest: Optional[str] = None
+        self.manifest: Optional[dict] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def refresh(self, session, current: Optional[dict] = None) -> Tuple[dict, bool]:
+        """
+        Refresh the manifest over an MCP session.
+
+        `session` may be a ClientSession or anything with the same list_tools
+        and call_tool methods. `current` is the manifest in use, which
+        defaults to the one on disk. Returns the manifest and whether it
+        changed.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            tools, device_list = await fetch_sources(session)
+            template = load_template(self.template_path)
+            digest = source_digest(tools, device_list, template)
+            if digest == self.digest:
+                return self.manifest, False
+
+            manifest = build_manifest(tools, device_list, template)
+            if current is None:
+                current = read_manifest(self.path)
+            changed = manifest != current
+            if changed:
+                write_manifest(manifest, self.path)
+            self.digest = digest
+            self.manifest = manifest
+            return manifest, changed
+
+
+async def populate_manifest(url: str, bearer_token: str) -> bool:
     # Connect to a streamable HTTP server
     async with streamablehttp_client(
         url,
@@ -95,36 +227,8 @@ async def populate_manifest(url: str, bearer_token: str):
     ):
         async with ClientSession(read_stream, write_stream) as session:
             await session.initialize()
-            tools = await session.list_tools()
-            formatted_tools = []
-            for tool in tools.tools:
-                if tool.name not in ALLOWED_TOOLS:
-                    continue
-                allowed_properties = ALLOWED_TOOLS[tool.name]
-
-                try:
-                    formatted_tool = format_tool(tool, allowed_properties)
-                    formatted_tools.append(formatted_tool)
-                except Exception as e:
-                    print(f"Warning: Failed to format tool {tool.name}: {e}")
-            
-            formatted_tools.append({"name": "refresh_manifest", "description": "Retrieve new state from Home Assistant and use it to create a new manifest.json. Call this function only if the user requests it.", "properties": {}})
-
-            try:
-                with open("manifest_template.json") as f:
-                    manifest = json.load(f)
-            except:
-                manifest = json.loads("{'manifestVersion': 1, 'executable': './home-assistant-plugin.exe', 'persistent': True, 'passthrough': False, 'description': 'Home Assistant plugin for controlling and monitoring smart home devices.', 'functions': []}")
-            manifest["functions"] = formatted_tools
-
-            manifest["description"] = "Control and monitor smart home devices."
-            live_context = await session.call_tool("GetLiveContext")
-            result = json.loads(live_context.content[0].text)["result"]
-            manifest["description"] += transform_device_list_string(result)
-
-            # write to manifest.json
-            with open("manifest.json", "w") as f:
-                json.dump(manifest, f, indent=2)
+            _, changed = await ManifestRefresher().refresh(session)
+            return changed
 
 if __name__ == "__main__":
     print("running manifest initialization...")
@@ -135,8 +239,8 @@ if __name__ == "__main__":
     if not config.get("homeassistant_mcp_url", None):
         print("homeassistant_mcp_url is missing from config.")
     try:
-        asyncio.run(populate_manifest(config["homeassistant_mcp_url"], config["homeassistant_access_token"]))
+        changed = asyncio.run(populate_manifest(config["homeassistant_mcp_url"], config["homeassistant_access_token"]))
     except Exception as e:
         print(f"Error initializing plugin: {e}")
         raise
-    print("initialized.")
\ No newline at end of file
+    print("initialized." if changed else "initialized (manifest.json already up to date).")
\ No newline at end of file
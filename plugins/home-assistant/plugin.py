@@ -16,26 +16,42 @@ Example Response Format:
     }
 """
 
+import asyncio
 import json
-import requests
 import logging
 import os
-from ctypes import byref, windll, wintypes
-from typing import Optional, Dict, Any
-import asyncio
-import ast
+from typing import Optional, Dict, Set
 
-from mcp import ClientSession
-from mcp.client.streamable_http import streamablehttp_client
+from gassist_plugin import Plugin
 
-from init import populate_manifest
+from coercion import CoercionTable, coerce_params, compile_manifest
+from init import MANIFEST_FILE, ManifestRefresher
+from session import DEFAULT_KEEPALIVE, McpSession
+from state_cache import DEFAULT_MAX_AGE, LIVE_CONTEXT_TOOL, DeviceStateCache, websocket_url
 
 
 config = {}
 manifest = {}
+coercers: CoercionTable = {}
+session: Optional[McpSession] = None
+refresher = ManifestRefresher()
+state_cache: Optional[DeviceStateCache] = None
+# Home Assistant tools with a registered handler, so a reload can drop the ones that went away
+registered_tools: Set[str] = set()
 
 Response = Dict[bool, Optional[str]]
 
+# Commands answered by the plugin itself rather than forwarded to Home Assistant
+PLUGIN_COMMANDS = ("initialize", "shutdown", "refresh_manifest")
+
+# Home Assistant tools that only read, so calling them leaves the cached device states valid
+READ_ONLY_TOOLS = (LIVE_CONTEXT_TOOL, "GetDateTime", "todo_get_items")
+
+# Most tool calls of one command sent to Home Assistant at the same time
+MAX_CONCURRENT_CALLS = 4
+
+plugin = Plugin("home-assistant", concurrency=MAX_CONCURRENT_CALLS)
+
 
 # Configure logging with a more detailed format
 LOG_FILE = os.path.join(os.environ.get('USERPROFILE', '.'), 'home-assistant-plugin.log')
@@ -45,200 +61,139 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s"
 )
 
-def eval_param(func, property, param):
+def load_manifest():
+    with open(MANIFEST_FILE) as f:
+        apply_manifest(json.load(f))
+
+def apply_manifest(new_manifest: dict):
+    # compile the argument coercers once per manifest rather than once per call
     global manifest
-    for function in manifest.get("functions", []):
-        if function.get("name") == func:
-            if property in function.get("properties", {}):
-                desired_type = function["properties"][property]["type"]
-                if desired_type == "array":
-                    try:
-                        evaled = ast.literal_eval(param)
-                        if isinstance(evaled, (list, tuple)):
-                            return list(evaled)
-                    except (ValueError, SyntaxError):
-                        return param
-                elif desired_type == "integer":
-                    try:
-                        return int(param)
-                    except (ValueError, TypeError):
-                        return param
-                elif desired_type == "number":
-                    try:
-                        return float(param)
-                    except (ValueError, TypeError):
-                        return param
-                else:
-                    return param
-    return param
+    global coercers
+    manifest = new_manifest
+    coercers = compile_manifest(manifest)
+    register_tools()
 
 def initialize():
     logging.info("initializing...")
     global config
-    global manifest
+    global session
+    global state_cache
     with open("config.json") as f:
         config = json.load(f)
-    # try:
-    #     asyncio.run(populate_manifest(config["homeassistant_mcp_url"], config["homeassistant_access_token"]))
-    # except Exception as e:
-    #     logging.error(f"Error initializing plugin: {e}")
-    #     return {"success": False, "message": str(e)}
-    with open("manifest.json") as f:
-        manifest = json.load(f)
+    load_manifest()
+    session = McpSession(
+        config["homeassistant_mcp_url"],
+        config["homeassistant_access_token"],
+        keepalive=config.get("keepalive_seconds", DEFAULT_KEEPALIVE),
+    )
+    # a state_cache_seconds of 0 turns the cache off
+    max_age = config.get("state_cache_seconds", DEFAULT_MAX_AGE)
+    state_cache = DeviceStateCache(session, max_age) if max_age > 0 else None
     logging.info("initialized.")
 
-async def call_tool_async(func: str, params: dict) -> dict:
-    async with streamablehttp_client(
-        config["homeassistant_mcp_url"],
-        headers={"Authorization": f"Bearer {config["homeassistant_access_token"]}"}
-    ) as (
-        read_stream,
-        write_stream,
-        _,
-    ):
-        async with ClientSession(read_stream, write_stream) as session:
-            await session.initialize()
-            response = await session.call_tool(func, {key: eval_param(func, key, value) for key, value in params.items()})
-            logging.info(f"Tool call response for {func}: {response}")
-            return response.content[0].text
-
-def call_tool(func: str, params: dict) -> dict:
+def register_tools():
+    # every manifest function except the plugin's own is a Home Assistant tool
+    global registered_tools
+    tools = {
+        function.get("name") for function in manifest.get("functions", [])
+        if function.get("name") and function.get("name") not in PLUGIN_COMMANDS
+    }
+    for name in registered_tools - tools:
+        plugin.remove_command(name)
+    for name in tools - registered_tools:
+        plugin.command(name)(tool_handler(name))
+    registered_tools = tools
+
+def tool_handler(func: str):
+    async def handler(params: dict) -> Response:
+        return await call_tool(func, params)
+    return handler
+
+async def call_tool(func: str, params: dict) -> Response:
     logging.info(f"Calling tool: {func} with params: {params}")
     try:
-        result = asyncio.run(call_tool_async(func, params))
-        return {"success": True, "message": str(result)}
+        if func == LIVE_CONTEXT_TOOL and state_cache is not None:
+            return {"success": True, "message": await state_cache.live_context()}
+        response = await session.call_tool(
+            func, coerce_params(coercers, func, params), read_only=func in READ_ONLY_TOOLS
+        )
+        if func not in READ_ONLY_TOOLS and state_cache is not None:
+            state_cache.invalidate()
+        logging.info(f"Tool call response for {func}: {response}")
+        return {"success": True, "message": str(response.content[0].text)}
     except Exception as e:
         logging.error(f"Error calling tool: {e}")
         return {"success": False, "message": str(e)}
-    
-def refresh_manifest(*args, **kwargs):
+
+async def update_manifest() -> bool:
+    # rebuilds the manifest over the shared session and switches to it if it changed
+    new_manifest, changed = await refresher.refresh(session, manifest)
+    if changed:
+        apply_manifest(new_manifest)
+        logging.info("Manifest changed; reloaded.")
+    return changed
+
+@plugin.command("refresh_manifest")
+async def refresh_manifest():
     try:
-        asyncio.run(populate_manifest(config["homeassistant_mcp_url"], config["homeassistant_access_token"]))
-        return {"success": True, "message": "Manifest refreshed successfully. Instruct the user to restart G-Assist to apply changes."}
+        if await update_manifest():
+            return {"success": True, "message": "Manifest refreshed successfully. The plugin is already using it; instruct the user to restart G-Assist so it sees new devices and functions."}
+        return {"success": True, "message": "Manifest is already up to date."}
     except Exception as e:
-        logging.error(f"Error initializing plugin: {e}")
+        logging.error(f"Error refreshing manifest: {e}")
         return {"success": False, "message": str(e)}
 
+@plugin.background
+async def refresh_manifest_periodically():
+    # off unless config.json sets manifest_refresh_seconds
+    interval = config.get("manifest_refresh_seconds", 0)
+    if not interval or interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await update_manifest()
+        except Exception as e:
+            logging.warning(f"Scheduled manifest refresh failed: {e}")
+
+@plugin.background
+async def keep_session_alive():
+    # connects at startup and holds the MCP session open between commands
+    await session.keep_alive()
+
+@plugin.background
+async def follow_state_changes():
+    # keeps the device state cache current from Home Assistant's change events
+    if state_cache is not None:
+        url = config.get("homeassistant_websocket_url") or websocket_url(config["homeassistant_mcp_url"])
+        await state_cache.follow(url, config["homeassistant_access_token"])
+
 def main():
     """
     Main entry point for the plugin.
     
-    Sets up command handling and maintains the main event loop for processing commands.
+    Registers a command for each Home Assistant tool in the manifest and serves
+    commands until shutdown. Tool calls share one MCP session, kept open on the
+    runtime's event loop for the life of the plugin. The tool calls of one
+    command (e.g. one per room) run concurrently, up to MAX_CONCURRENT_CALLS
+    at once, before the runtime writes the response. GetLiveContext is
+    answered from an in-memory device state cache while it is current.
     The plugin supports the following commands:
         - initialize: Initializes the plugin
         - shutdown: Terminates the plugin
+        - refresh_manifest: Rebuilds manifest.json from Home Assistant if it
+          changed, and reloads it without a restart
+        - every Home Assistant tool listed in manifest.json
         
     The function continues running until a shutdown command is received.
     
-    Command Processing:
-        1. Reads input from standard input
-        2. Parses the JSON command
-        3. Executes the appropriate function
-        4. Writes the response to standard output
-        
     Error Handling:
-        - Invalid commands are logged and ignored
-        - Communication errors are logged
-        - All errors are caught and handled gracefully
+        - Unknown commands and malformed input get a failure response
+        - Tool call errors are logged and returned as failure responses
+        - A lost MCP connection is reopened on the next call
     """
-
-    commands = {
-        'initialize': lambda _: logging.info("hello"),
-        'shutdown': lambda _: logging.info("goodbye"),
-        'refresh_manifest': refresh_manifest,
-    }
-    
-    while True:
-        command = read_command()
-        logging.info(f"Received command: {command}")
-        tool_calls = command.get("tool_calls", [])
-        for tool_call in tool_calls:
-            func = tool_call.get("func")
-            params = tool_call.get("params", {})
-            if func in commands:
-                response = commands[func]()
-            else:
-                response = call_tool(func, params)
-            write_response(response)
-    
-def read_command() -> dict | None:
-    ''' Reads a command from the communication pipe.
-
-    Returns:
-        Command details if the input was proper JSON; `None` otherwise
-    '''
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-
-        # Read in chunks until we get the full message
-        chunks = []
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-            
-            # Add the chunk we read
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-             # If we read less than the buffer size, we're done
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        # Combine all chunks and parse JSON
-        retval = ''.join(chunks)
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        logging.error(f'Received invalid JSON: {retval}')
-        return None
-    except Exception as e:
-        logging.error(f'Exception in read_command(): {str(e)}')
-        return None
-
-
-def write_response(response:Response) -> None:
-    ''' Writes a response to the communication pipe.
-
-    Parameters:
-        response: Response
-    '''
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        success = windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            message_len,
-            bytes_written,
-            None
-        )
-
-        if not success:
-            logging.error('Error writing to response pipe')
-
-    except Exception as e:
-        logging.error(f'Exception in write_response(): {str(e)}')
-
-initialize()
+    initialize()
+    return plugin.run()
 
 if __name__ == '__main__':
     main()
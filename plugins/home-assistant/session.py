@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import time
+import weakref
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import anyio
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolResult, ListToolsResult
+
+T = TypeVar("T")
+
+# Seconds a connection may sit idle before it is pinged
+DEFAULT_KEEPALIVE = 30.0
+
+# Seconds to wait for the server to answer a request
+DEFAULT_TIMEOUT = 30.0
+
+# Errors meaning the connection is gone, so the next request needs a new one
+CONNECTION_ERRORS = (
+    OSError,
+    httpx.TransportError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+
+# Error returned for requests on a session the server no longer knows, e.g. after it restarted
+SESSION_TERMINATED = "Session terminated"
+
+
+class SessionTerminatedError(ConnectionError):
+    """The server dropped the session a request was waiting on, so it did not run the request."""
+
+
+class McpSession:
+    """
+    A long-lived, reconnecting MCP session to the Home Assistant MCP server.
+
+    The TCP connection, HTTP session and MCP handshake are set up once and
+    shared by every tool call, so a call costs one round trip. The connection
+    is opened on first use, pinged while idle to keep it warm, and reopened
+    (with a fresh `initialize`) after it fails. Concurrent calls share the
+    same session, each waiting only for its own response.
+
+    streamablehttp_client and ClientSession are anyio context managers that
+    must be entered and exited by the same task, so each connection lives in
+    its own owner task for as long as it is open.
+    """
+
+    def __init__(self, url: str, access_token: str, keepalive: float = DEFAULT_KEEPALIVE,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.url = url
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self._headers = {"Authorization": f"Bearer {access_token}"}
+        self._session: Optional[ClientSession] = None
+        self._owner: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._last_used = 0.0
+        # owners of sessions the server no longer knows; requests still waiting on them never ran
+        self._terminated: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+
+    async def connect(self) -> ClientSession:
+        """Return the open session, connecting and initializing it if needed."""
+        if self._session is not None:
+            return self._session
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            # Another caller may have connected while we waited
+            if self._session is None:
+                ready = asyncio.get_running_loop().create_future()
+                self._closing = asyncio.Event()
+                self._owner = asyncio.create_task(self._own_connection(ready, self._closing))
+                self._session = await ready
+                self._last_used = time.monotonic()
+                logging.info(f"Connected to MCP server at {self.url}")
+            return self._session
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None,
+                        read_only: bool = False) -> CallToolResult:
+        """
+        Call a tool, reconnecting and retrying once if the call cannot have run.
+
+        A call is retried on a new connection when the server no longer knows
+        the session, or the connection could not be opened; the server did not
+        run it either way. A connection lost while the call was in flight may
+        have lost only the answer, so the call is retried only if it is
+        `read_only`. Tools that change devices, like HassTurnOn or a
+        brightness step, must not be run twice. Other errors reported by the
+        server and timeouts are never retried.
+        """
+        return await self._request(
+            name, lambda session: session.call_tool(name, arguments or {}), idempotent=read_only
+        )
+
+    async def list_tools(self) -> ListToolsResult:
+        """List the tools offered by the server, retrying like a read-only `call_tool`."""
+        return await self._request("list_tools", lambda session: session.list_tools())
+
+    async def keep_alive(self) -> None:
+        """
+        Keep the session warm for the life of the plugin.
+
+        Connects at once, so the first command does not pay for the handshake,
+        then pings the server whenever the session has been idle for
+        `keepalive` seconds. A failed ping drops the connection and the next
+        round reconnects. Closes the session when cancelled.
+        """
+        try:
+            while True:
+                owner = None
+                try:
+                    await self.connect()
+                    owner = self._owner
+                    if time.monotonic() - self._last_used >= self.keepalive:
+                        await self._request("ping", lambda session: session.send_ping())
+                except Exception as e:
+                    logging.warning(f"MCP keepalive failed: {e!r}")
+                    await self.reset(owner)
+                await asyncio.sleep(self.keepalive)
+        finally:
+            await self.close()
+
+    async def reset(self, owner: Optional[asyncio.Task] = None) -> None:
+        """
+        Drop the current connection; the next call opens a new one.
+
+        If `owner` is given, the connection is only dropped if it is still the
+        one `owner` holds, so concurrent calls that lose the same connection
+        do not close the one that replaced it.
+        """
+        if owner is not None and owner is not self._owner:
+            return
+        owner, closing = self._owner, self._closing
+        self._session = self._owner = self._closing = None
+        if owner is None:
+            return
+        closing.set()
+        try:
+            await asyncio.wait_for(owner, self.timeout)
+        except Exception as e:
+            logging.warning(f"Error closing MCP connection: {e!r}")
+
+    async def close(self) -> None:
+        """Close the session."""
+        await self.reset()
+        logging.info("MCP session closed")
+
+    async def _request(self, name: str, send: Callable[[ClientSession], Awaitable[T]],
+                       idempotent: bool = True) -> T:
+        """
+        Send a request on the open session, reconnecting if the connection was lost.
+
+        The request is retried once on the new connection if it never ran, or
+        if it is `idempotent` and may safely run twice.
+        """
+        for attempt in (1, 2):
+            session = await self.connect()
+            owner = self._owner
+            request = asyncio.ensure_future(send(session))
+            try:
+                # A dropped connection ends its owner task, which would otherwise
+                # leave the request waiting for its full timeout
+                await asyncio.wait({request, owner}, return_when=asyncio.FIRST_COMPLETED)
+                if not request.done():
+                    if owner in self._terminated:
+                        raise SessionTerminatedError(SESSION_TERMINATED)
+                    raise ConnectionError("MCP connection lost")
+                result = request.result()
+                self._last_used = time.monotonic()
+                return result
+            except Exception as e:
+                if not _connection_lost(e):
+                    raise
+                logging.warning(f"MCP connection lost during {name}: {e!r}")
+                if isinstance(e, McpError):
+                    self._terminated.add(owner)
+                await self.reset(owner)
+                if attempt == 2 or not (idempotent or _never_sent(e)):
+                    raise
+            finally:
+                if not request.done():
+                    request.cancel()
+
+    async def _own_connection(self, ready: asyncio.Future, closing: asyncio.Event) -> None:
+        """Open a connection, hand its session to `ready`, and hold it open until `closing` is set."""
+        try:
+            async with streamablehttp_client(self.url, headers=self._headers, timeout=self.timeout) as (
+                read_stream,
+                write_stream,
+                _,
+            ):
+                async with ClientSession(
+                    read_stream, write_stream, read_timeout_seconds=timedelta(seconds=self.timeout)
+                ) as session:
+                    await session.initialize()
+                    ready.set_result(session)
+                    await closing.wait()
+        except BaseException as e:
+            error = _unwrap(e)
+            if not ready.done():
+                ready.set_exception(error if isinstance(error, Exception) else ConnectionError("MCP connection cancelled"))
+            elif not isinstance(e, asyncio.CancelledError):
+                logging.warning(f"MCP connection closed: {error!r}")
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            # The connection died on its own; let the next call reconnect
+            if self._closing is closing:
+                self._session = self._owner = self._closing = None
+
+
+def _unwrap(error: BaseException) -> BaseException:
+    """Get the underlying error out of the exception groups raised by anyio task groups."""
+    while len(getattr(error, "exceptions", ())) == 1:
+        error = error.exceptions[0]
+    return error
+
+
+def _connection_lost(error: Exception) -> bool:
+    """Whether an error means the session is gone; the request may or may not have run."""
+    return _never_sent(error) or isinstance(error, CONNECTION_ERRORS)
+
+
+def _never_sent(error: Exception) -> bool:
+    """Whether an error shows the server did not run the request, so it can be sent again."""
+    if isinstance(error, McpError):
+        return error.error.message == SESSION_TERMINATED
+    # nothing is sent until the connection is open
+    return isinstance(error, (SessionTerminatedError, httpx.ConnectError))
@@ -0,0 +1,338 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from session import McpSession
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+# Tool whose result is cached: the state of every exposed device, as text
+LIVE_CONTEXT_TOOL = "GetLiveContext"
+
+# Longest time, in seconds, a cached live context is used before it is fetched again
+DEFAULT_MAX_AGE = 60.0
+
+# Seconds to wait before resubscribing after the event connection drops
+RESUBSCRIBE_DELAY = 10.0
+
+# Largest WebSocket message accepted; get_states lists every entity once per connection
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+# A device is identified by one of its names (casefolded) and its domain
+DeviceKey = Tuple[str, str]
+
+# Strings YAML 1.1 reads as something other than a string, so Home Assistant quotes them
+_YAML_KEYWORDS = {"y", "n", "yes", "no", "on", "off", "true", "false", "null", "~"}
+_YAML_NUMBER = re.compile(r"[-+]?(\.[0-9]+|[0-9][0-9_]*(\.[0-9_]*)?)([eE][-+]?[0-9]+)?|[-+]?\.(inf|Inf|INF)|\.(nan|NaN|NAN)")
+_YAML_INDICATORS = "-?:,[]{}#&*!|>'\"%@`"
+
+
+class AuthenticationError(Exception):
+    """Home Assistant rejected the access token."""
+
+
+def websocket_url(mcp_url: str) -> str:
+    """Derive the Home Assistant WebSocket API URL from the MCP server URL."""
+    parts = urlsplit(mcp_url)
+    scheme = "wss" if parts.scheme == "https" else "ws"
+    path = parts.path
+    if "/api/" in path:
+        path = path[:path.index("/api/")]
+    return urlunsplit((scheme, parts.netloc, path.rstrip("/") + "/api/websocket", "", ""))
+
+
+class LiveContext:
+    """
+    A GetLiveContext result split into one block of YAML per device.
+
+    Home Assistant lists each device as
+
+        - names: Kitchen Light, Ceiling
+          domain: light
+          state: 'on'
+          attributes:
+            brightness: '128'
+
+    so a state change updates the `state:` line and the attribute lines of one
+    block, and the text is rebuilt without asking Home Assistant again.
+    """
+
+    def __init__(self, text: str):
+        # the tool returns the overview as the "result" of a JSON object
+        self._envelope: Optional[dict] = None
+        try:
+            envelope = json.loads(text)
+            if isinstance(envelope, dict) and isinstance(envelope.get("result"), str):
+                self._envelope = envelope
+                text = envelope["result"]
+        except ValueError:
+            pass
+        self._header: List[str] = []
+        self._blocks: List[List[str]] = []
+        self.devices: Dict[DeviceKey, int] = {}
+        for line in text.split("\n"):
+            if line.startswith("- names:"):
+                self._blocks.append([line])
+            elif self._blocks:
+                self._blocks[-1].append(line)
+            else:
+                self._header.append(line)
+        for index, block in enumerate(self._blocks):
+            names = _scalar(block[0].split(":", 1)[1])
+            domain = next((_scalar(line.split(":", 1)[1]) for line in block if line.startswith("  domain:")), "")
+            for name in names.split(","):
+                self.devices[(_unquote(name).casefold(), domain)] = index
+
+    def update(self, key: DeviceKey, new_state: dict) -> bool:
+        """Apply a device's new state; returns False if the device is not listed."""
+        index = self.devices.get(key)
+        if index is None:
+            return False
+        block = self._blocks[index]
+        attributes = new_state.get("attributes") or {}
+        for i, line in enumerate(block):
+            if line.startswith("  state:"):
+                state = str(new_state.get("state", ""))
+                unit = attributes.get("unit_of_measurement")
+                # sensors are listed with their unit, e.g. "21.5 °C"
+                if unit and _scalar(line.split(":", 1)[1]).endswith(f" {unit}"):
+                    state = f"{state} {unit}"
+                block[i] = f"  state: {_yaml_scalar(state)}"
+            elif line.startswith("    ") and not line.startswith("     ") and ":" in line:
+                # only the attributes Home Assistant chose to list, and only single-line ones
+                name, value = line[4:].split(":", 1)
+                if value.strip() and name in attributes and not isinstance(attributes[name], (list, dict)):
+                    block[i] = f"    {name}: {_yaml_scalar(str(attributes[name]))}"
+        return True
+
+    def render(self) -> str:
+        text = "\n".join(self._header + [line for block in self._blocks for line in block])
+        if self._envelope is None:
+            return text
+        return json.dumps(dict(self._envelope, result=text))
+
+
+def _scalar(value: str) -> str:
+    return _unquote(value.strip())
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        return value[1:-1].replace("''", "'")
+    return value.strip('"')
+
+
+def _yaml_scalar(value: str) -> str:
+    # written the way yaml.dump writes a string: plain unless it would read as something else
+    plain = (
+        value
+        and value == value.strip()
+        and value[0] not in _YAML_INDICATORS
+        and ": " not in value
+        and " #" not in value
+        and "\n" not in value
+        and value.casefold() not in _YAML_KEYWORDS
+        and not _YAML_NUMBER.fullmatch(value)
+    )
+    return value if plain else "'" + value.replace("'", "''") + "'"
+
+
+class DeviceStateCache:
+    """
+    The live context of every exposed device, kept in memory.
+
+    GetLiveContext returns the state of the whole house, and is the largest
+    and slowest response Home Assistant sends. The cache fetches it once and
+    answers from memory. It subscribes to state changes of the listed devices
+    only, and applies each change to the device's entry instead of fetching
+    everything again. It is fetched again when:
+
+    - the plugin itself ran a tool that may have changed a device
+    - a change cannot be applied, e.g. a listed device was removed
+    - it is older than `max_age` seconds, which bounds how long a missed
+      event (or running without events) can leave it stale
+    """
+
+    def __init__(self, session: McpSession, max_age: float = DEFAULT_MAX_AGE):
+        self.session = session
+        self.max_age = max_age
+        self.subscribed = False
+        self._context: Optional[LiveContext] = None
+        self._live_context: Optional[str] = None
+        self._fetched_at = 0.0
+        # bumped by every invalidation; a fetch answers questions asked up to its generation
+        self._generation = 0
+        self._fetched_generation = -1
+        self._fetch: Optional[asyncio.Task] = None
+        self._fetch_generation = -1
+        # latest new state of each followed entity, numbered so a fetch can replay the ones it missed
+        self._event_count = 0
+        self._events: Dict[str, Tuple[int, dict]] = {}
+        # followed entity ids and the listed device each one is
+        self._entities: Dict[str, DeviceKey] = {}
+        self._connection = None
+        self._resubscribe = False
+
+    async def live_context(self) -> str:
+        """Return the live context, from memory if it is current."""
+        # a fetch started before the last change cannot answer, but one racing
+        # a change that happens during the question can
+        generation = self._generation
+        while not self._current(generation):
+            await self.refresh()
+        if self._live_context is None:
+            self._live_context = self._context.render()
+        return self._live_context
+
+    def invalidate(self):
+        """Mark the cache out of date, e.g. after a tool call that changes a device."""
+        self._generation += 1
+
+    async def refresh(self) -> str:
+        """Fetch the live context, sharing a running fetch unless the cache was invalidated after it started."""
+        if self._fetch is None or self._fetch.done() or self._fetch_generation < self._generation:
+            self._fetch_generation = self._generation
+            self._fetch = asyncio.ensure_future(self._fetch_live_context(self._generation))
+        return await asyncio.shield(self._fetch)
+
+    async def follow(self, url: str, access_token: str):
+        """
+        Keep the cache current from Home Assistant's state changes.
+
+        Runs for the life of the plugin, resubscribing when the connection
+        drops. Without the websockets package, or with an access token the
+        WebSocket API rejects, the cache relies on `max_age` alone.
+        """
+        if websockets is not None:
+            await self._listen(url, access_token)
+        else:
+            logging.warning("websockets is not installed; device states are cached without change events.")
+        if self._context is None:
+            # warm the cache so the first question is answered from memory
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.warning(f"Device state refresh failed: {e!r}")
+
+    def _current(self, generation: int) -> bool:
+        return (
+            self._context is not None
+            and self._fetched_generation >= generation
+            and time.monotonic() - self._fetched_at < self.max_age
+        )
+
+    async def _fetch_live_context(self, generation: int) -> str:
+        first_event = self._event_count
+        response = await self.session.call_tool(LIVE_CONTEXT_TOOL, read_only=True)
+        live_context = str(response.content[0].text)
+        # an older fetch finishing late must not replace a newer result
+        if generation >= self._fetched_generation:
+            context = LiveContext(live_context)
+            # changes that arrived while the fetch was running may be missing from it
+            for entity_id, (number, new_state) in self._events.items():
+                if number > first_event and entity_id in self._entities:
+                    context.update(self._entities[entity_id], new_state)
+            if self._context is not None and context.devices.keys() != self._context.devices.keys():
+                self._devices_changed()
+            self._context = context
+            self._live_context = None
+            self._fetched_at = time.monotonic()
+            self._fetched_generation = generation
+        return live_context
+
+    async def _listen(self, url: str, access_token: str):
+        """Follow state changes until the access token is rejected."""
+        while True:
+            # a live context fetched just before subscribing is current; any
+            # other may have missed changes while we were not subscribed
+            current = self._resubscribe
+            self._resubscribe = False
+            try:
+                async with websockets.connect(url, max_size=MAX_MESSAGE_SIZE) as connection:
+                    await self._authenticate(connection, access_token)
+                    if self._context is None:
+                        await self.refresh()
+                        current = True
+                    await self._subscribe(connection)
+                    self._connection = connection
+                    self.subscribed = True
+                    logging.info(f"Following {len(self._entities)} Home Assistant entities at {url}")
+                    if not current:
+                        self.invalidate()
+                        await self.refresh()
+                    async for message in connection:
+                        self._handle_event(json.loads(message))
+            except AuthenticationError as e:
+                logging.error(f"Home Assistant refused the event subscription: {e}")
+                return
+            except Exception as e:
+                logging.warning(f"Home Assistant event subscription lost: {e!r}")
+            finally:
+                self._connection = None
+                self.subscribed = False
+            if not self._resubscribe:
+                await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+    async def _authenticate(self, connection, access_token: str):
+        # https://developers.home-assistant.io/docs/api/websocket
+        message = json.loads(await connection.recv())
+        if message.get("type") == "auth_required":
+            await connection.send(json.dumps({"type": "auth", "access_token": access_token}))
+            message = json.loads(await connection.recv())
+        if message.get("type") != "auth_ok":
+            raise AuthenticationError(message.get("message", message.get("type")))
+
+    async def _subscribe(self, connection):
+        # match the listed devices to entity ids, then subscribe to those entities alone
+        states = await self._command(connection, {"id": 1, "type": "get_states"})
+        entities = {}
+        for state in states or []:
+            entity_id = state.get("entity_id", "")
+            name = (state.get("attributes") or {}).get("friendly_name")
+            key = (str(name).casefold(), entity_id.split(".", 1)[0])
+            if name and key in self._context.devices:
+                entities[entity_id] = key
+        self._entities = entities
+        self._events = {}
+        if entities:
+            trigger = {"platform": "state", "entity_id": sorted(entities)}
+            await self._command(connection, {"id": 2, "type": "subscribe_trigger", "trigger": trigger})
+
+    async def _command(self, connection, command: dict) -> Any:
+        await connection.send(json.dumps(command))
+        while True:
+            message = json.loads(await connection.recv())
+            if message.get("id") == command["id"] and message.get("type") == "result":
+                if not message.get("success"):
+                    raise ConnectionError(f"{command['type']} failed: {message.get('error')}")
+                return message.get("result")
+
+    def _handle_event(self, message: dict):
+        if message.get("type") != "event":
+            return
+        trigger = ((message.get("event") or {}).get("variables") or {}).get("trigger") or {}
+        key = self._entities.get(trigger.get("entity_id"))
+        if key is None:
+            return
+        new_state = trigger.get("to_state")
+        if new_state is None or not self._context.update(key, new_state):
+            # removed, or no longer listed; the next question fetches the new list
+            self.invalidate()
+            return
+        self._event_count += 1
+        self._events[trigger["entity_id"]] = (self._event_count, new_state)
+        self._live_context = None
+
+    def _devices_changed(self):
+        # the followed entities are matched to the old device list; subscribe again
+        if self._connection is not None and not self._resubscribe:
+            self._resubscribe = True
+            asyncio.ensure_future(self._connection.close())
@@ -0,0 +1,78 @@
+"""
+Tests for fetching the manifest inputs from Home Assistant.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from init import fetch_sources
+from session import McpSession
+
+LIVE_CONTEXT = "Live Context: An overview:\n- names: Kitchen\n  domain: light\n  state: 'on'\n"
+
+TOOLS = SimpleNamespace(tools=[
+    SimpleNamespace(name="HassTurnOn", description="Turns on a device", inputSchema={"properties": {}}),
+    SimpleNamespace(name="NotAllowed", description="Not exposed", inputSchema={"properties": {}}),
+])
+
+
+def live_context_result() -> Any:
+    return SimpleNamespace(content=[SimpleNamespace(text=json.dumps({"success": True, "result": LIVE_CONTEXT}))])
+
+
+class FakeClientSession:
+    """Has the list_tools and call_tool signatures of mcp.ClientSession."""
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    async def list_tools(self, cursor: Optional[str] = None) -> Any:
+        return TOOLS
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None, read_timeout_seconds: Any = None,
+                        progress_callback: Any = None, *, meta: Optional[dict] = None) -> Any:
+        self.calls.append(name)
+        return live_context_result()
+
+
+class FakeMcpSession(McpSession):
+    """An McpSession answering from memory instead of a server."""
+
+    def __init__(self) -> None:
+        super().__init__("http://localhost/api/mcp", "token")
+        self.calls = []
+
+    async def list_tools(self) -> Any:
+        return TOOLS
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None, read_only: bool = False) -> Any:
+        self.calls.append((name, read_only))
+        return live_context_result()
+
+
+class FetchSourcesTest(unittest.TestCase):
+
+    def test_client_session(self) -> None:
+        session = FakeClientSession()
+        tools, device_list = asyncio.run(fetch_sources(session))
+
+        self.assertEqual([tool.name for tool in tools], ["HassTurnOn"])
+        self.assertIn("light: Kitchen", device_list)
+        self.assertEqual(session.calls, ["GetLiveContext"])
+
+    def test_mcp_session_reads_live_context_as_read_only(self) -> None:
+        session = FakeMcpSession()
+        asyncio.run(fetch_sources(session))
+
+        self.assertEqual(session.calls, [("GetLiveContext", True)])
+
+
+if __name__ == "__main__":
+    unittest.main()
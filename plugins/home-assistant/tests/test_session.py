@@ -0,0 +1,87 @@
+"""
+Tests for when McpSession retries a request on a new connection.
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.shared.exceptions import McpError
+from mcp.types import ErrorData
+
+from session import SESSION_TERMINATED, McpSession
+
+
+class FakeSession(McpSession):
+    """An McpSession whose connections are tasks that run until reset."""
+
+    def __init__(self) -> None:
+        super().__init__("http://localhost/api/mcp", "token")
+        self.sent = []
+
+    async def connect(self):
+        if self._owner is None or self._owner.done():
+            self._owner = asyncio.ensure_future(asyncio.sleep(3600))
+        return self._owner
+
+    async def reset(self, owner: Optional[asyncio.Task] = None) -> None:
+        if owner is not None and owner is not self._owner:
+            return
+        if self._owner is not None:
+            self._owner.cancel()
+        self._owner = None
+
+    async def request(self, name: str, failure: Optional[str] = None, read_only: bool = False) -> str:
+        """Send a request that fails the given way on its first connection."""
+        async def send(connection):
+            self.sent.append(name)
+            if self.sent.count(name) == 1:
+                if failure == "drop":
+                    connection.cancel()
+                    await asyncio.sleep(3600)
+                elif failure == "terminated":
+                    raise McpError(ErrorData(code=32600, message=SESSION_TERMINATED))
+                elif failure == "waiting":
+                    # answered only if the connection survives
+                    await asyncio.sleep(3600)
+            return name
+        return await self._request(name, send, idempotent=read_only)
+
+
+class RetryTest(unittest.TestCase):
+
+    def test_write_is_not_resent_after_connection_drop(self) -> None:
+        session = FakeSession()
+        with self.assertRaises(ConnectionError):
+            asyncio.run(session.request("HassTurnOn", "drop"))
+        self.assertEqual(session.sent, ["HassTurnOn"])
+
+    def test_read_is_resent_after_connection_drop(self) -> None:
+        session = FakeSession()
+        self.assertEqual(asyncio.run(session.request("GetLiveContext", "drop", read_only=True)), "GetLiveContext")
+        self.assertEqual(session.sent, ["GetLiveContext"] * 2)
+
+    def test_write_is_resent_on_terminated_session(self) -> None:
+        session = FakeSession()
+        self.assertEqual(asyncio.run(session.request("HassTurnOn", "terminated")), "HassTurnOn")
+        self.assertEqual(session.sent, ["HassTurnOn"] * 2)
+
+    def test_writes_waiting_on_terminated_session_are_resent(self) -> None:
+        async def run():
+            session = FakeSession()
+            waiting = asyncio.ensure_future(session.request("HassTurnOff", "waiting"))
+            await asyncio.sleep(0)
+            first = await session.request("HassTurnOn", "terminated")
+            return session, first, await waiting
+
+        session, first, waiting = asyncio.run(run())
+        self.assertEqual((first, waiting), ("HassTurnOn", "HassTurnOff"))
+        self.assertEqual(sorted(session.sent), ["HassTurnOff"] * 2 + ["HassTurnOn"] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Tests for keeping the device state cache current from state changes.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state_cache import DeviceStateCache, LiveContext
+
+LIVE_CONTEXT = """Live Context: An overview of the areas and the devices in this smart home:
+- names: Kitchen Light, Ceiling
+  domain: light
+  state: 'off'
+  areas: Kitchen
+  attributes:
+    brightness: '0'
+- names: Outside Temperature
+  domain: sensor
+  state: 12.5 °C
+"""
+
+
+def event(entity_id: str, to_state: Optional[dict]) -> dict:
+    trigger = {"platform": "state", "entity_id": entity_id, "to_state": to_state}
+    return {"id": 2, "type": "event", "event": {"variables": {"trigger": trigger}}}
+
+
+def result(live_context: str) -> str:
+    return json.loads(live_context)["result"]
+
+
+class FakeSession:
+    """Answers GetLiveContext, optionally waiting until released."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release: Optional[asyncio.Event] = None
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None, read_only: bool = False) -> Any:
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        text = json.dumps({"success": True, "result": LIVE_CONTEXT})
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+class LiveContextTest(unittest.TestCase):
+
+    def test_render_unchanged(self) -> None:
+        text = json.dumps({"success": True, "result": LIVE_CONTEXT})
+        self.assertEqual(LiveContext(text).render(), text)
+
+    def test_devices_by_name_and_domain(self) -> None:
+        context = LiveContext(LIVE_CONTEXT)
+        self.assertEqual(
+            set(context.devices),
+            {("kitchen light", "light"), ("ceiling", "light"), ("outside temperature", "sensor")},
+        )
+
+    def test_update_state_and_listed_attributes(self) -> None:
+        context = LiveContext(LIVE_CONTEXT)
+        self.assertTrue(context.update(("ceiling", "light"), {
+            "state": "on", "attributes": {"brightness": 128, "friendly_name": "Kitchen Light"},
+        }))
+        self.assertTrue(context.update(("outside temperature", "sensor"), {
+            "state": "13.0", "attributes": {"unit_of_measurement": "°C"},
+        }))
+        text = context.render()
+        self.assertIn("  state: 'on'\n  areas: Kitchen\n  attributes:\n    brightness: '128'\n", text)
+        self.assertIn("  state: 13.0 °C\n", text)
+        self.assertNotIn("friendly_name", text)
+
+    def test_update_unlisted_device(self) -> None:
+        self.assertFalse(LiveContext(LIVE_CONTEXT).update(("garage", "cover"), {"state": "open"}))
+
+
+class DeviceStateCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.session = FakeSession()
+        self.cache = DeviceStateCache(self.session)
+
+    def follow(self) -> None:
+        self.cache._entities = {"light.kitchen": ("kitchen light", "light")}
+
+    def test_state_change_is_applied_without_fetching(self) -> None:
+        async def run():
+            await self.cache.live_context()
+            self.follow()
+            self.cache._handle_event(event("light.kitchen", {"state": "on", "attributes": {}}))
+            return await self.cache.live_context()
+
+        self.assertIn("  state: 'on'\n", result(asyncio.run(run())))
+        self.assertEqual(self.session.calls, 1)
+
+    def test_unfollowed_entity_is_ignored(self) -> None:
+        async def run():
+            await self.cache.live_context()
+            self.follow()
+            self.cache._handle_event(event("sensor.unlisted", {"state": "1"}))
+            return await self.cache.live_context()
+
+        asyncio.run(run())
+        self.assertEqual(self.session.calls, 1)
+
+    def test_removed_entity_fetches_again(self) -> None:
+        async def run():
+            await self.cache.live_context()
+            self.follow()
+            self.cache._handle_event(event("light.kitchen", None))
+            return await self.cache.live_context()
+
+        asyncio.run(run())
+        self.assertEqual(self.session.calls, 2)
+
+    def test_change_during_fetch_is_kept(self) -> None:
+        async def run():
+            await self.cache.live_context()
+            self.follow()
+            self.session.release = asyncio.Event()
+            self.cache.invalidate()
+            question = asyncio.ensure_future(self.cache.live_context())
+            while self.session.calls < 2:
+                await asyncio.sleep(0)
+            # the fetch was answered before this change reached Home Assistant's overview
+            self.cache._handle_event(event("light.kitchen", {"state": "on", "attributes": {}}))
+            self.session.release.set()
+            return await question
+
+        self.assertIn("  state: 'on'\n", result(asyncio.run(run())))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+''' Shared runtime for G-Assist Python plugins. '''
+from .codec import (BufferedFraming, EndMarkerFraming, Framing, LengthPrefixedFraming,
+                    NdjsonFraming, create_framing, negotiate)
+from .runtime import (Plugin, Response, ToolCall, failure_response, message_response,
+                      parse_tool_calls, success_response)
+from .transport import (MemoryTransport, PipeTransport, PosixPipeTransport, Transport,
+                        Win32PipeTransport, default_transport)
+
+__all__ = [
+    'BufferedFraming',
+    'EndMarkerFraming',
+    'Framing',
+    'LengthPrefixedFraming',
+    'MemoryTransport',
+    'NdjsonFraming',
+    'PipeTransport',
+    'Plugin',
+    'PosixPipeTransport',
+    'Response',
+    'ToolCall',
+    'Transport',
+    'Win32PipeTransport',
+    'create_framing',
+    'default_transport',
+    'failure_response',
+    'message_response',
+    'negotiate',
+    'parse_tool_calls',
+    'success_response',
+]
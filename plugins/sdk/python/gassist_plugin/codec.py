@@ -0,0 +1,368 @@
+''' Message encoding and framing for the pipes between G-Assist and its plugins.
+
+Messages are JSON, encoded and decoded by `dumps` and `loads` straight to and
+from UTF-8 bytes. They use orjson or msgspec when one is installed, since both
+are several times faster than the json module on long `messages` histories,
+and fall back to the json module otherwise. Set the GASSIST_PLUGIN_JSON
+environment variable to "orjson", "msgspec" or "json" to pick one.
+
+A framing decides where one message on a byte pipe ends. Three are available:
+
+- "end-marker": the original protocol. A command ends with the first read that
+  returns less than a full buffer, and every response is followed by
+  `<<END>>`. Commands that are an exact multiple of the buffer size are
+  misframed, and responses must be scanned for the marker.
+- "length-prefixed": every message is preceded by its length as a 4-byte
+  big-endian unsigned integer, so a message is read with one sized read.
+- "ndjson": every message is one line of JSON, ended by a newline.
+
+Plugins start with "end-marker". The plugin manager may offer the others in a
+`framing` property of the command carrying `initialize`, most preferred first:
+
+    {"framing": ["length-prefixed", "ndjson"], "tool_calls": [{"func": "initialize"}]}
+
+The plugin answers `initialize` in the old framing, names the framing it
+picked in a `framing` property of the response, and uses it for every message
+after that in both directions. A plugin manager that offers nothing, or a
+response without `framing`, keeps the original protocol.
+'''
+import json
+import os
+import struct
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+# Size of each read from the command pipe
+BUFFER_SIZE = 4096
+
+# Read buffers grown past this size are released after the message is read
+MAX_RETAINED_BUFFER = 1 << 20
+
+# Largest message a length prefix may announce; anything longer means the pipe is corrupt
+MAX_MESSAGE_SIZE = 1 << 26
+
+# Marker appended to every response so the plugin manager can find its end
+END_MARKER = b'<<END>>'
+
+END_MARKER_FRAMING = 'end-marker'
+LENGTH_PREFIXED_FRAMING = 'length-prefixed'
+NDJSON_FRAMING = 'ndjson'
+
+# Property of the initialize command offering framings, and of its response naming the one picked
+FRAMING_PROPERTY = 'framing'
+
+# Reads up to len(buffer) bytes into buffer; returns the count, or None at end of file
+ReadInto = Callable[[memoryview], Optional[int]]
+
+_LENGTH = struct.Struct('>I')
+
+# JSON libraries in order of preference
+JSON_LIBRARIES = ('orjson', 'msgspec', 'json')
+
+
+def _json_codec(name: str) -> Tuple[Callable[[bytes], Any], Callable[[Any], bytes]]:
+    ''' Imports a JSON library and returns its decode and encode functions.
+
+    Raises:
+        ImportError: If the library is not installed
+        ValueError: If the library is unknown
+    '''
+    if name == 'orjson':
+        import orjson
+
+        def orjson_dumps(obj: Any) -> bytes:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        return orjson.loads, orjson_dumps
+
+    if name == 'msgspec':
+        import msgspec
+        decoder = msgspec.json.Decoder()
+        encoder = msgspec.json.Encoder()
+
+        def msgspec_loads(data: bytes) -> Any:
+            try:
+                return decoder.decode(data)
+            except msgspec.DecodeError as e:
+                raise ValueError(str(e)) from e
+        return msgspec_loads, encoder.encode
+
+    if name == 'json':
+        def json_dumps(obj: Any) -> bytes:
+            return json.dumps(obj).encode('utf-8')
+        return json.loads, json_dumps
+
+    raise ValueError(f'Unknown JSON library: {name}')
+
+
+def _select_json_library() -> Tuple[str, Callable[[bytes], Any], Callable[[Any], bytes]]:
+    ''' Picks the library named by GASSIST_PLUGIN_JSON, or the first one installed. '''
+    requested = os.environ.get('GASSIST_PLUGIN_JSON')
+    if requested:
+        return (requested,) + _json_codec(requested)
+    for name in JSON_LIBRARIES:
+        try:
+            return (name,) + _json_codec(name)
+        except ImportError:
+            continue
+
+
+# Name of the JSON library in use, and its decode and encode functions
+JSON_LIBRARY, _loads, _dumps = _select_json_library()
+
+
+def loads(data: bytes) -> Any:
+    ''' Decodes a JSON message.
+
+    Args:
+        data: UTF-8 encoded JSON
+
+    Returns:
+        The decoded object
+
+    Raises:
+        ValueError: If the message is not valid JSON
+    '''
+    return _loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    ''' Encodes an object as a JSON message.
+
+    The output never contains a raw newline, so it can be framed as NDJSON.
+
+    Args:
+        obj: The object to encode
+
+    Returns:
+        UTF-8 encoded JSON
+
+    Raises:
+        TypeError: If the object cannot be encoded
+    '''
+    return _dumps(obj)
+
+
+class Framing:
+    ''' Splits a byte pipe into messages and frames messages written to it. '''
+
+    name = ''
+
+    def read_message(self, readinto: ReadInto) -> Optional[bytes]:
+        ''' Reads the next message from a pipe.
+
+        Args:
+            readinto: Raw read from the pipe
+
+        Returns:
+            The message, or `None` once the pipe has closed
+
+        Raises:
+            OSError: If the pipe closes partway through a message, or a
+                message announces a length over MAX_MESSAGE_SIZE
+        '''
+        raise NotImplementedError
+
+    def frame(self, message: bytes) -> bytes:
+        ''' Frames a message for writing.
+
+        Args:
+            message: The encoded message
+
+        Returns:
+            The bytes to write to the pipe
+        '''
+        raise NotImplementedError
+
+
+class BufferedFraming(Framing):
+    ''' A framing that reads into one buffer reused across messages.
+
+    Base class of the framings here, and of custom framings such as a host's
+    reader of marker-ended responses. Subclasses read into `_buffer` with
+    `_read_chunk`, grow it with `_reserve`, cut messages out with `_copy`, and
+    call `_release` between messages so one long message does not keep a
+    large buffer alive.
+    '''
+
+    def __init__(self) -> None:
+        self._buffer = bytearray(BUFFER_SIZE)
+
+    def _reserve(self, size: int) -> None:
+        ''' Grows the buffer, by doubling, until it holds at least `size` bytes. '''
+        length = len(self._buffer)
+        while length < size:
+            length *= 2
+        if length > len(self._buffer):
+            self._buffer.extend(bytes(length - len(self._buffer)))
+
+    def _release(self) -> None:
+        ''' Drops a buffer that has grown past the retained size. '''
+        if len(self._buffer) > MAX_RETAINED_BUFFER:
+            self._buffer = bytearray(BUFFER_SIZE)
+
+    def _copy(self, start: int, end: int) -> bytes:
+        ''' Copies part of the buffer into a new bytes object. '''
+        with memoryview(self._buffer) as view, view[start:end] as data:
+            return data.tobytes()
+
+    def _read_chunk(self, readinto: ReadInto, start: int, size: int) -> Optional[int]:
+        ''' Reads up to `size` bytes into the buffer at `start`. '''
+        with memoryview(self._buffer) as view, view[start:start + size] as chunk:
+            return readinto(chunk)
+
+
+class EndMarkerFraming(BufferedFraming):
+    ''' The original framing: short reads end commands, a marker ends responses. '''
+
+    name = END_MARKER_FRAMING
+
+    def __init__(self, end_marker: bytes = END_MARKER) -> None:
+        super().__init__()
+        self.end_marker = end_marker
+
+    def read_message(self, readinto: ReadInto) -> Optional[bytes]:
+        # Reads land directly in the reused buffer, which doubles when a
+        # message outgrows it, so a long context costs one copy at the end
+        size = 0
+        while True:
+            self._reserve(size + BUFFER_SIZE)
+            count = self._read_chunk(readinto, size, BUFFER_SIZE)
+            if count is None:
+                return None
+            size += count
+
+            # If we read less than the buffer size, we're done
+            if count < BUFFER_SIZE:
+                break
+
+        message = self._copy(0, size)
+        self._release()
+        return message
+
+    def frame(self, message: bytes) -> bytes:
+        return message + self.end_marker
+
+
+class LengthPrefixedFraming(BufferedFraming):
+    ''' Messages preceded by their length as a 4-byte big-endian integer. '''
+
+    name = LENGTH_PREFIXED_FRAMING
+
+    def read_message(self, readinto: ReadInto) -> Optional[bytes]:
+        if not self._read_exactly(readinto, _LENGTH.size, at_start=True):
+            return None
+        (size,) = _LENGTH.unpack_from(self._buffer)
+        if size > MAX_MESSAGE_SIZE:
+            # Checked before the buffer grows, so a corrupt prefix cannot allocate gigabytes
+            raise OSError(f'Message length {size} exceeds the maximum of {MAX_MESSAGE_SIZE} bytes')
+        self._reserve(size)
+        self._read_exactly(readinto, size, at_start=False)
+        message = self._copy(0, size)
+        self._release()
+        return message
+
+    def frame(self, message: bytes) -> bytes:
+        return _LENGTH.pack(len(message)) + message
+
+    def _read_exactly(self, readinto: ReadInto, size: int, at_start: bool) -> bool:
+        ''' Fills the start of the buffer with exactly `size` bytes.
+
+        Returns:
+            False if the pipe closed before the first byte of a message
+        '''
+        read = 0
+        while read < size:
+            count = self._read_chunk(readinto, read, size - read)
+            if count is None:
+                if at_start and read == 0:
+                    return False
+                raise OSError('Pipe closed in the middle of a message')
+            read += count
+        return True
+
+
+class NdjsonFraming(BufferedFraming):
+    ''' Messages written one per line.
+
+    Messages must not contain a raw newline; JSON from `dumps` never does,
+    since newlines inside strings are escaped.
+    '''
+
+    name = NDJSON_FRAMING
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Bytes read past the end of the last message
+        self._start = 0
+        self._end = 0
+
+    def read_message(self, readinto: ReadInto) -> Optional[bytes]:
+        scan = self._start
+        while True:
+            newline = self._buffer.find(b'\n', scan, self._end)
+            if newline >= 0:
+                message = self._copy(self._start, newline)
+                self._start = newline + 1
+                if self._start == self._end:
+                    self._start = self._end = 0
+                    self._release()
+                return message
+
+            # Only the new bytes need scanning after the next read
+            scan = self._end
+            if self._start > 0:
+                self._buffer[:self._end - self._start] = self._buffer[self._start:self._end]
+                scan -= self._start
+                self._end -= self._start
+                self._start = 0
+            self._reserve(self._end + BUFFER_SIZE)
+            count = self._read_chunk(readinto, self._end, BUFFER_SIZE)
+            if count is None:
+                if self._end > self._start:
+                    raise OSError('Pipe closed in the middle of a message')
+                return None
+            self._end += count
+
+    def frame(self, message: bytes) -> bytes:
+        return message + b'\n'
+
+
+FRAMINGS = {
+    END_MARKER_FRAMING: EndMarkerFraming,
+    LENGTH_PREFIXED_FRAMING: LengthPrefixedFraming,
+    NDJSON_FRAMING: NdjsonFraming,
+}
+
+
+def create_framing(name: str) -> Framing:
+    ''' Creates a framing by name.
+
+    Args:
+        name: One of the FRAMINGS names
+
+    Returns:
+        A new framing
+
+    Raises:
+        ValueError: If the framing is unknown
+    '''
+    if name not in FRAMINGS:
+        raise ValueError(f'Unknown framing: {name}')
+    return FRAMINGS[name]()
+
+
+def negotiate(offered: Iterable[str], supported: Iterable[str] = tuple(FRAMINGS)) -> Optional[str]:
+    ''' Picks the framing to switch to from those offered at initialize.
+
+    Args:
+        offered: Framings offered by the plugin manager, most preferred first
+        supported: Framings this end supports
+
+    Returns:
+        The first offered framing that is supported, or `None` to keep the
+        original framing
+    '''
+    supported = set(supported)
+    for name in offered:
+        if name in supported and name != END_MARKER_FRAMING:
+            return name
+    return None
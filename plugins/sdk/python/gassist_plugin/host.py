@@ -0,0 +1,586 @@
+''' Local plugin host and load generator for G-Assist plugins.
+
+PluginHost spawns a plugin the way the G-Assist plugin manager does: it reads
+the plugin's manifest.json, starts the plugin with pipes for standard input
+and output, sends `initialize`, then `tool_calls` commands carrying
+`properties`, `messages` and `system_info`, and finally `shutdown`. This
+makes it possible to profile and regression-test a plugin without the
+G-Assist driver.
+
+Run it from the command line to replay a command trace against a plugin and
+report per-function latency, throughput and memory use:
+
+    python -m gassist_plugin.host ../../examples/weather --trace weather.jsonl --iterations 20
+
+A trace is a JSON Lines file holding one command per line, exactly as the
+plugin manager sends it. Plugins built on gassist_plugin record one when the
+GASSIST_PLUGIN_TRACE environment variable names a file to append to.
+'''
+import argparse
+import glob
+import json
+import logging
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from .codec import (BUFFER_SIZE, END_MARKER, END_MARKER_FRAMING, FRAMING_PROPERTY,
+                    LENGTH_PREFIXED_FRAMING, NDJSON_FRAMING, BufferedFraming, Framing, ReadInto,
+                    create_framing, dumps, loads)
+from .runtime import (CONTEXT_PROPERTY, FUNCTION_PROPERTY, INITIALIZE_COMMAND, SHUTDOWN_COMMAND,
+                      SYSTEM_INFO_PROPERTY, TOOL_CALLS_PROPERTY)
+
+MANIFEST_FILE = 'manifest.json'
+
+# Framings offered at initialize, most preferred first
+DEFAULT_FRAMINGS = (LENGTH_PREFIXED_FRAMING, NDJSON_FRAMING)
+
+# Seconds to wait for a response before giving up on the plugin
+DEFAULT_TIMEOUT = 30.0
+
+SDK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger(__name__)
+
+
+class CallResult(NamedTuple):
+    ''' The outcome of one tool call.
+
+    Attributes:
+        func: The function called
+        response: The final response
+        messages: Partial messages streamed before the final response
+        latency: Seconds from sending the command to the final response
+        first_message: Seconds to the first partial message, if there was one
+    '''
+    func: str
+    response: Dict[str, Any]
+    messages: List[str]
+    latency: float
+    first_message: Optional[float]
+
+    @property
+    def success(self) -> bool:
+        return bool(self.response.get('success'))
+
+
+class _ResponseFraming(BufferedFraming):
+    ''' Host side of the end-marker framing: responses end with the marker. '''
+
+    name = END_MARKER_FRAMING
+
+    def __init__(self, end_marker: bytes = END_MARKER) -> None:
+        super().__init__()
+        self.end_marker = end_marker
+        self._end = 0
+
+    def read_message(self, readinto: ReadInto) -> Optional[bytes]:
+        scan = 0
+        while True:
+            marker = self._buffer.find(self.end_marker, scan, self._end)
+            if marker >= 0:
+                message = self._copy(0, marker)
+                rest = marker + len(self.end_marker)
+                self._buffer[:self._end - rest] = self._buffer[rest:self._end]
+                self._end -= rest
+                return message
+
+            # The marker may straddle the next read
+            scan = max(0, self._end - len(self.end_marker) + 1)
+            self._reserve(self._end + BUFFER_SIZE)
+            count = self._read_chunk(readinto, self._end, BUFFER_SIZE)
+            if count is None:
+                if self._end:
+                    raise OSError('Pipe closed in the middle of a response')
+                return None
+            self._end += count
+
+    def frame(self, message: bytes) -> bytes:
+        # Plugins end a command at the first short read, so a command that is
+        # an exact multiple of the buffer size gets a trailing space
+        if len(message) % BUFFER_SIZE == 0:
+            message += b' '
+        return message
+
+
+def load_manifest(plugin_dir: str) -> dict:
+    ''' Reads a plugin's manifest.
+
+    Args:
+        plugin_dir: Directory holding manifest.json
+
+    Returns:
+        The decoded manifest
+    '''
+    with open(os.path.join(plugin_dir, MANIFEST_FILE), encoding='utf-8') as file:
+        return json.load(file)
+
+
+def plugin_command(plugin_dir: str, manifest: dict) -> List[str]:
+    ''' Works out how to start a plugin.
+
+    The manifest's executable is used if it exists. Otherwise the plugin's
+    Python source is run with the current interpreter: plugin.py, or the only
+    Python file in the directory.
+
+    Args:
+        plugin_dir: The plugin's directory
+        manifest: The plugin's manifest
+
+    Returns:
+        The command line
+
+    Raises:
+        FileNotFoundError: If neither the executable nor the source can be found
+    '''
+    executable = manifest.get('executable')
+    if executable:
+        path = os.path.join(plugin_dir, executable)
+        if os.path.isfile(path):
+            return [os.path.abspath(path)]
+
+    sources = [os.path.join(plugin_dir, 'plugin.py')]
+    if not os.path.isfile(sources[0]):
+        sources = glob.glob(os.path.join(plugin_dir, '*.py'))
+    if len(sources) != 1:
+        raise FileNotFoundError(f'Cannot find the executable or the Python source of the plugin in {plugin_dir}')
+    return [sys.executable, os.path.abspath(sources[0])]
+
+
+def process_rss(pid: int) -> Optional[int]:
+    ''' Gets the resident set size of a process.
+
+    Uses psutil when it is installed, and /proc otherwise.
+
+    Args:
+        pid: The process id
+
+    Returns:
+        The resident set size in bytes, or `None` if it cannot be read
+    '''
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        pass
+    except Exception:
+        return None
+
+    try:
+        with open(f'/proc/{pid}/status') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class PluginHost:
+    ''' Runs one plugin process and talks to it like the G-Assist plugin manager.
+
+    Commands are answered one at a time, as the plugin manager sends them.
+
+    Example:
+
+        with PluginHost('plugins/examples/weather') as host:
+            result = host.call('get_weather_info', {'city': 'Santa Clara'})
+            print(result.response, result.latency)
+
+    Attributes:
+        plugin_dir: The plugin's directory
+        manifest: The plugin's manifest
+        framing: Name of the framing negotiated at initialize
+    '''
+
+    def __init__(self, plugin_dir: str, command: Optional[Sequence[str]] = None,
+                 framings: Sequence[str] = DEFAULT_FRAMINGS, timeout: float = DEFAULT_TIMEOUT,
+                 env: Optional[Dict[str, str]] = None) -> None:
+        self.plugin_dir = os.path.abspath(plugin_dir)
+        self.manifest = load_manifest(self.plugin_dir)
+        self.framing = END_MARKER_FRAMING
+        self.timeout = timeout
+        self._command = list(command) if command else plugin_command(self.plugin_dir, self.manifest)
+        self._framings = list(framings)
+        self._env = env
+        self._process: Optional[subprocess.Popen] = None
+        self._writer: Framing = _ResponseFraming()
+        self._responses: queue.Queue = queue.Queue()
+        self._reader: Optional[threading.Thread] = None
+
+    @property
+    def functions(self) -> List[str]:
+        ''' Names of the functions declared in the manifest. '''
+        return [function['name'] for function in self.manifest.get('functions', [])]
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process else None
+
+    def rss(self) -> Optional[int]:
+        ''' Gets the plugin's resident set size in bytes, if it can be read. '''
+        return process_rss(self._process.pid) if self._process else None
+
+    def start(self) -> CallResult:
+        ''' Starts the plugin and sends `initialize`.
+
+        Framings passed to the constructor are offered with `initialize`, and
+        the one the plugin picks is used from then on.
+
+        Returns:
+            The result of `initialize`
+        '''
+        env = dict(os.environ if self._env is None else self._env)
+        # Run plugins from a source checkout against this copy of the runtime
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [SDK_DIR, env.get('PYTHONPATH')]))
+        self._process = subprocess.Popen(self._command, cwd=self.plugin_dir, env=env, bufsize=0,
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self._reader = threading.Thread(target=self._read_responses, name='plugin-host-reader', daemon=True)
+        self._reader.start()
+
+        command = {TOOL_CALLS_PROPERTY: [{FUNCTION_PROPERTY: INITIALIZE_COMMAND}]}
+        if self._framings:
+            command[FRAMING_PROPERTY] = self._framings
+        result = self.send(command)[0]
+        framing = result.response.get(FRAMING_PROPERTY)
+        if framing:
+            self.framing = framing
+            self._writer = create_framing(framing)
+        return result
+
+    def send(self, command: dict) -> List[CallResult]:
+        ''' Sends a command and waits for its final responses.
+
+        In the end-marker framing the command is answered once, with the
+        response of its last tool call; in a negotiated framing each tool call
+        is answered.
+
+        Args:
+            command: The command, as the plugin manager sends it
+
+        Returns:
+            The result of each tool call answered, in order
+
+        Raises:
+            TimeoutError: If the plugin does not answer within the timeout
+            ConnectionError: If the plugin exits before answering
+        '''
+        funcs = [tool_call.get(FUNCTION_PROPERTY, '') for tool_call in command.get(TOOL_CALLS_PROPERTY, [])]
+        if self.framing == END_MARKER_FRAMING:
+            funcs = funcs[-1:]
+        start = time.perf_counter()
+        self._process.stdin.write(self._writer.frame(dumps(command)))
+        self._process.stdin.flush()
+
+        results = []
+        for func in funcs or ['']:
+            messages = []
+            first_message = None
+            while True:
+                try:
+                    response, received = self._responses.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f'No response to {func} within {self.timeout} seconds')
+                if response is None:
+                    # Leave the end of the responses for any later call
+                    self._responses.put((None, received))
+                    raise ConnectionError(f'Plugin exited while running {func}')
+                if 'success' in response:
+                    break
+                # Responses without a success flag are partial messages
+                messages.append(response.get('message', ''))
+                if first_message is None:
+                    first_message = received - start
+            results.append(CallResult(func, response, messages, received - start, first_message))
+        return results
+
+    def call(self, func: str, properties: Optional[dict] = None, messages: Optional[list] = None,
+             system_info: Optional[str] = None) -> CallResult:
+        ''' Calls one plugin function.
+
+        Args:
+            func: Function name
+            properties: Function parameters
+            messages: Conversation history sent as context
+            system_info: System information sent with the call
+
+        Returns:
+            The result of the call
+        '''
+        tool_call = {FUNCTION_PROPERTY: func, 'properties': properties or {}}
+        command = {TOOL_CALLS_PROPERTY: [tool_call]}
+        if messages is not None:
+            command[CONTEXT_PROPERTY] = messages
+        if system_info is not None:
+            command[SYSTEM_INFO_PROPERTY] = system_info
+        return self.send(command)[0]
+
+    def stop(self) -> Optional[int]:
+        ''' Sends `shutdown` and waits for the plugin to exit, killing it if it does not.
+
+        Returns:
+            The plugin's exit code
+        '''
+        if self._process is None:
+            return None
+        if self._process.poll() is None:
+            try:
+                self.send({TOOL_CALLS_PROPERTY: [{FUNCTION_PROPERTY: SHUTDOWN_COMMAND}]})
+            except (OSError, TimeoutError) as e:
+                logger.warning(f'Plugin did not answer shutdown: {e}')
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=self.timeout)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+        return self._process.wait()
+
+    def __enter__(self) -> 'PluginHost':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _read_responses(self) -> None:
+        ''' Decodes responses from the plugin into the response queue until it exits. '''
+        reader = _ResponseFraming()
+        stdout = self._process.stdout
+
+        def readinto(buffer: memoryview) -> Optional[int]:
+            return stdout.readinto(buffer) or None
+
+        try:
+            while True:
+                message = reader.read_message(readinto)
+                if message is None:
+                    break
+                response = loads(message)
+                self._responses.put((response, time.perf_counter()))
+                framing = response.get(FRAMING_PROPERTY) if isinstance(response, dict) else None
+                if framing and reader.name == END_MARKER_FRAMING:
+                    # The plugin switches right after its initialize response
+                    reader = create_framing(framing)
+        except (OSError, ValueError) as e:
+            logger.error(f'Error reading from plugin: {e}')
+        self._responses.put((None, time.perf_counter()))
+
+
+def load_trace(path: str) -> List[dict]:
+    ''' Reads a command trace.
+
+    `initialize` and `shutdown` are dropped, since the host sends its own.
+
+    Args:
+        path: JSON Lines file with one command per line
+
+    Returns:
+        The commands, in order
+    '''
+    commands = []
+    with open(path, 'rb') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            command = loads(line)
+            tool_calls = [tool_call for tool_call in command.get(TOOL_CALLS_PROPERTY, [])
+                          if tool_call.get(FUNCTION_PROPERTY) not in (INITIALIZE_COMMAND, SHUTDOWN_COMMAND)]
+            if tool_calls:
+                commands.append(dict(command, **{TOOL_CALLS_PROPERTY: tool_calls}))
+    return commands
+
+
+class RssSampler:
+    ''' Samples a plugin's resident set size on a background thread.
+
+    Attributes:
+        samples: (seconds since start, bytes) pairs
+    '''
+
+    def __init__(self, host: PluginHost, interval: float = 0.5) -> None:
+        self.samples: List[tuple] = []
+        self._host = host
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='plugin-host-rss', daemon=True)
+        self._start = time.perf_counter()
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.ident is not None:
+            self._thread.join()
+            self._sample()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self._interval)
+
+    def _sample(self) -> None:
+        rss = self._host.rss()
+        if rss is not None:
+            self.samples.append((time.perf_counter() - self._start, rss))
+
+
+def percentile(samples: Sequence[float], q: float) -> Optional[float]:
+    ''' Gets a percentile of a set of samples by the nearest-rank method. '''
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(results: Iterable[CallResult], elapsed: float, rss: Sequence[tuple]) -> dict:
+    ''' Summarizes a replay: per-function latency, throughput and memory use.
+
+    Args:
+        results: Results of every timed call
+        elapsed: Wall-clock seconds for the timed calls
+        rss: RSS samples from RssSampler
+
+    Returns:
+        The summary
+    '''
+    by_function: Dict[str, List[CallResult]] = {}
+    for result in results:
+        by_function.setdefault(result.func, []).append(result)
+
+    functions = []
+    for func, calls in by_function.items():
+        latencies = [call.latency for call in calls]
+        first = [call.first_message for call in calls if call.first_message is not None]
+        summary = {
+            'function': func,
+            'calls': len(calls),
+            'failures': sum(not call.success for call in calls),
+        }
+        for q in (50, 95, 99):
+            summary[f'p{q}_ms'] = _ms(percentile(latencies, q))
+        summary['first_message_p50_ms'] = _ms(percentile(first, 50))
+        functions.append(summary)
+
+    calls = sum(summary['calls'] for summary in functions)
+    memory = [sample[1] for sample in rss]
+    return {
+        'calls': calls,
+        'elapsed_s': elapsed,
+        'calls_per_second': calls / elapsed if elapsed > 0 else None,
+        'rss_start_mb': _mb(memory[0]) if memory else None,
+        'rss_peak_mb': _mb(max(memory)) if memory else None,
+        'rss_end_mb': _mb(memory[-1]) if memory else None,
+        'functions': functions,
+        'rss_samples': [{'t_s': t, 'rss_mb': _mb(value)} for t, value in rss],
+    }
+
+
+def print_summary(summary: dict) -> None:
+    ''' Prints a summary as a table of functions followed by the totals. '''
+    columns = ['function', 'calls', 'failures', 'p50_ms', 'p95_ms', 'p99_ms', 'first_message_p50_ms']
+    rows = [[_format(function.get(column)) for column in columns] for function in summary['functions']]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(value.rjust(width) for value, width in zip(row, widths)))
+    print()
+    for key in ('calls', 'elapsed_s', 'calls_per_second', 'rss_start_mb', 'rss_peak_mb', 'rss_end_mb'):
+        print(f'{key}: {_format(summary[key])}')
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else seconds * 1000
+
+
+def _mb(size: int) -> float:
+    return size / (1 << 20)
+
+
+def _format(value: object) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.2f}'
+    return str(value)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ''' Replays a trace against a plugin and reports latency, throughput and memory use.
+
+    Returns:
+        0 if every call succeeded; 1 otherwise
+    '''
+    parser = argparse.ArgumentParser(description='Run a G-Assist plugin outside G-Assist and measure it.')
+    parser.add_argument('plugin_dir', help='directory holding the plugin and its manifest.json')
+    parser.add_argument('--command', help='command line that starts the plugin, instead of the manifest executable')
+    parser.add_argument('--trace', help='JSON Lines file of commands to replay')
+    parser.add_argument('--function', help='function to call, instead of a trace')
+    parser.add_argument('--properties', default='{}', help='JSON parameters for --function')
+    parser.add_argument('--iterations', type=int, default=1, help='times to replay the trace')
+    parser.add_argument('--warmup', type=int, default=0, help='untimed replays before the timed ones')
+    parser.add_argument('--framing', action='append', choices=[END_MARKER_FRAMING, LENGTH_PREFIXED_FRAMING, NDJSON_FRAMING],
+                        help='framing to offer at initialize; repeat in order of preference (default: length-prefixed, ndjson)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='seconds to wait for each response')
+    parser.add_argument('--sample-interval', type=float, default=0.5, help='seconds between RSS samples')
+    parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        commands = load_trace(args.trace)
+    elif args.function:
+        commands = [{TOOL_CALLS_PROPERTY: [{FUNCTION_PROPERTY: args.function,
+                                            'properties': json.loads(args.properties)}]}]
+    else:
+        parser.error('one of --trace or --function is required')
+
+    framings = args.framing or DEFAULT_FRAMINGS
+    host = PluginHost(args.plugin_dir, command=shlex.split(args.command) if args.command else None,
+                      framings=[framing for framing in framings if framing != END_MARKER_FRAMING],
+                      timeout=args.timeout)
+    known = set(host.functions)
+    for command in commands:
+        for tool_call in command[TOOL_CALLS_PROPERTY]:
+            if tool_call.get(FUNCTION_PROPERTY) not in known:
+                print(f'warning: {tool_call.get(FUNCTION_PROPERTY)} is not in the manifest', file=sys.stderr)
+
+    sampler = RssSampler(host, args.sample_interval)
+    results = []
+    try:
+        initialize = host.start()
+        if not initialize.success:
+            print(f'warning: initialize failed: {initialize.response}', file=sys.stderr)
+        sampler.start()
+        for _ in range(args.warmup):
+            for command in commands:
+                host.send(command)
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for command in commands:
+                results.extend(host.send(command))
+        elapsed = time.perf_counter() - start
+    except (ConnectionError, TimeoutError) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+    finally:
+        sampler.stop()
+        host.stop()
+
+    summary = summarize(results, elapsed, sampler.samples)
+    summary['framing'] = host.framing
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+    return 0 if all(result.success for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,476 @@
+''' Asyncio runtime for G-Assist plugins.
+
+Plugins register command handlers on a Plugin with a decorator, and the
+runtime runs the read/dispatch/respond loop that every plugin used to copy.
+Commands are read from the transport in a worker thread, so the event loop
+stays free for handlers doing concurrent network I/O and for background tasks
+running between commands.
+
+Example:
+
+    plugin = Plugin('weather')
+
+    @plugin.command('get_weather_info')
+    async def get_weather_info(params, context, system_info):
+        await plugin.stream('Checking the weather...')
+        ...
+        return success_response('Sunny, 21 degrees Celsius')
+
+    if __name__ == '__main__':
+        plugin.run()
+
+Handlers may be coroutine functions or plain functions; plain functions run in
+a worker thread so they cannot stall the event loop. Handlers are passed as
+many of the tool call's `params`, `context` (the `messages` history) and
+`system_info` as they declare positional parameters for, and return a response
+dictionary.
+
+The tool calls of one command run one after another by default. Plugins whose
+handlers are independent can pass `concurrency` to run up to that many at once.
+In the original end-marker framing a command gets one final response, that of
+its last tool call, as plugins wrote it before the runtime; plugin managers that
+negotiate another framing get one per tool call, in order.
+'''
+import asyncio
+import inspect
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set
+
+from .codec import END_MARKER_FRAMING, FRAMING_PROPERTY, dumps, loads, negotiate
+from .transport import Transport, default_transport
+
+# Data Types
+Response = Dict[str, Any]
+Handler = Callable[..., Any]
+
+TOOL_CALLS_PROPERTY = 'tool_calls'
+FUNCTION_PROPERTY = 'func'
+PARAMS_PROPERTIES = ('params', 'properties')
+CONTEXT_PROPERTY = 'messages'
+SYSTEM_INFO_PROPERTY = 'system_info'
+INITIALIZE_COMMAND = 'initialize'
+SHUTDOWN_COMMAND = 'shutdown'
+
+# Names a file every received command is appended to, for replay by gassist_plugin.host
+TRACE_ENVIRONMENT_VARIABLE = 'GASSIST_PLUGIN_TRACE'
+
+logger = logging.getLogger(__name__)
+
+
+class ToolCall(NamedTuple):
+    ''' One function call requested by the plugin manager. '''
+    func: str
+    params: dict
+    context: Optional[list]
+    system_info: Optional[Any]
+
+
+def success_response(message: Optional[str] = None) -> Response:
+    ''' Generates a response indicating success.
+
+    Args:
+        message: String to be returned in the response (optional)
+
+    Returns:
+        A success response with the attached message
+    '''
+    response = {'success': True}
+    if message:
+        response['message'] = message
+    return response
+
+
+def failure_response(message: Optional[str] = None) -> Response:
+    ''' Generates a response indicating failure.
+
+    Args:
+        message: String to be returned in the response (optional)
+
+    Returns:
+        A failure response with the attached message
+    '''
+    response = {'success': False}
+    if message:
+        response['message'] = message
+    return response
+
+
+def message_response(message: str) -> Response:
+    ''' Generates a partial response, sent while a command is still running.
+
+    Args:
+        message: String to be shown to the user
+
+    Returns:
+        A message response
+    '''
+    return {'message': message}
+
+
+# Handlers of the commands every plugin answers, until it registers its own
+_DEFAULT_HANDLERS: Dict[str, Handler] = {
+    INITIALIZE_COMMAND: lambda: success_response('initialize success.'),
+    SHUTDOWN_COMMAND: lambda: success_response('shutdown success.'),
+}
+
+
+def parse_tool_calls(command: dict) -> List[ToolCall]:
+    ''' Extracts the tool calls from a command.
+
+    Parameters are taken from `params` or `properties` of each tool call,
+    falling back to the command itself, since plugins have received both, and
+    default to an empty dictionary.
+
+    Args:
+        command: The decoded command
+
+    Returns:
+        The tool calls, in order
+
+    Raises:
+        ValueError: If the command has no tool calls or a tool call has no function
+    '''
+    if not isinstance(command, dict) or TOOL_CALLS_PROPERTY not in command:
+        raise ValueError('missing tool_calls property')
+    if not command[TOOL_CALLS_PROPERTY]:
+        raise ValueError('empty tool_calls property')
+
+    tool_calls = []
+    for tool_call in command[TOOL_CALLS_PROPERTY]:
+        if not isinstance(tool_call, dict) or FUNCTION_PROPERTY not in tool_call:
+            raise ValueError('missing function property')
+        params = None
+        for source in (tool_call, command):
+            for name in PARAMS_PROPERTIES:
+                if params is None and name in source:
+                    params = source[name]
+        tool_calls.append(ToolCall(
+            tool_call[FUNCTION_PROPERTY],
+            params if params is not None else {},
+            tool_call.get(CONTEXT_PROPERTY, command.get(CONTEXT_PROPERTY)),
+            tool_call.get(SYSTEM_INFO_PROPERTY, command.get(SYSTEM_INFO_PROPERTY)),
+        ))
+    return tool_calls
+
+
+class Plugin:
+    ''' A G-Assist plugin: its command handlers and the loop that serves them.
+
+    Attributes:
+        name: Plugin name, used in log messages
+        error_message: Prefix of failure messages generated by the runtime
+        concurrency: Most tool calls of one command run at the same time
+        ignore_case: Whether function names are matched case-insensitively
+    '''
+
+    def __init__(self, name: str, transport: Optional[Transport] = None,
+                 error_message: str = 'Plugin Error!', concurrency: int = 1,
+                 ignore_case: bool = False) -> None:
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self.name = name
+        self.error_message = error_message
+        self.concurrency = concurrency
+        self.ignore_case = ignore_case
+        self._transport = transport
+        self._commands: Dict[str, Handler] = {}
+        self._arg_counts: Dict[str, int] = {}
+        for func, handler in _DEFAULT_HANDLERS.items():
+            self.command(func)(handler)
+        self._background: List[Callable[[], Awaitable[None]]] = []
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._call_limit: Optional[asyncio.Semaphore] = None
+
+    @property
+    def transport(self) -> Transport:
+        ''' The transport commands are read from and responses written to. '''
+        if self._transport is None:
+            self._transport = default_transport()
+        return self._transport
+
+    def command(self, name: Optional[str] = None) -> Callable[[Handler], Handler]:
+        ''' Decorator registering a command handler.
+
+        Registering `initialize` or `shutdown` replaces the default handler.
+
+        Args:
+            name: Function name the handler answers; defaults to the handler's name
+
+        Returns:
+            The decorator, which returns the handler unchanged
+        '''
+        def register(handler: Handler) -> Handler:
+            func = name or handler.__name__
+            if self.ignore_case:
+                func = func.lower()
+            self._commands[func] = handler
+            self._arg_counts[func] = _count_args(handler)
+            return handler
+        return register
+
+    def remove_command(self, name: str) -> None:
+        ''' Unregisters a command handler, so its function is answered as unknown.
+
+        Removing `initialize` or `shutdown` restores the default handler.
+
+        Args:
+            name: Function name the handler answers
+        '''
+        func = name.lower() if self.ignore_case else name
+        self._commands.pop(func, None)
+        self._arg_counts.pop(func, None)
+        if func in _DEFAULT_HANDLERS:
+            self.command(func)(_DEFAULT_HANDLERS[func])
+
+    def background(self, fn: Callable[[], Awaitable[None]]) -> Callable[[], Awaitable[None]]:
+        ''' Decorator registering a coroutine function to run for the life of the plugin.
+
+        Background tasks start when the plugin starts serving and are
+        cancelled once it stops.
+
+        Args:
+            fn: Coroutine function taking no arguments
+
+        Returns:
+            The function, unchanged
+        '''
+        self._background.append(fn)
+        return fn
+
+    def spawn(self, coro: Awaitable[Any]) -> asyncio.Task:
+        ''' Runs a coroutine in the background, e.g. work that outlives a command.
+
+        The task is cancelled when the plugin stops. Must be called from the
+        event loop.
+
+        Args:
+            coro: The coroutine to run
+
+        Returns:
+            The task running the coroutine
+        '''
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    async def stream(self, message: str) -> None:
+        ''' Sends part of a response while a command is still running.
+
+        Args:
+            message: Text to show to the user
+        '''
+        await self.write(message_response(message))
+
+    def stream_threadsafe(self, message: str) -> None:
+        ''' Sends part of a response from a handler running in a worker thread.
+
+        Args:
+            message: Text to show to the user
+        '''
+        asyncio.run_coroutine_threadsafe(self.stream(message), self._loop).result()
+
+    async def write(self, response: Response) -> None:
+        ''' Writes a response to the transport.
+
+        Args:
+            response: The response to write
+        '''
+        message = dumps(response)
+        async with self._write_lock:
+            await asyncio.to_thread(self.transport.write_message, message)
+
+    async def call(self, tool_call: ToolCall) -> Response:
+        ''' Runs the handler of one tool call.
+
+        Args:
+            tool_call: The tool call to run
+
+        Returns:
+            The handler's response, or a failure response if there is no
+            handler or it raised
+        '''
+        handler = self._commands.get(tool_call.func)
+        if handler is None:
+            logger.warning(f'Unknown command: {tool_call.func}')
+            return failure_response(f'{self.error_message} Unknown command: {tool_call.func}')
+
+        args = (tool_call.params, tool_call.context, tool_call.system_info)[:self._arg_counts[tool_call.func]]
+        try:
+            if inspect.iscoroutinefunction(handler):
+                response = await handler(*args)
+            else:
+                response = await asyncio.to_thread(handler, *args)
+        except Exception as e:
+            logger.exception(f'Error executing {tool_call.func}')
+            return failure_response(f'{self.error_message} {str(e)}')
+        return response if response is not None else success_response()
+
+    async def handle(self, command: dict) -> bool:
+        ''' Runs every tool call of a command and writes its final response.
+
+        In the end-marker framing the command gets exactly one final response,
+        that of its last tool call. In a negotiated framing each tool call gets
+        one, in order, written as soon as it and every response before it are
+        ready.
+
+        With `concurrency` above 1, consecutive tool calls run at the same time,
+        up to `concurrency` at once. `initialize` and `shutdown` always run on
+        their own, after the tool calls before them finish and before the ones
+        after them start.
+
+        Args:
+            command: The decoded command
+
+        Returns:
+            True if the command asked the plugin to shut down
+        '''
+        try:
+            tool_calls = parse_tool_calls(command)
+        except ValueError as e:
+            logger.warning(f'Malformed input: {str(e)}')
+            await self.write(failure_response(f'{self.error_message} Malformed input.'))
+            return False
+        if self.ignore_case:
+            tool_calls = [tool_call._replace(func=tool_call.func.lower()) for tool_call in tool_calls]
+
+        # Plugin managers speaking the original protocol read one response per command
+        per_call = self.transport.framing_name != END_MARKER_FRAMING
+        shutdown = False
+        framing = None
+        response = None
+        for batch in self._batches(tool_calls):
+            calls = [asyncio.ensure_future(self._call_limited(tool_call)) for tool_call in batch]
+            try:
+                for tool_call, call in zip(batch, calls):
+                    response = await call
+                    if tool_call.func == INITIALIZE_COMMAND:
+                        framing = self._negotiate_framing(command) or framing
+                    shutdown = shutdown or tool_call.func == SHUTDOWN_COMMAND
+                    if per_call:
+                        await self._respond(response, framing)
+                        framing = None
+            finally:
+                # Only left running if writing a response failed
+                for call in calls:
+                    call.cancel()
+        if not per_call:
+            await self._respond(response, framing)
+        return shutdown
+
+    async def serve(self) -> int:
+        ''' Serves commands until the shutdown command or the pipe closes.
+
+        Returns:
+            0 if no errors occurred during execution; non-zero if an error occurred
+        '''
+        self._loop = asyncio.get_running_loop()
+        self._write_lock = asyncio.Lock()
+        self._call_limit = asyncio.Semaphore(self.concurrency)
+        for fn in self._background:
+            self.spawn(fn())
+
+        logger.info(f'{self.name} plugin started')
+        trace_path = os.environ.get(TRACE_ENVIRONMENT_VARIABLE)
+        trace = open(trace_path, 'ab') if trace_path else None
+        status = 0
+        try:
+            while True:
+                try:
+                    message = await asyncio.to_thread(self.transport.read_message)
+                except OSError as e:
+                    logger.error(f'Error reading from command pipe: {str(e)}')
+                    status = 1
+                    break
+                if message is None:
+                    logger.info('Command pipe closed')
+                    break
+
+                try:
+                    command = loads(message)
+                except ValueError:
+                    logger.error('Failed to decode JSON input')
+                    continue
+
+                logger.info('Received input: %s', command)
+                if trace is not None:
+                    # One command per line, for replay by gassist_plugin.host
+                    trace.write(dumps(command) + b'\n')
+                    trace.flush()
+                if await self.handle(command):
+                    logger.info('Shutdown command received, terminating plugin')
+                    break
+        finally:
+            if trace is not None:
+                trace.close()
+            for task in list(self._tasks):
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        logger.info(f'{self.name} plugin stopped')
+        return status
+
+    def run(self) -> int:
+        ''' Runs the plugin on a new event loop until it shuts down.
+
+        Returns:
+            0 if no errors occurred during execution; non-zero if an error occurred
+        '''
+        return asyncio.run(self.serve())
+
+    def _batches(self, tool_calls: List[ToolCall]) -> List[List[ToolCall]]:
+        ''' Groups tool calls into runs that may execute at the same time. '''
+        batches: List[List[ToolCall]] = []
+        for tool_call in tool_calls:
+            alone = self.concurrency == 1 or tool_call.func in (INITIALIZE_COMMAND, SHUTDOWN_COMMAND)
+            if alone or not batches or batches[-1][-1].func in (INITIALIZE_COMMAND, SHUTDOWN_COMMAND):
+                batches.append([tool_call])
+            else:
+                batches[-1].append(tool_call)
+        return batches
+
+    async def _call_limited(self, tool_call: ToolCall) -> Response:
+        ''' Runs a tool call once fewer than `concurrency` others are running. '''
+        async with self._call_limit:
+            logger.info(f'Processing command: {tool_call.func}')
+            return await self.call(tool_call)
+
+    async def _respond(self, response: Response, framing: Optional[str]) -> None:
+        ''' Writes a final response, then switches to the framing negotiated with it, if any. '''
+        if framing is not None:
+            response = dict(response, **{FRAMING_PROPERTY: framing})
+        logger.info('Sending response: %s', response)
+        await self.write(response)
+        if framing is not None:
+            # The response carrying the framing is the last message in the old one
+            logger.info(f'Switching to {framing} framing')
+            self.transport.set_framing(framing)
+
+    def _negotiate_framing(self, command: dict) -> Optional[str]:
+        ''' Picks a framing from those offered alongside initialize, if any. '''
+        offered = command.get(FRAMING_PROPERTY)
+        if isinstance(offered, str):
+            offered = [offered]
+        if not isinstance(offered, list):
+            return None
+        return negotiate(offered, self.transport.framings)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        ''' Forgets a finished background task, logging any error it raised. '''
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f'Background task failed: {task.exception()!r}')
+
+
+def _count_args(handler: Handler) -> int:
+    ''' Counts the tool call arguments (up to 3) a handler accepts positionally. '''
+    count = 0
+    for parameter in inspect.signature(handler).parameters.values():
+        if parameter.kind == inspect.Parameter.VAR_POSITIONAL:
+            return 3
+        if parameter.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD):
+            count += 1
+    return min(count, 3)
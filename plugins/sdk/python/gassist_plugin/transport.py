@@ -0,0 +1,234 @@
+''' Pipe transports for G-Assist plugins.
+
+A transport moves whole messages between a plugin and the G-Assist plugin
+manager. The plugin runtime only talks to the Transport interface, so the same
+plugin code runs over:
+
+- Win32PipeTransport: the standard handles of a plugin spawned by G-Assist
+- PosixPipeTransport: standard input and output on Linux and macOS, for local
+  test harnesses and benchmarks
+- MemoryTransport: in-process queues, for driving a plugin from tests
+
+Set the GASSIST_PLUGIN_TRANSPORT environment variable to "win32" or "posix" to
+override the transport chosen for the current platform.
+'''
+import ctypes
+import io
+import os
+import queue
+from typing import Optional, Tuple
+
+from .codec import END_MARKER, END_MARKER_FRAMING, FRAMINGS, EndMarkerFraming, Framing, create_framing
+
+STD_INPUT_HANDLE = -10
+STD_OUTPUT_HANDLE = -11
+ERROR_BROKEN_PIPE = 109
+
+
+class Transport:
+    ''' Interface for moving whole messages to and from the plugin manager.
+
+    Attributes:
+        framings: Names of the framings the transport can switch to
+        framing_name: Name of the framing in use
+    '''
+
+    framings: Tuple[str, ...] = (END_MARKER_FRAMING,)
+    framing_name = END_MARKER_FRAMING
+
+    def read_message(self) -> Optional[bytes]:
+        ''' Reads the next message, blocking until it arrives.
+
+        Returns:
+            The message, or `None` once the plugin manager has closed the pipe
+        '''
+        raise NotImplementedError
+
+    def write_message(self, message: bytes) -> None:
+        ''' Writes one message.
+
+        Args:
+            message: The encoded message
+        '''
+        raise NotImplementedError
+
+    def set_framing(self, name: str) -> None:
+        ''' Switches the framing of every later message in both directions.
+
+        Args:
+            name: One of the framings the transport supports
+
+        Raises:
+            ValueError: If the transport does not support the framing
+        '''
+        if name not in self.framings:
+            raise ValueError(f'Unsupported framing: {name}')
+        self.framing_name = name
+
+
+class PipeTransport(Transport):
+    ''' Message framing shared by the transports over byte pipes.
+
+    Messages are split and framed by a codec.Framing, which starts as the
+    original end-marker framing. Subclasses provide the raw reads and writes.
+    '''
+
+    framings = tuple(FRAMINGS)
+
+    def __init__(self, end_marker: bytes = END_MARKER) -> None:
+        self.end_marker = end_marker
+        self.framing: Framing = EndMarkerFraming(end_marker)
+
+    @property
+    def framing_name(self) -> str:
+        return self.framing.name
+
+    def set_framing(self, name: str) -> None:
+        if name == END_MARKER_FRAMING:
+            self.framing = EndMarkerFraming(self.end_marker)
+        else:
+            self.framing = create_framing(name)
+
+    def read_message(self) -> Optional[bytes]:
+        return self.framing.read_message(self._readinto)
+
+    def write_message(self, message: bytes) -> None:
+        self._write(self.framing.frame(message))
+
+    def _readinto(self, buffer: memoryview) -> Optional[int]:
+        ''' Reads up to `len(buffer)` bytes into `buffer`.
+
+        Returns:
+            The number of bytes read, or `None` at end of file
+        '''
+        raise NotImplementedError
+
+    def _write(self, data: bytes) -> None:
+        ''' Writes all of `data`. '''
+        raise NotImplementedError
+
+
+class Win32PipeTransport(PipeTransport):
+    ''' Transport over the standard input and output handles on Windows. '''
+
+    def __init__(self, end_marker: bytes = END_MARKER) -> None:
+        super().__init__(end_marker)
+        from ctypes import windll, wintypes
+        self._kernel32 = windll.kernel32
+        self._wintypes = wintypes
+        self._input = self._kernel32.GetStdHandle(STD_INPUT_HANDLE)
+        self._output = self._kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
+        self._message_bytes = wintypes.DWORD()
+
+    def _readinto(self, buffer: memoryview) -> Optional[int]:
+        size = len(buffer)
+        success = self._kernel32.ReadFile(
+            self._input,
+            (ctypes.c_char * size).from_buffer(buffer),
+            size,
+            ctypes.byref(self._message_bytes),
+            None
+        )
+        if not success:
+            error = ctypes.GetLastError()
+            if error == ERROR_BROKEN_PIPE:
+                return None
+            raise ctypes.WinError(error)
+        return self._message_bytes.value
+
+    def _write(self, data: bytes) -> None:
+        bytes_written = self._wintypes.DWORD()
+        success = self._kernel32.WriteFile(
+            self._output,
+            data,
+            len(data),
+            ctypes.byref(bytes_written),
+            None
+        )
+        if not success:
+            raise ctypes.WinError(ctypes.GetLastError())
+
+
+class PosixPipeTransport(PipeTransport):
+    ''' Transport over file descriptors, read with readinto and written with os.write.
+
+    Pipes may return a large message in several short reads, so a message
+    over one pipe buffer can be split; the plugin host keeps messages small
+    enough or writes them in one call.
+    '''
+
+    def __init__(self, read_fd: int = 0, write_fd: int = 1, end_marker: bytes = END_MARKER) -> None:
+        super().__init__(end_marker)
+        self._reader = io.FileIO(read_fd, 'rb', closefd=False)
+        self._write_fd = write_fd
+
+    def _readinto(self, buffer: memoryview) -> Optional[int]:
+        count = self._reader.readinto(buffer)
+        return count if count else None
+
+    def _write(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            written = os.write(self._write_fd, view)
+            view = view[written:]
+
+
+class MemoryTransport(Transport):
+    ''' Transport over in-process queues, for driving a plugin from tests.
+
+    Commands passed to send_command are read by the plugin, and responses the
+    plugin writes are returned by receive_response. Messages are passed whole,
+    so every framing is accepted and none changes what is queued.
+    '''
+
+    framings = tuple(FRAMINGS)
+
+    def __init__(self) -> None:
+        self._commands: queue.Queue = queue.Queue()
+        self._responses: queue.Queue = queue.Queue()
+
+    def send_command(self, message: bytes) -> None:
+        ''' Queues a command for the plugin.
+
+        Args:
+            message: The encoded command
+        '''
+        self._commands.put(message)
+
+    def close(self) -> None:
+        ''' Closes the command pipe; the plugin stops once it has read every command. '''
+        self._commands.put(None)
+
+    def receive_response(self, timeout: Optional[float] = None) -> bytes:
+        ''' Waits for the next response written by the plugin.
+
+        Args:
+            timeout: Seconds to wait, or None to wait forever
+
+        Returns:
+            The encoded response
+
+        Raises:
+            queue.Empty: If no response arrives within the timeout
+        '''
+        return self._responses.get(timeout=timeout)
+
+    def read_message(self) -> Optional[bytes]:
+        return self._commands.get()
+
+    def write_message(self, message: bytes) -> None:
+        self._responses.put(message)
+
+
+def default_transport() -> Transport:
+    ''' Creates the transport used when a plugin does not supply one.
+
+    Returns:
+        A transport over the standard handles of the plugin process
+    '''
+    kind = os.environ.get('GASSIST_PLUGIN_TRANSPORT') or ('win32' if os.name == 'nt' else 'posix')
+    if kind == 'win32':
+        return Win32PipeTransport()
+    if kind == 'posix':
+        return PosixPipeTransport()
+    raise ValueError(f'Unknown GASSIST_PLUGIN_TRANSPORT: {kind}')
@@ -0,0 +1,15 @@
+from setuptools import setup, find_packages
+
+setup(
+    name="gassist-plugin",               # Name of the package
+    version="0.0.1",                  # Version of your package
+    description="Shared runtime for G-Assist Python plugins",  # Short description
+    url="",                           # URL to the project (e.g., GitHub)
+    packages=find_packages(),         # Automatically find the package(s) in the project
+    python_requires=">=3.9",          # asyncio.to_thread
+    install_requires=[],
+    extras_require={
+        "fast": ["orjson"],           # Faster JSON for long message histories
+    },
+    zip_safe=False
+)
@@ -0,0 +1,52 @@
+"""
+Tests for reading messages in each framing.
+"""
+
+import io
+import os
+import struct
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gassist_plugin.codec import BUFFER_SIZE, FRAMINGS, MAX_MESSAGE_SIZE, LengthPrefixedFraming, create_framing
+
+
+def reader(data: bytes):
+    """Returns a raw read over `data` that reports end of file once it is consumed."""
+    stream = io.BytesIO(data)
+
+    def readinto(buffer: memoryview):
+        return stream.readinto(buffer) or None
+    return readinto
+
+
+class FramingTest(unittest.TestCase):
+
+    def test_messages_round_trip(self) -> None:
+        messages = [b'{}', b'x' * (BUFFER_SIZE * 3 + 1), b'{"a": 1}']
+        for name in FRAMINGS:
+            if name == 'end-marker':
+                continue  # commands in this framing are delimited by short reads
+            with self.subTest(framing=name):
+                framing = create_framing(name)
+                readinto = reader(b''.join(framing.frame(message) for message in messages))
+                self.assertEqual([framing.read_message(readinto) for _ in messages], messages)
+                self.assertIsNone(framing.read_message(readinto))
+
+    def test_length_prefix_over_maximum_is_rejected(self) -> None:
+        framing = LengthPrefixedFraming()
+        readinto = reader(struct.pack('>I', MAX_MESSAGE_SIZE + 1) + b'{}')
+        with self.assertRaises(OSError):
+            framing.read_message(readinto)
+        self.assertEqual(len(framing._buffer), BUFFER_SIZE)
+
+    def test_pipe_closed_mid_message(self) -> None:
+        framing = LengthPrefixedFraming()
+        with self.assertRaises(OSError):
+            framing.read_message(reader(struct.pack('>I', 10) + b'{}'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests for dispatching tool calls to command handlers.
+"""
+
+import json
+import os
+import queue
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gassist_plugin import MemoryTransport, Plugin, success_response
+
+
+def run_commands(plugin: Plugin, *funcs: str) -> list:
+    """Runs one command per function name and returns the decoded responses."""
+    return serve(plugin, *({'tool_calls': [{'func': func}]} for func in funcs))
+
+
+def serve(plugin: Plugin, *commands: dict) -> list:
+    """Runs the commands and returns the decoded responses."""
+    transport = plugin.transport
+    for command in commands:
+        transport.send_command(json.dumps(command).encode())
+    transport.close()
+    plugin.run()
+    responses = []
+    while True:
+        try:
+            responses.append(json.loads(transport.receive_response(0)))
+        except queue.Empty:
+            return responses
+
+
+class DispatchTest(unittest.TestCase):
+
+    def test_function_names_match_exactly_by_default(self) -> None:
+        plugin = Plugin('test', MemoryTransport())
+        plugin.command('get_status')(lambda: success_response('ok'))
+
+        responses = run_commands(plugin, 'Get_Status', 'get_status')
+
+        self.assertFalse(responses[0]['success'])
+        self.assertEqual(responses[1], {'success': True, 'message': 'ok'})
+
+    def test_ignore_case_matches_any_case(self) -> None:
+        plugin = Plugin('test', MemoryTransport(), ignore_case=True)
+        plugin.command('Get_Status')(lambda: success_response('ok'))
+
+        responses = run_commands(plugin, 'GET_STATUS', 'get_status', 'SHUTDOWN', 'get_status')
+
+        self.assertEqual(responses[:2], [{'success': True, 'message': 'ok'}] * 2)
+        # the plugin stopped at SHUTDOWN, so the last command was never answered
+        self.assertEqual(len(responses), 3)
+
+    def test_removed_command_is_unknown(self) -> None:
+        plugin = Plugin('test', MemoryTransport())
+        plugin.command('get_status')(lambda: success_response('ok'))
+        plugin.command('initialize')(lambda: success_response('custom'))
+        plugin.remove_command('get_status')
+        plugin.remove_command('initialize')
+
+        responses = run_commands(plugin, 'get_status', 'initialize')
+
+        self.assertFalse(responses[0]['success'])
+        self.assertEqual(responses[1], {'success': True, 'message': 'initialize success.'})
+
+
+class ResponseTest(unittest.TestCase):
+
+    COMMAND = {'tool_calls': [{'func': 'first'}, {'func': 'second'}]}
+
+    def setUp(self) -> None:
+        self.plugin = Plugin('test', MemoryTransport(), concurrency=2)
+        self.plugin.command('first')(lambda: success_response('1'))
+        self.plugin.command('second')(lambda: success_response('2'))
+
+    def test_end_marker_framing_answers_each_command_once(self) -> None:
+        responses = serve(self.plugin, self.COMMAND, {'tool_calls': []})
+
+        self.assertEqual(responses[0], {'success': True, 'message': '2'})
+        self.assertFalse(responses[1]['success'])
+        self.assertEqual(len(responses), 2)
+
+    def test_negotiated_framing_answers_each_tool_call(self) -> None:
+        initialize = {'framing': ['ndjson'], 'tool_calls': [{'func': 'initialize'}]}
+        responses = serve(self.plugin, initialize, self.COMMAND)
+
+        self.assertEqual(responses[0]['framing'], 'ndjson')
+        self.assertEqual(responses[1:], [{'success': True, 'message': '1'}, {'success': True, 'message': '2'}])
+
+
+if __name__ == '__main__':
+    unittest.main()